@@ -43,6 +43,25 @@ const KEYWORD_SYNONYM_PAIRS = [
 ];
 
 const PRICE_TREND_FETCH_LIMIT = 6000;
+// scripts/build_price_daily.py 가 채우는 일별 집계 컬렉션
+const PRICE_DAILY_COLLECTION = 'price_daily';
+// 집계에 반영된 매물 표시 (crawler/db_utils.PRICE_DAILY_MARKER / PRICE_DAILY_BUCKET 과 같아야 함)
+const PRICE_DAILY_MARKER = 'price_daily_at';
+const PRICE_DAILY_BUCKET = 'price_daily_bucket';
+// 원본 경로의 아이폰 미니/프로 제외 규칙 (build_price_daily.IPHONE_VARIANT_PATTERN 과 같아야 함)
+const IPHONE_VARIANT_PATTERN = /미니|mini|프로|pro|프로맥스|promax/i;
+const PRICE_DAILY_CONDITION_GROUPS = {
+  '새 상품': 'S',
+  '사용감 없음': 'S',
+  '사용감 적음': 'A',
+  '사용감 많음': 'B',
+  '고장/파손 상품': 'C'
+};
+// scripts/build_time_to_sell.py 가 채우는 판매 소요 기간 통계 (모델·용량·상태 그룹·플랫폼별 1문서)
+const TIME_TO_SELL_COLLECTION = 'time_to_sell';
+// 문서의 median_price 대비 가격 비율 구간 (build_time_to_sell.BAND_EDGES 와 같아야 함)
+const TIME_TO_SELL_BAND_EDGES = [0.95, 1.05];
+const TIME_TO_SELL_BAND_NAMES = ['below', 'at', 'above'];
 const RECOMMEND_PRICE_FETCH_LIMIT = 6000;
 const RECOMMEND_PRICE_WINDOW_DAYS = 7;
 
@@ -796,6 +815,81 @@ const getPriceStats = async (req, res) => {
     res.status(500).json({ error: '서버 에러' });
   }
 };
+// 요청 조건을 price_daily 상태 그룹으로 변환. 그룹 일부만 요청하면 집계로 답할 수 없으므로 null
+const resolvePriceDailyGroups = (conditionValues = []) => {
+  if (!conditionValues.length) return [];
+  const groups = new Set();
+  for (const value of conditionValues) {
+    const group = PRICE_DAILY_CONDITION_GROUPS[value];
+    if (!group) return null;
+    groups.add(group);
+  }
+  for (const group of groups) {
+    const members = Object.keys(PRICE_DAILY_CONDITION_GROUPS).filter(
+      (condition) => PRICE_DAILY_CONDITION_GROUPS[condition] === group
+    );
+    if (!members.every((condition) => conditionValues.includes(condition))) {
+      return null;
+    }
+  }
+  return [...groups];
+};
+
+// 집계는 모델 기준으로 제목을 걸렀다 (케이스/교환/구합니다, 기본 아이폰 모델의 미니/프로 제목).
+// 원본 경로는 키워드 기준으로 거르므로 두 규칙이 같은 결과를 낼 때만 집계를 쓴다
+const priceDailyTitleRulesMatch = (model, keywordRaw) => {
+  if (!keywordRaw) return false;
+  const lowerKeyword = keywordRaw.toLowerCase();
+  const keywordExcludesVariants =
+    /아이폰|iphone/.test(lowerKeyword) && !IPHONE_VARIANT_PATTERN.test(lowerKeyword);
+  const modelExcludesVariants =
+    model.startsWith('iphone') && !IPHONE_VARIANT_PATTERN.test(model);
+  return keywordExcludesVariants === modelExcludesVariants;
+};
+
+// 아직 집계되지 않은(표시 없는) 매물이 이 모델에 하나도 없어야 버킷이 원본과 같다.
+// 모델이 바뀌어 예전 버킷에서 빠져야 하는 매물도 포함 (price_daily_at 인덱스로 조회)
+const priceDailyIsCurrent = async (model) => {
+  const pending = await Product.collection.findOne(
+    {
+      [PRICE_DAILY_MARKER]: { $exists: false },
+      $or: [{ model_name: model }, { [`${PRICE_DAILY_BUCKET}.model_name`]: model }]
+    },
+    { projection: { _id: 1 } }
+  );
+  return !pending;
+};
+
+const loadPriceDailyBuckets = async ({
+  model,
+  keywordRaw,
+  storage,
+  conditionValues,
+  platformValues,
+  windowStart,
+  windowEnd
+}) => {
+  const groups = resolvePriceDailyGroups(conditionValues);
+  if (!model || groups === null) return null;
+  if (!priceDailyTitleRulesMatch(model, keywordRaw)) return null;
+  // 반영 안 된 새 매물·바뀐 가격이 있으면 빠진 날이 생기므로 원본으로 계산
+  if (!(await priceDailyIsCurrent(model))) return null;
+
+  const filter = {
+    model_name: model,
+    day: { $gte: formatDateKey(windowStart), $lte: formatDateKey(windowEnd) }
+  };
+  if (storage) filter.storage = storage;
+  if (groups.length) filter.condition_group = { $in: groups };
+  if (platformValues.length) filter.platform = { $in: platformValues };
+
+  const buckets = await Product.db
+    .collection(PRICE_DAILY_COLLECTION)
+    .find(filter, { projection: { day: 1, platform: 1, count: 1, sum: 1 } })
+    .toArray();
+  return buckets.length ? buckets : null;
+};
+
 const getPriceTrend = async (req, res) => {
   try {
     const keywordRaw = (req.query.keyword || '').trim();
@@ -876,72 +970,99 @@ const getPriceTrend = async (req, res) => {
       filter.platform = { $in: platformValues };
     }
 
-    const docs = await Product.find(filter)
-      .sort({ _id: -1 })
-      .limit(PRICE_TREND_FETCH_LIMIT)
-      .lean();
-
-    const effectiveNormalized =
-      normalizedKeyword && normalizedKeyword.length >= 2
-        ? normalizedKeyword
-        : normalizeForKeywordMatch(keywordRaw);
-    const shouldApplyKeywordNarrowing =
-      !resolvedModel &&
-      !appliedTitleNormalizationFilter &&
-      effectiveNormalized &&
-      effectiveNormalized.length >= 2;
-    const narrowedDocs =
-      shouldApplyKeywordNarrowing
-        ? docs.filter((item) => {
-            const fields = [
-              item.title_normalization,
-              item.title,
-              item.description,
-              item.model_name,
-              item.model
-            ].filter((value) => typeof value === 'string' && value.trim().length);
-            if (!fields.length) return false;
-            return fields.some((value) =>
-              normalizeKeywordForSearch(value).includes(effectiveNormalized)
-            );
-          })
-        : docs;
-    const sourceDocs = narrowedDocs.length ? narrowedDocs : docs;
-
     const dailyBuckets = new Map();
     const platformBuckets = new Map();
 
-    for (const item of sourceDocs) {
-      const condition = canonicalizeConditionValue(item.condition);
-      if (conditionSet.size && (!condition || !conditionSet.has(condition))) {
-        continue;
-      }
+    // 모델이 확정되면 미리 집계된 price_daily 를 인덱스로 조회하고, 없을 때만 원본을 스캔
+    const dailyAggregates = await loadPriceDailyBuckets({
+      model: resolvedModel,
+      keywordRaw,
+      storage: resolvedStorage,
+      conditionValues,
+      platformValues,
+      windowStart,
+      windowEnd
+    });
 
-      const itemPlatform =
-        typeof item.platform === 'string' ? item.platform.trim() : '';
-      if (platformSet.size && (!itemPlatform || !platformSet.has(itemPlatform))) {
-        continue;
+    if (dailyAggregates) {
+      for (const bucketDoc of dailyAggregates) {
+        const bucket = dailyBuckets.get(bucketDoc.day) || { sum: 0, count: 0 };
+        bucket.sum += bucketDoc.sum;
+        bucket.count += bucketDoc.count;
+        dailyBuckets.set(bucketDoc.day, bucket);
+
+        const platformKey = bucketDoc.platform || '기타';
+        const platformBucket =
+          platformBuckets.get(platformKey) || { sum: 0, count: 0 };
+        platformBucket.sum += bucketDoc.sum;
+        platformBucket.count += bucketDoc.count;
+        platformBuckets.set(platformKey, platformBucket);
       }
+    } else {
+      const docs = await Product.find(filter)
+        .sort({ _id: -1 })
+        .limit(PRICE_TREND_FETCH_LIMIT)
+        .lean();
+
+      const effectiveNormalized =
+        normalizedKeyword && normalizedKeyword.length >= 2
+          ? normalizedKeyword
+          : normalizeForKeywordMatch(keywordRaw);
+      const shouldApplyKeywordNarrowing =
+        !resolvedModel &&
+        !appliedTitleNormalizationFilter &&
+        effectiveNormalized &&
+        effectiveNormalized.length >= 2;
+      const narrowedDocs =
+        shouldApplyKeywordNarrowing
+          ? docs.filter((item) => {
+              const fields = [
+                item.title_normalization,
+                item.title,
+                item.description,
+                item.model_name,
+                item.model
+              ].filter((value) => typeof value === 'string' && value.trim().length);
+              if (!fields.length) return false;
+              return fields.some((value) =>
+                normalizeKeywordForSearch(value).includes(effectiveNormalized)
+              );
+            })
+          : docs;
+      const sourceDocs = narrowedDocs.length ? narrowedDocs : docs;
+
+      for (const item of sourceDocs) {
+        const condition = canonicalizeConditionValue(item.condition);
+        if (conditionSet.size && (!condition || !conditionSet.has(condition))) {
+          continue;
+        }
 
-      const uploadedAt = parseUploadDate(item.upload_time || item.uploaded_at);
-      if (!uploadedAt) continue;
-      if (uploadedAt < windowStart || uploadedAt > windowEnd) continue;
-
-      const price = parsePriceValue(item.price);
-      if (!price || price <= 0) continue;
+        const itemPlatform =
+          typeof item.platform === 'string' ? item.platform.trim() : '';
+        if (platformSet.size && (!itemPlatform || !platformSet.has(itemPlatform))) {
+          continue;
+        }
 
-      const dayKey = formatDateKey(uploadedAt);
-      const bucket = dailyBuckets.get(dayKey) || { sum: 0, count: 0 };
-      bucket.sum += price;
-      bucket.count += 1;
-      dailyBuckets.set(dayKey, bucket);
-
-      const platformKey = itemPlatform || '기타';
-      const platformBucket =
-        platformBuckets.get(platformKey) || { sum: 0, count: 0 };
-      platformBucket.sum += price;
-      platformBucket.count += 1;
-      platformBuckets.set(platformKey, platformBucket);
+        const uploadedAt = parseUploadDate(item.upload_time || item.uploaded_at);
+        if (!uploadedAt) continue;
+        if (uploadedAt < windowStart || uploadedAt > windowEnd) continue;
+
+        const price = parsePriceValue(item.price);
+        if (!price || price <= 0) continue;
+
+        const dayKey = formatDateKey(uploadedAt);
+        const bucket = dailyBuckets.get(dayKey) || { sum: 0, count: 0 };
+        bucket.sum += price;
+        bucket.count += 1;
+        dailyBuckets.set(dayKey, bucket);
+
+        const platformKey = itemPlatform || '기타';
+        const platformBucket =
+          platformBuckets.get(platformKey) || { sum: 0, count: 0 };
+        platformBucket.sum += price;
+        platformBucket.count += 1;
+        platformBuckets.set(platformKey, platformBucket);
+      }
     }
 
     const timeline = {};
@@ -1680,6 +1801,89 @@ const getListingRecommendation = async (req, res) => {
   }
 };
 
+const pickTimeToSellBand = (doc, price) => {
+  if (!price || !doc.median_price) return null;
+  const ratio = price / doc.median_price;
+  const index = TIME_TO_SELL_BAND_EDGES.filter((edge) => ratio >= edge).length;
+  const name = TIME_TO_SELL_BAND_NAMES[index];
+  return doc.bands && doc.bands[name] ? { name, stats: doc.bands[name] } : null;
+};
+
+// 미리 계산된 time_to_sell 문서만 읽어 "이 가격이면 얼마나 빨리 팔리나"에 답한다.
+// 여러 플랫폼·상태 그룹 문서는 매물 수로 가중 평균한다.
+// 예: GET /products/time-to-sell?keyword=갤럭시 s24 256&price=850000&condition=A급
+const getTimeToSell = async (req, res) => {
+  try {
+    const keywordRaw = (req.query.keyword || '').trim();
+    const { model: canonicalModel, storage: canonicalStorage } = deriveQueryContext(keywordRaw);
+    const explicitModel = typeof req.query.model === 'string' ? req.query.model.trim() : '';
+    const explicitStorage =
+      typeof req.query.storage === 'string' ? req.query.storage.trim() : '';
+    const model = explicitModel || canonicalModel || '';
+    const storage = explicitStorage || canonicalStorage || '';
+    if (!model) {
+      return res.status(400).json({ error: '모델을 특정할 수 없습니다.' });
+    }
+
+    const price = parsePriceValue(req.query.price);
+    const groups = resolvePriceDailyGroups(parseConditionParam(req.query.condition));
+    const platformValues = parsePlatformParam(req.query.platform);
+
+    const filter = { model_name: model };
+    if (storage) filter.storage = storage;
+    if (groups && groups.length) filter.condition_group = { $in: groups };
+    if (platformValues.length) filter.platform = { $in: platformValues };
+
+    const docs = await Product.db
+      .collection(TIME_TO_SELL_COLLECTION)
+      .find(filter, { projection: { _id: 0, updated_at: 0 } })
+      .toArray();
+    if (!docs.length) {
+      return res.json({ model, storage, message: '판매 기간 통계가 아직 없습니다.' });
+    }
+
+    let weight = 0;
+    let sold = 0;
+    let medianWeighted = 0;
+    let medianWeight = 0;
+    const sellWithin = {};
+    const bandsUsed = [];
+    for (const doc of docs) {
+      const band = pickTimeToSellBand(doc, price);
+      const stats = band ? band.stats : doc;
+      if (band) bandsUsed.push(band.name);
+      const listings = stats.listings || 0;
+      weight += listings;
+      sold += stats.sold || 0;
+      if (typeof stats.median_days === 'number') {
+        medianWeighted += stats.median_days * listings;
+        medianWeight += listings;
+      }
+      Object.entries(stats.sell_within || {}).forEach(([days, probability]) => {
+        sellWithin[days] = (sellWithin[days] || 0) + probability * listings;
+      });
+    }
+    Object.keys(sellWithin).forEach((days) => {
+      sellWithin[days] = weight ? Number((sellWithin[days] / weight).toFixed(3)) : null;
+    });
+
+    res.json({
+      model,
+      storage,
+      price: price || null,
+      band: bandsUsed.length ? [...new Set(bandsUsed)] : null,
+      listings: weight,
+      sold,
+      median_days: medianWeight ? Number((medianWeighted / medianWeight).toFixed(1)) : null,
+      sell_within: sellWithin,
+      buckets: docs
+    });
+  } catch (err) {
+    console.error('Error in getTimeToSell:', err);
+    res.status(500).json({ error: '서버 에러' });
+  }
+};
+
 module.exports = {
   getAllProducts,
   getPriceStats,
@@ -1691,6 +1895,7 @@ module.exports = {
   recommendPrice,
   getUploadTrends,
   getDailyPriceDistribution,
+  getTimeToSell,
   createReferenceRange,
   createReferenceAndPreviousRanges
 };
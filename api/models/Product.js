@@ -4,8 +4,10 @@ const mongoose = require('mongoose');
 const productSchema = new mongoose.Schema({
   title: String,            // 제품 제목
   price: String,            // 가격 문자열
+  price_int: Number,        // 숫자 가격 (수집 시 price에서 파싱)
   condition: String,        // 제품 상태
   upload_time: String,      // 게시 시간
+  uploaded_at: Date,        // 게시 시간 (수집 시 upload_time에서 파싱)
   region: String,           // 거래 지역
   url: String,              // 상세 페이지 링크
   image_url: String,        // 이미지 URL
@@ -9,7 +9,8 @@ const {
   getListingRecommendation,
   recommendPrice,
   getUploadTrends,
-  getDailyPriceDistribution
+  getDailyPriceDistribution,
+  getTimeToSell
 } = require('../controllers/productController'); // 컨트롤러 함수 불러오기
 const chatbotController = require('../controllers/chatbotController');
 
@@ -32,4 +33,8 @@ router.get('/upload-trends', getUploadTrends);
 
 router.get('/daily-price-distribution', getDailyPriceDistribution);
 
+// 판매 소요 기간 (build_time_to_sell.py 집계)
+// 예: GET /products/time-to-sell?keyword=갤럭시 s24 256&price=850000
+router.get('/time-to-sell', getTimeToSell);
+
 module.exports = router; // 라우터 내보내기
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+One-time migration: add `price_int` and `uploaded_at` to existing products.
+
+New listings get both fields at save time (see typed_fields.py); this script
+fills them in for documents written before that, then ensures the product
+indexes (db_utils.PRODUCT_INDEXES) so range filters and sorts on price/date
+run inside MongoDB.
+
+Usage:
+    python backfill_typed_fields.py --mongodb-uri mongodb://localhost:27017 \
+        --database market2 --collection products
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Dict, List
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.collection import Collection
+
+from db_utils import ensure_indexes
+from typed_fields import typed_fields
+
+
+def backfill(
+    collection: Collection,
+    batch_size: int = 1000,
+    force: bool = False,
+    log_interval: int = 10000,
+) -> Dict[str, int]:
+    query = {} if force else {
+        "$or": [
+            {"price_int": {"$exists": False}},
+            {"uploaded_at": {"$exists": False}},
+        ]
+    }
+    stats = {
+        "total": collection.count_documents(query),
+        "processed": 0,
+        "updated": 0,
+        "price_missing": 0,
+        "time_missing": 0,
+    }
+
+    cursor = collection.find(
+        query, {"_id": 1, "price": 1, "upload_time": 1}, no_cursor_timeout=True
+    ).batch_size(batch_size)
+    operations: List[UpdateOne] = []
+
+    try:
+        for doc in cursor:
+            stats["processed"] += 1
+            fields = typed_fields(doc)
+            if fields["price_int"] is None:
+                stats["price_missing"] += 1
+            if fields["uploaded_at"] is None:
+                stats["time_missing"] += 1
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+
+            if len(operations) >= batch_size:
+                stats["updated"] += collection.bulk_write(operations, ordered=False).modified_count
+                operations.clear()
+
+            if log_interval and stats["processed"] % log_interval == 0:
+                print(f"[backfill] {stats['processed']}/{stats['total']} processed")
+    finally:
+        cursor.close()
+
+    if operations:
+        stats["updated"] += collection.bulk_write(operations, ordered=False).modified_count
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Add price_int / uploaded_at to products and create indexes."
+    )
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompute the fields even for documents that already have them.",
+    )
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongodb_uri)
+    collection = client[args.database][args.collection]
+    stats = backfill(collection, batch_size=args.batch_size, force=args.force)
+    created = ensure_indexes(collection)
+    client.close()
+
+    print(
+        "Typed field backfill complete. "
+        f"Processed: {stats['processed']}, updated: {stats['updated']}, "
+        f"unparsed price: {stats['price_missing']}, unparsed upload_time: {stats['time_missing']}."
+    )
+    for name, result in created.items():
+        print(f"Index {name}: {result}")
+
+
+if __name__ == "__main__":
+    main()
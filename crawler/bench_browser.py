@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the resource-blocking browser profile against the full profile.
+
+For each site, one driver per profile loads the crawler's first list page
+--repeat times and reports:
+
+    * load time: driver.get() until the crawler's list selector is present
+    * resources fetched and bytes transferred (Resource Timing API)
+    * JS heap (CDP Performance.getMetrics) and, when psutil is installed,
+      RSS of the whole chromedriver/Chrome process tree
+
+Usage:
+    python bench_browser.py --site bunjang --site joongna --repeat 5
+    CRAWLER_BROWSER_ALLOW_DAANGN=fonts python bench_browser.py --site daangn
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from selenium.webdriver.common.by import By
+
+import browser_profile
+from shared import init_browser
+from waits import wait_for_located
+
+try:
+    import psutil
+except ImportError:  # optional: without it only the JS heap is reported
+    psutil = None
+
+# site → (list page, selector the crawler waits for)
+SAMPLE_PAGES = {
+    "bunjang": ("https://m.bunjang.co.kr/categories/600700001?&order=date&page=1", "a[href^='/products/']"),
+    "joongna": ("https://web.joongna.com/search?category=139&saleYn=SALE_Y&sort=RECENT_SORT&page=1",
+                "a[href^='/product/']"),
+    "daangn": ("https://www.daangn.com/kr/buy-sell/?search=%EC%95%84%EC%9D%B4%ED%8F%B0",
+               "a[data-gtm='search_article']"),
+}
+
+RESOURCE_JS = """
+const entries = performance.getEntriesByType('resource');
+return [entries.length, entries.reduce((sum, e) => sum + (e.transferSize || 0), 0)];
+"""
+
+
+def process_tree_rss(driver):
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes if p.is_running())
+    except (psutil.Error, AttributeError):
+        return None
+
+
+def js_heap(driver):
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        return next((m["value"] for m in metrics if m["name"] == "JSHeapUsedSize"), None)
+    except Exception:
+        return None
+
+
+def bench_profile(site, profile, repeat):
+    url, css = SAMPLE_PAGES[site]
+    driver = init_browser(site, profile)
+    loads, counts, sizes = [], [], []
+    try:
+        for _ in range(repeat):
+            started = time.monotonic()
+            driver.get(url)
+            found = wait_for_located(driver, By.CSS_SELECTOR, css, site, timeout=20)
+            loads.append(time.monotonic() - started if found is not None else float("nan"))
+            count, size = driver.execute_script(RESOURCE_JS)
+            counts.append(count)
+            sizes.append(size)
+        return {
+            "load_s": statistics.median(loads),
+            "resources": statistics.median(counts),
+            "kb": statistics.median(sizes) / 1024,
+            "heap_mb": (js_heap(driver) or 0) / 1024 / 1024,
+            "rss_mb": (process_tree_rss(driver) or 0) / 1024 / 1024,
+        }
+    finally:
+        driver.quit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the crawl browser profiles.")
+    parser.add_argument("--site", action="append", choices=list(SAMPLE_PAGES), default=[])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'site':<9}{'profile':<8}{'load':>8}{'reqs':>7}{'transfer':>11}{'js heap':>10}{'rss':>10}")
+    for site in args.site or list(SAMPLE_PAGES):
+        print(f"# {site}: blocking {len(browser_profile.blocked_patterns(site))} URL patterns, "
+              f"allow={browser_profile.site_allow(site)}")
+        for profile in ("full", "fast"):
+            r = bench_profile(site, profile, max(1, args.repeat))
+            rss = f"{r['rss_mb']:.0f}MB" if psutil is not None else "-"
+            print(f"{site:<9}{profile:<8}{r['load_s']:>7.2f}s{r['resources']:>7.0f}"
+                  f"{r['kb']:>9.0f}KB{r['heap_mb']:>8.1f}MB{rss:>10}")
+
+
+if __name__ == "__main__":
+    main()
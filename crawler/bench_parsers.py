@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Offline parser benchmark over captured HTML fixtures.
+
+Capture fixtures by running any crawler with CRAWLER_FIXTURE_DIR set (see
+fixtures.py); each page is stored with the fields the live crawler extracted.
+This script re-runs every platform's list/detail parser against those pages,
+without a browser or network, and reports:
+
+    * parse time per page (median / p90 over --repeat runs) for each HTML
+      backend in html_backend.py (html.parser, lxml, selectolax) and the
+      per-page saving against html.parser
+    * field accuracy: share of fields equal to the captured `expected` values
+      (relative-time fields such as upload_time are skipped — they depend on
+      the capture time)
+
+Without --dir or CRAWLER_FIXTURE_DIR it reads the pages committed under
+tests/fixtures. Those are synthetic ("synthetic": true in their meta.json):
+one hand-built page per platform/kind, shaped like the markup each parser
+targets, so the accuracy check runs on a fresh checkout. Their timings say
+little about real pages, which are many times larger; the report flags them,
+and numbers worth quoting come from pages captured with CRAWLER_FIXTURE_DIR.
+
+Timing here is a plain min-of-N perf_counter loop rather than pytest-benchmark:
+the report compares backends side by side next to field accuracy and runs as
+a script without pytest. tests/test_parser_speed.py times the same parsers
+with the pytest-benchmark fixture when that plugin is installed.
+
+Usage:
+    python bench_parsers.py
+    CRAWLER_FIXTURE_DIR=./fixtures CRAWLER_FIXTURE_LIMIT=30 python bunjangCrawler.py --end-page 2
+    python bench_parsers.py --dir ./fixtures --repeat 5
+    python bench_parsers.py --only joongna/detail --show-mismatches
+    python bench_parsers.py --backend html.parser --backend selectolax
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Tuple
+
+import bunjangCrawler
+import daangn_detail
+import daangnCrawler
+import fixtures
+import html_backend
+import joongnaCrawler
+
+BUNDLED_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "fixtures")
+
+Parser = Callable[[str, Dict[str, Any], str], Any]
+
+
+def _bunjang_list(html, meta, backend):
+    links, ad_skipped = bunjangCrawler.parse_list_html(html, backend)
+    return {"links": links, "ad_skipped": ad_skipped}
+
+
+def _joongna_list(html, meta, backend):
+    return {"links": joongnaCrawler.parse_list_html(html, backend)}
+
+
+def _daangn_list(html, meta, backend):
+    return {"records": daangnCrawler.parse_search_items(html_backend.parse_html(html, backend, only="a"))}
+
+
+# (platform, kind) → (parser, 비교에서 제외할 필드)
+# joongna/detail, daangn/detail 은 lxml XPath 고정이라 백엔드와 무관
+PARSERS: Dict[Tuple[str, str], Tuple[Parser, frozenset]] = {
+    ("bunjang", "list"): (_bunjang_list, frozenset()),
+    ("bunjang", "detail"): (lambda html, meta, backend: bunjangCrawler.parse_detail_html(html, meta.get("url"), backend),
+                            frozenset({"upload_time"})),
+    ("joongna", "list"): (_joongna_list, frozenset()),
+    ("joongna", "detail"): (lambda html, meta, backend: joongnaCrawler.parse_detail_html(html, meta.get("url")),
+                            frozenset({"upload_time"})),
+    ("daangn", "list"): (_daangn_list, frozenset()),
+    ("daangn", "detail"): (lambda html, meta, backend: daangn_detail.parse_detail_html(html), frozenset()),
+}
+
+
+def normalize_expected(platform, kind, expected):
+    # daangn list 는 레코드 목록 자체가 expected
+    if platform == "daangn" and kind == "list" and isinstance(expected, list):
+        return {"records": expected}
+    return expected
+
+
+def compare(expected, actual, skip):
+    """(일치 필드 수, 비교 필드 수, 불일치 필드 목록)"""
+    if not isinstance(expected, dict):
+        return (1, 1, []) if expected == actual else (0, 1, ["<result>"])
+    if not isinstance(actual, dict):
+        return 0, len(expected), ["<result>"]
+    fields = [k for k in expected if k not in skip]
+    mismatched = [k for k in fields if expected[k] != actual.get(k)]
+    return len(fields) - len(mismatched), len(fields), mismatched
+
+
+def bench(platform, kind, pages, backend, repeat, show_mismatches):
+    parser, skip = PARSERS[(platform, kind)]
+
+    timings = []
+    matched = total = 0
+    mismatches = Counter()
+    for html, meta in pages:
+        per_page = []
+        actual = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            actual = parser(html, meta, backend)
+            per_page.append((time.perf_counter() - started) * 1000)
+        timings.append(min(per_page))
+
+        expected = normalize_expected(platform, kind, meta.get("expected"))
+        if expected is None:
+            continue
+        ok, count, fields = compare(expected, actual, skip)
+        matched += ok
+        total += count
+        mismatches.update(fields)
+        if show_mismatches and fields:
+            print(f"  ✗ {meta.get('url')}: {', '.join(fields)}")
+
+    timings.sort()
+    return {
+        "pages": len(pages),
+        "synthetic": sum(bool(meta.get("synthetic")) for _, meta in pages),
+        "median_ms": statistics.median(timings),
+        "p90_ms": timings[min(len(timings) - 1, int(len(timings) * 0.9))],
+        "accuracy": matched / total if total else None,
+        "mismatches": mismatches.most_common(3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark crawler parsers on saved HTML fixtures.")
+    parser.add_argument("--dir", default=fixtures.FIXTURE_DIR or BUNDLED_FIXTURE_DIR)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per page; the fastest is kept.")
+    parser.add_argument("--only", action="append", default=[], metavar="PLATFORM/KIND")
+    parser.add_argument("--backend", action="append", default=[], choices=html_backend.BACKENDS,
+                        help="HTML backend(s) to compare (default: every installed one).")
+    parser.add_argument("--show-mismatches", action="store_true")
+    args = parser.parse_args()
+
+    selected = [tuple(o.split("/", 1)) for o in args.only] or list(PARSERS)
+    backends = args.backend or html_backend.available_backends()
+    print(f"{'parser':<16}{'backend':<13}{'pages':>6}{'median':>10}{'p90':>10}{'saving':>9}"
+          f"{'accuracy':>10}  top mismatches")
+    for platform, kind in selected:
+        name = f"{platform}/{kind}"
+        pages = fixtures.load(platform, kind, args.dir)
+        if not pages:
+            print(f"{name:<16}{'-':<13}{'-':>6}  (no fixtures)")
+            continue
+        baseline = None
+        for backend in backends:
+            result = bench(platform, kind, pages, backend, max(1, args.repeat), args.show_mismatches)
+            # saving: 첫 백엔드(기본 html.parser) 대비 페이지당 절감 ms
+            if baseline is None:
+                baseline, saving = result["median_ms"], "-"
+            else:
+                saving = f"{baseline - result['median_ms']:+.2f}"
+            accuracy = f"{result['accuracy']:.1%}" if result["accuracy"] is not None else "-"
+            top = ", ".join(f"{field}×{n}" for field, n in result["mismatches"])
+            if result["synthetic"]:
+                top = f"(synthetic {result['synthetic']}/{result['pages']}) {top}".rstrip()
+            print(
+                f"{name:<16}{backend:<13}{result['pages']:>6}{result['median_ms']:>8.2f}ms"
+                f"{result['p90_ms']:>8.2f}ms{saving:>9}{accuracy:>10}  {top}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import logging
+from fnmatch import fnmatch
+from typing import Dict, List
+
+# 크롤링용 브라우저 프로필. 크롤러는 텍스트와 이미지 URL(src 속성)만 읽으므로
+# 이미지·미디어·폰트·광고/분석 스크립트는 받을 필요가 없다.
+#   - 이미지: Chrome 환경설정(managed_default_content_settings.images = 2)
+#   - 나머지: CDP Network.setBlockedURLs 패턴
+#   - page load strategy "eager": DOMContentLoaded 에서 get() 반환 (요소는 wait_* 로 기다림)
+# 사이트별 허용 목록(SITE_ALLOW)에 규칙 이름("fonts") 또는 패턴("*googletagmanager.com*")을
+# 넣으면 그 사이트에서는 차단하지 않는다.
+# CRAWLER_BROWSER_PROFILE=full 이면 예전처럼 모든 리소스를 받는다 (bench_browser.py 비교용).
+# CRAWLER_BROWSER_ALLOW_<SITE>=fonts,*.svg 로 허용 목록을 덧붙일 수 있다.
+
+BLOCK_RULES: Dict[str, List[str]] = {
+    "media": ["*.mp4", "*.webm", "*.m3u8", "*.mp3"],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*",
+        "*doubleclick.net*", "*googleadservices.com*", "*connect.facebook.net*",
+        "*analytics.tiktok.com*", "*wcs.naver.net*", "*t1.daumcdn.net/kas*",
+        "*amplitude.com*", "*hotjar.com*", "*clarity.ms*", "*criteo.com*",
+        "*braze.com*", "*sentry.io*", "*datadoghq*",
+    ],
+}
+# 이미지는 CDP 패턴 대신 환경설정으로 막는다 (img 태그/CSS 배경/lazy 로딩 모두 차단)
+IMAGE_RULE = "images"
+
+# 예: "daangn": ["fonts", "*sentry.io*"] → 당근마켓에서는 폰트와 sentry 를 차단하지 않음
+SITE_ALLOW: Dict[str, List[str]] = {
+    "default": [],
+    "bunjang": [],
+    "joongna": [],
+    "daangn": [],
+}
+
+PROFILES = ("fast", "full")
+
+
+def current_profile():
+    profile = os.environ.get("CRAWLER_BROWSER_PROFILE", "fast")
+    if profile not in PROFILES:
+        logging.warning(f"[browser] 알 수 없는 프로필 {profile} → fast")
+        return "fast"
+    return profile
+
+
+def site_allow(site):
+    allow = list(SITE_ALLOW.get(site or "default", []))
+    extra = os.environ.get(f"CRAWLER_BROWSER_ALLOW_{(site or 'default').upper()}", "")
+    allow.extend(item.strip() for item in extra.split(",") if item.strip())
+    return allow
+
+
+def blocked_patterns(site=None):
+    """site 에서 차단할 CDP URL 패턴 목록."""
+    allow = site_allow(site)
+    patterns = []
+    for rule, rule_patterns in BLOCK_RULES.items():
+        if rule in allow:
+            continue
+        patterns.extend(p for p in rule_patterns if not any(fnmatch(p, a) for a in allow))
+    return patterns
+
+
+def apply_options(opts, site=None, profile=None):
+    """webdriver.Chrome 생성 전 Options 설정. 적용한 프로필 이름을 반환."""
+    profile = profile or current_profile()
+    if profile == "full":
+        return profile
+    opts.page_load_strategy = "eager"
+    if IMAGE_RULE not in site_allow(site):
+        opts.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_argument("--mute-audio")
+    opts.add_argument("--autoplay-policy=user-gesture-required")
+    return profile
+
+
+def apply_driver(driver, site=None, profile=None):
+    """드라이버 생성 직후 CDP 차단 규칙 적용."""
+    if (profile or current_profile()) == "full":
+        return
+    patterns = blocked_patterns(site)
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        # CDP 미지원 드라이버(원격 등)는 환경설정 차단만으로 진행
+        logging.warning(f"[browser] 리소스 차단 규칙 적용 실패 ({site}): {e}")
@@ -0,0 +1,63 @@
+import logging
+import threading
+from datetime import datetime, timezone
+
+# 긴 크롤링의 진행 상황을 작업 단위로 기록해 중단 후 이어서 실행한다.
+#   단위 예: 중고나라 "스마트폰|37" (카테고리|페이지), 당근마켓 "아이폰@<지역 URL>"
+# 실행(run) 하나가 문서 하나이며, 끝까지 완료되면 finished_at 이 기록된다.
+# --resume 이면 같은 플랫폼의 가장 최근 미완료 실행을 이어받아 완료된 단위를 건너뛴다.
+CHECKPOINT_COLLECTION = "crawl_checkpoints"
+
+
+class CheckpointStore:
+    def __init__(self, db, platform):
+        self.collection = db[CHECKPOINT_COLLECTION]
+        self.platform = platform
+        self.run_id = None
+        self._done = set()
+        self._lock = threading.Lock()
+
+    def open(self, resume=False):
+        run = None
+        if resume:
+            run = self.collection.find_one(
+                {"platform": self.platform, "finished_at": None},
+                sort=[("started_at", -1)],
+            )
+        if run:
+            self._done = set(run.get("units") or [])
+            logging.info(
+                f"[checkpoint] {self.platform}: {run['started_at']} 실행 이어서 진행 "
+                f"(완료 단위 {len(self._done)}개 건너뜀)"
+            )
+            self.run_id = run["_id"]
+        else:
+            if resume:
+                logging.info(f"[checkpoint] {self.platform}: 이어받을 미완료 실행 없음 → 새로 시작")
+            self.run_id = self.collection.insert_one({
+                "platform": self.platform,
+                "started_at": datetime.now(timezone.utc),
+                "finished_at": None,
+                "units": [],
+            }).inserted_id
+        return self
+
+    def is_done(self, unit):
+        with self._lock:
+            return unit in self._done
+
+    def mark_done(self, unit):
+        with self._lock:
+            if unit in self._done:
+                return
+            self._done.add(unit)
+        self.collection.update_one(
+            {"_id": self.run_id},
+            {"$addToSet": {"units": unit}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        )
+
+    def complete(self):
+        self.collection.update_one(
+            {"_id": self.run_id}, {"$set": {"finished_at": datetime.now(timezone.utc)}}
+        )
+        logging.info(f"[checkpoint] {self.platform}: 실행 완료 ({len(self._done)}개 단위)")
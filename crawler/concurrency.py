@@ -0,0 +1,177 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+import metrics
+
+# 플랫폼별 AIMD(가산 증가 / 곱셈 감소) 동시성·요청 간격 제어기.
+#   - window 개 결과마다 평가: 오류율과 평균 지연이 건강하면 한도 +1, 요청 간격 ×0.8
+#   - 타임아웃 / 빈 페이지 / 드라이버 재시작 / 오류가 error_rate 를 넘거나 지연이
+#     기준(가장 좋았던 창 평균 × latency_tolerance, 최소 target_latency)을 넘으면 한도 ×0.5, 간격 ×2
+#   - 감소 후 한 창 동안은 다시 줄이지 않는다 (연쇄 감소 방지)
+# 당근마켓 상세는 워커 수(max_limit)까지 동시 실행 한도를 조절하고, 브라우저 1개로 도는
+# 번개장터·중고나라는 max_limit=1 이라 요청 간격만 조절된다.
+# 설정은 CONTROLLER_PROFILES, 환경변수 CRAWLER_AIMD_<SITE>_<KEY> 로 덮어쓴다
+# (예: CRAWLER_AIMD_DAANGN_MAX_LIMIT=10). 현재 상태는 metrics 게이지로 노출된다.
+
+CONTROLLER_PROFILES: Dict[str, Dict[str, float]] = {
+    "default": {
+        "min_limit": 1,
+        "max_limit": 1,
+        "initial_limit": 1,
+        "min_interval": 0.0,      # 요청 시작 사이 최소 간격(초)
+        "max_interval": 10.0,
+        "target_latency": 5.0,    # 이보다 빠르면 항상 건강한 지연으로 본다
+        "latency_tolerance": 2.0,
+        "error_rate": 0.2,
+        "window": 20,
+    },
+    "daangn": {"max_limit": 8, "initial_limit": 2, "target_latency": 3.0},
+    "joongna": {"min_interval": 0.2, "window": 10},
+    "bunjang": {"window": 10},
+}
+BAD_SIGNALS = ("timeout", "empty", "restart", "error", "throttled")
+
+
+def controller_setting(site, key):
+    env_key = f"CRAWLER_AIMD_{site.upper()}_{key.upper()}"
+    if env_key in os.environ:
+        return float(os.environ[env_key])
+    profile = CONTROLLER_PROFILES.get(site, {})
+    return float(profile.get(key, CONTROLLER_PROFILES["default"][key]))
+
+
+class AimdController:
+    def __init__(self, site, max_limit=None):
+        self.site = site
+        self.min_limit = int(controller_setting(site, "min_limit"))
+        self.max_limit = int(max_limit or controller_setting(site, "max_limit"))
+        self.min_limit = min(self.min_limit, self.max_limit)
+        self.limit = max(self.min_limit, min(self.max_limit, int(controller_setting(site, "initial_limit"))))
+        self.min_interval = controller_setting(site, "min_interval")
+        self.max_interval = controller_setting(site, "max_interval")
+        self.interval = self.min_interval
+        self.target_latency = controller_setting(site, "target_latency")
+        self.latency_tolerance = controller_setting(site, "latency_tolerance")
+        self.error_rate = controller_setting(site, "error_rate")
+        self.window = int(controller_setting(site, "window"))
+        self.in_flight = 0
+        self.best_latency = None
+        self._results = deque()
+        self._hold = 0  # 감소 직후 평가를 건너뛸 결과 수
+        self._next_start = 0.0
+        self._cond = threading.Condition()
+        self._publish()
+
+    # --- 실행 게이트 ---------------------------------------------------------
+    @contextmanager
+    def slot(self):
+        """한도 안에서 실행 + 요청 간격 유지. 정상 종료는 지연과 함께 'ok', 예외는 'error' 로 기록."""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            wait = self._next_start - time.monotonic()
+            self._next_start = max(self._next_start, time.monotonic()) + self.interval
+            self._publish()
+        if wait > 0:
+            time.sleep(wait)
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record(time.monotonic() - started, "error")
+            raise
+        else:
+            self.record(time.monotonic() - started, "ok")
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+                self._publish()
+
+    def pace(self):
+        """동시성 없이 요청 간격만 지킬 때 (단일 드라이버 크롤러)."""
+        with self._cond:
+            wait = self._next_start - time.monotonic()
+            self._next_start = max(self._next_start, time.monotonic()) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+    # --- 피드백 --------------------------------------------------------------
+    def record(self, latency=None, outcome="ok"):
+        """latency(초)와 결과: ok / timeout / empty / restart / error / throttled."""
+        with self._cond:
+            if self._hold:
+                self._hold -= 1
+                return
+            self._results.append((latency, outcome))
+            if len(self._results) >= self.window:
+                self._evaluate()
+
+    def signal(self, outcome):
+        self.record(None, outcome)
+
+    def _evaluate(self):
+        results = list(self._results)
+        self._results.clear()
+        bad = sum(1 for _, outcome in results if outcome in BAD_SIGNALS)
+        latencies = [l for l, outcome in results if l is not None and outcome == "ok"]
+        mean = sum(latencies) / len(latencies) if latencies else None
+        if mean is not None and (self.best_latency is None or mean < self.best_latency):
+            self.best_latency = mean
+        allowed = max(self.target_latency, (self.best_latency or 0) * self.latency_tolerance)
+        slow = mean is not None and mean > allowed
+
+        if bad / len(results) > self.error_rate or slow:
+            old = (self.limit, self.interval)
+            self.limit = max(self.min_limit, self.limit // 2)
+            self.interval = min(self.max_interval, max(self.interval * 2, self.min_interval, 0.5))
+            self._hold = self.window
+            metrics.inc("crawler_concurrency_changes_total", platform=self.site, direction="down")
+            logging.info(
+                f"[aimd] {self.site}: 감소 (문제 {bad}/{len(results)}, 평균 지연 "
+                f"{mean if mean is not None else 0:.2f}s) 한도 {old[0]}→{self.limit}, "
+                f"간격 {old[1]:.2f}→{self.interval:.2f}s"
+            )
+        else:
+            changed = False
+            if self.limit < self.max_limit:
+                self.limit += 1
+                changed = True
+            interval = max(self.min_interval, self.interval * 0.8)
+            if interval < 0.05:
+                interval = self.min_interval
+            changed = changed or interval != self.interval
+            self.interval = interval
+            if changed:
+                metrics.inc("crawler_concurrency_changes_total", platform=self.site, direction="up")
+            self._cond.notify_all()
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("crawler_concurrency_limit", self.limit, platform=self.site)
+        metrics.set_gauge("crawler_in_flight", self.in_flight, platform=self.site)
+        metrics.set_gauge("crawler_request_interval_seconds", round(self.interval, 3), platform=self.site)
+
+    def state(self):
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self.in_flight,
+                    "interval": self.interval, "best_latency": self.best_latency}
+
+
+_controllers: Dict[str, AimdController] = {}
+_controllers_lock = threading.Lock()
+
+
+def controller_for(site, max_limit=None):
+    """플랫폼별 제어기 (프로세스 안에서 공유). max_limit 은 처음 만들 때만 적용."""
+    with _controllers_lock:
+        controller = _controllers.get(site)
+        if controller is None:
+            controller = _controllers[site] = AimdController(site, max_limit)
+        return controller
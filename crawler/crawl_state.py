@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime, timezone
+
+# 최신순 정렬 목록을 증분 크롤링할 때 쓰는 카테고리별 상태.
+#   - 이미 DB 에 있는 URL 이 연속 known_streak 개 나오면 그 아래는 지난 실행에서 본 매물로 보고 중단
+#   - 지난 실행 첫 페이지의 최상단 URL(high-water mark)을 만나면 끌올 등으로 섞인 항목을 감안해
+#     더 짧은 연속 구간(threshold // 4, 최소 3)만 확인하고 중단
+STATE_COLLECTION = "crawl_state"
+DEFAULT_KNOWN_STREAK = 40
+MIN_STREAK_AFTER_MARK = 3
+
+
+class KnownStreak:
+    def __init__(self, threshold=DEFAULT_KNOWN_STREAK, high_water_url=None):
+        self.threshold = max(1, threshold)
+        self.high_water_url = high_water_url
+        self.streak = 0
+        self.reached_mark = False
+        self.stopped = False
+        self.seen = 0
+
+    @property
+    def limit(self):
+        if self.reached_mark:
+            return min(self.threshold, max(MIN_STREAK_AFTER_MARK, self.threshold // 4))
+        return self.threshold
+
+    def feed(self, links, known):
+        """목록 순서대로 링크를 넣고, 중단 조건을 만족하면 True."""
+        for link in links:
+            self.seen += 1
+            if link == self.high_water_url:
+                self.reached_mark = True
+            if link in known:
+                self.streak += 1
+                if self.streak >= self.limit:
+                    self.stopped = True
+                    return True
+            else:
+                self.streak = 0
+        return False
+
+
+class CrawlState:
+    def __init__(self, db):
+        self.collection = db[STATE_COLLECTION]
+
+    @staticmethod
+    def _key(platform, category):
+        return f"{platform}|{category}"
+
+    def load(self, platform, category):
+        return self.collection.find_one({"_id": self._key(platform, category)}) or {}
+
+    def streak(self, platform, category, threshold=DEFAULT_KNOWN_STREAK):
+        state = self.load(platform, category)
+        return KnownStreak(threshold, state.get("high_water_url"))
+
+    def finish(self, platform, category, newest_url, stop_page=None, stopped_early=False):
+        fields = {
+            "platform": platform,
+            "category": category,
+            "last_run_at": datetime.now(timezone.utc),
+            "last_stop_page": stop_page,
+            "last_stopped_early": stopped_early,
+        }
+        if newest_url:
+            fields["high_water_url"] = newest_url
+        self.collection.update_one(
+            {"_id": self._key(platform, category)}, {"$set": fields}, upsert=True
+        )
+        logging.info(
+            f"[state] {platform}/{category}: high-water 갱신, "
+            f"{'조기 중단' if stopped_early else '끝까지 진행'} (마지막 페이지 {stop_page})"
+        )
@@ -1,88 +1,135 @@
-from shared import init_browser, wait_for_presence
+from shared import init_browser
+from waits import wait_for_count_increase, count_elements, wait_recorder
 # Override DB saver with upsert-based implementation to avoid duplicates
 from db_utils import save_to_mongodb_upsert as save_to_mongodb
+from db_utils import known_urls
+from seen_urls import SeenUrls
+from task_scheduler import SearchTask, TaskBudget, TaskScheduler
+from crawl_state import CrawlState, DEFAULT_KNOWN_STREAK
+from checkpoints import CheckpointStore
+from jsonl_sink import JsonlSink
+import fixtures
+import metrics
+import retry
+from concurrency import controller_for
+from html_backend import parse_html
+from daangn_detail import DaangnDetailFetcher, MISSING_DESCRIPTION, MISSING_UPLOAD_TIME
 import os
-import re
-import json
-import time
+import argparse
+import queue
 import logging
-from datetime import datetime
-from bs4 import BeautifulSoup
+import threading
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from urllib.parse import quote
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from selenium.common.exceptions import TimeoutException
-from selenium.common.exceptions import (TimeoutException, StaleElementReferenceException)
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 MAX_WORKERS = int(os.environ.get("DAANGN_MAX_WORKERS", "6"))
+# 목록 로딩과 상세 수집을 분리: 목록 드라이버는 링크만 모으고, 상세는 별도 워커 풀이 처리
+LIST_WORKERS = int(os.environ.get("DAANGN_LIST_WORKERS", str(max(1, MAX_WORKERS // 3))))
+DETAIL_WORKERS = int(os.environ.get("DAANGN_DETAIL_WORKERS", str(max(1, MAX_WORKERS - LIST_WORKERS))))
+DETAIL_SAVE_BATCH = int(os.environ.get("DAANGN_SAVE_BATCH", "20"))
+QUEUE_PUT_TIMEOUT = 5.0  # 상세 대기열이 가득 찼을 때 워커 생존을 다시 확인하는 주기(초)
+# 1 이면 상세 페이지를 HTTP + lxml 로 먼저 파싱하고, 실패한 항목만 브라우저로 재시도
+HTTP_DETAIL = os.environ.get("DAANGN_HTTP_DETAIL", "1") == "1"
+# 상세 워커의 대체 브라우저는 워커가 끝날 때까지 유지되므로, 목록 로더(풀 "daangn")와 슬롯 풀을 나눈다
+DETAIL_BROWSER_POOL = "daangn_detail"
 
+SHOW_MORE_CSS = 'div[data-gtm="search_show_more_articles"] > button'
+ARTICLE_CSS = "a[data-gtm='search_article']"
+# 더보기 버튼 stale 은 재시도, TimeoutException(버튼 없음)은 목록 끝이라 바로 전달
+MORE_BUTTON_RETRY = retry.retrier(
+    "daangn.more_button",
+    retry.policy_for("daangn", max_attempts=5, retry_on=(StaleElementReferenceException,)),
+    platform="daangn",
+    breaker=None,
+)
+_STOP = object()
 
-def scrape_daangn(region_url):
-    driver = init_browser()
-    driver.get(region_url)
-    results = []
-    
-    # while True:
-    #     try:
-    #         # 텍스트가 '더보기'인 버튼을 찾고 스크롤 후 클릭
-    #         more_button = WebDriverWait(driver, 3).until(
-    #             EC.presence_of_element_located((By.XPATH, "//button[normalize-space(text())='더보기']"))
-    #         )
-    #         driver.execute_script("arguments[0].scrollIntoView(true);", more_button)
-    #         time.sleep(0.5)
-    #         driver.execute_script("arguments[0].click();", more_button)
-    #         logging.info("✅ 더보기 버튼 클릭됨")
-    #         time.sleep(1)  # 로딩 대기
-    #     except:
-    #         logging.info("▶ 더보기 버튼이 더 이상 존재하지 않음 — 전체 상품 로드 완료")
-    #         break
-
-    SHOW_MORE_CSS = 'div[data-gtm="search_show_more_articles"] > button'
 
-    while True:
-        try:
-            # 1) 화면 맨 아래까지 한 번 스크롤 – 새 버튼을 렌더링시키기
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, SHOW_MORE_CSS)))
-
-            # 2) 버튼 **다시** 찾기 → stale 방지
-            more_btn = driver.find_element(By.CSS_SELECTOR, SHOW_MORE_CSS)
-
-            # 3) 중앙에 오도록 스크롤 후 JS 클릭
-            driver.execute_script(
-                "arguments[0].scrollIntoView({block:'center'});", more_btn)
-            driver.execute_script("arguments[0].click();", more_btn)
-
-            logging.info("✅  더보기 버튼 클릭됨")
-            time.sleep(1)                          # Ajax 로딩 대기
-
-        except StaleElementReferenceException:
-            logging.debug("↻  버튼이 재-렌더링됨, 다시 시도")
-            continue                               # while True 처음으로
-
-        except TimeoutException:
-            logging.info("▶  더보기 버튼이 더 이상 없음 — 전체 상품 로드 완료")
-            break
-    
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    items = soup.select("a[data-gtm='search_article']")
-
-    for item in items:
+def _current_links(driver):
+    hrefs = driver.execute_script(
+        "return Array.from(document.querySelectorAll(arguments[0])).map(a => a.getAttribute('href'));",
+        ARTICLE_CSS) or []
+    return ["https://www.daangn.com" + href for href in hrefs if href]
+
+
+def load_search_list(search_url, streak=None, collection=None):
+    """검색 결과 목록을 끝까지 펼친 뒤 (link, title, price, region, status) 레코드 목록을 반환.
+
+    streak(KnownStreak) 가 주어지면 증분 모드: 새로 펼쳐진 링크가 DB 에 연속으로 있으면
+    더보기를 멈춘다.
+    """
+    driver = init_browser("daangn")
+    try:
+        with metrics.timer("crawler_page_load_seconds", platform="daangn", kind="list"):
+            driver.get(search_url)
+        metrics.inc("crawler_pages_total", platform="daangn", kind="list")
+        checked = 0
+
+        while True:
+            if streak is not None:
+                links = _current_links(driver)
+                fresh, checked = links[checked:], len(links)
+                if fresh and streak.feed(fresh, known_urls(collection, fresh)):
+                    logging.info(f"▶  연속 중복 {streak.streak}건 — 증분 모드로 더보기 중단")
+                    break
+            try:
+                # 재-렌더링으로 버튼이 stale 해지면 백오프 후 다시 찾는다 (연속 횟수 제한)
+                MORE_BUTTON_RETRY.call(_click_more, driver)
+            except (StaleElementReferenceException, retry.RetryExhausted):
+                logging.warning("▶  더보기 버튼이 계속 재-렌더링됨 — 지금까지 펼친 목록으로 진행")
+                break
+            except TimeoutException:
+                logging.info("▶  더보기 버튼이 더 이상 없음 — 전체 상품 로드 완료")
+                break
+
+        html = driver.page_source
+        with metrics.timer("crawler_parse_seconds", platform="daangn", kind="list"):
+            records = parse_search_items(parse_html(html, only="a"))
+        fixtures.capture("daangn", "list", search_url, html, records)
+        return records
+    finally:
+        driver.quit()
+
+
+def _click_more(driver):
+    # 1) 화면 맨 아래까지 한 번 스크롤 – 새 버튼을 렌더링시키기
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    WebDriverWait(driver, 5).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, SHOW_MORE_CSS)))
+
+    # 2) 버튼 **다시** 찾기 → stale 방지
+    more_btn = driver.find_element(By.CSS_SELECTOR, SHOW_MORE_CSS)
+
+    # 3) 중앙에 오도록 스크롤 후 JS 클릭
+    before = count_elements(driver, ARTICLE_CSS)
+    driver.execute_script(
+        "arguments[0].scrollIntoView({block:'center'});", more_btn)
+    driver.execute_script("arguments[0].click();", more_btn)
+
+    logging.info("✅  더보기 버튼 클릭됨")
+    # Ajax 로딩 대기: 고정 1초 대신 게시글 수가 늘어나는 시점까지
+    wait_for_count_increase(driver, ARTICLE_CSS, before, site="daangn")
+
+
+def parse_search_items(soup):
+    """검색 목록 Node(html_backend.parse_html) → 목록 레코드."""
+    records = []
+    for item in soup.select(ARTICLE_CSS):
         try:
-            link = "https://www.daangn.com" + item.get("href")
+            link = "https://www.daangn.com" + item.attr("href")
             spans = item.select("span")
-            #img_tag = item.select_one("img")
 
             status = "판매중"
             title = "제목 정보 없음"
             price = "가격 정보 없음"
             region = "지역 정보 없음"
 
-            text_spans = [s.text.strip() for s in spans if s.text.strip()]
+            text_spans = [t for t in (s.text(strip=False).strip() for s in spans) if t]
             if text_spans:
                 if text_spans[0] in ["예약중", "판매완료"]:
                     status = text_spans[0]
@@ -100,132 +147,442 @@ def scrape_daangn(region_url):
                     if len(text_spans) > 2:
                         region = text_spans[2].split("·")[0].strip()
 
-            #img_url = img_tag["src"] if img_tag else None
+            records.append({
+                "link": link,
+                "title": title,
+                "price": price,
+                "region": region,
+                "status": status,
+            })
+        except Exception as e:
+            logging.warning(f"❌ 목록 항목 파싱 오류: {e}")
+    return records
 
-            driver.get(link)
-            #detail_soup = BeautifulSoup(driver.page_source, "html.parser")
 
-            #desc_tag = detail_soup.select_one("p.jy3q4ic")
-            #time_tag = detail_soup.select_one("time")
+def fetch_detail(driver, record):
+    """목록 레코드에 상세 페이지의 이미지·본문·등록 시간을 채워 저장용 dict 로 만든다."""
+    link = record["link"]
+    with metrics.timer("crawler_page_load_seconds", platform="daangn", kind="detail"):
+        driver.get(link)
+    metrics.inc("crawler_pages_total", platform="daangn", kind="detail")
 
-            #description = desc_tag.text.strip() if desc_tag else "상세 설명 없음"
-            #post_time = time_tag["datetime"] if time_tag and time_tag.has_attr("datetime") else "등록 시간 정보 없음"
-            
+    img_url = None
+    try:
+        og = WebDriverWait(driver, 2, poll_frequency=0.1).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "meta[property='og:image']"))
+        )
+        img_url = og.get_attribute("content")
+    except TimeoutException:
+        # 백업: 페이지 내 첫번째 상품 이미지 시도
+        try:
+            first_img = driver.find_element(By.CSS_SELECTOR, "article img")
+            img_url = (
+                first_img.get_attribute("src")
+                or first_img.get_attribute("data-src")
+                or (first_img.get_attribute("srcset") or "").split(" ")[0]
+            )
+        except Exception:
             img_url = None
-            try:
-                og = WebDriverWait(driver, 2, poll_frequency=0.1).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "meta[property='og:image']"))
-                )
-                img_url = og.get_attribute("content")
-            except TimeoutException:
-                # 백업: 페이지 내 첫번째 상품 이미지 시도
-                try:
-                    first_img = driver.find_element(By.CSS_SELECTOR, "article img")
-                    img_url = (
-                        first_img.get_attribute("src")
-                        or first_img.get_attribute("data-src")
-                        or (first_img.get_attribute("srcset") or "").split(" ")[0]
-                    )
-                except Exception:
-                    img_url = None
-            
-            # 본문
-            try:
-                desc_elt = WebDriverWait(driver, 6).until(
-                    EC.visibility_of_element_located(
-                        (By.XPATH, "//*[@id='main-content']/article/div[1]/div[2]/section[2]/p")
-                    )
-                )
-                description = desc_elt.text.strip()
-                if not description:  # <br> 줄바꿈 보존
-                    html = desc_elt.get_attribute("innerHTML") or ""
-                    description = (html.replace("<br>", "\n")
-                                    .replace("<br/>", "\n")
-                                    .replace("<br />", "\n")
-                                    .strip())
-            except TimeoutException:
-                description = "상세 설명 없음"
 
-            # 등록 시간
-            try:
-                time_elt = WebDriverWait(driver, 3).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "time"))
-                )
-                post_time = time_elt.get_attribute("datetime") or "등록 시간 정보 없음"
-            except TimeoutException:
-                post_time = "등록 시간 정보 없음"
+    # 본문
+    try:
+        desc_elt = WebDriverWait(driver, 6).until(
+            EC.visibility_of_element_located(
+                (By.XPATH, "//*[@id='main-content']/article/div[1]/div[2]/section[2]/p")
+            )
+        )
+        description = desc_elt.text.strip()
+        if not description:  # <br> 줄바꿈 보존
+            html = desc_elt.get_attribute("innerHTML") or ""
+            description = (html.replace("<br>", "\n")
+                            .replace("<br/>", "\n")
+                            .replace("<br />", "\n")
+                            .strip())
+    except TimeoutException:
+        description = "상세 설명 없음"
 
-            results.append({
-                "title": title,
-                "price": price,
-                "condition": "알 수 없음",
-                "upload_time": post_time,
-                "region": region,
-                "url": link,
-                "image_url": img_url,
-                "status": status,
-                "description": description,
-                "platform": "당근마켓"
-            })
+    # 등록 시간
+    try:
+        time_elt = WebDriverWait(driver, 3).until(
+            EC.presence_of_element_located((By.TAG_NAME, "time"))
+        )
+        post_time = time_elt.get_attribute("datetime") or "등록 시간 정보 없음"
+    except TimeoutException:
+        post_time = "등록 시간 정보 없음"
 
-        except Exception as e:
-            logging.warning(f"❌ 항목 처리 중 오류 발생: {e}")
-            continue
+    if fixtures.enabled():
+        fixtures.capture("daangn", "detail", link, driver.page_source,
+                         {"image_url": img_url, "description": description, "upload_time": post_time})
+    return build_item(record, img_url, description, post_time)
+
+
+def build_item(record, image_url, description, upload_time):
+    return {
+        "title": record["title"],
+        "price": record["price"],
+        "condition": "알 수 없음",
+        "upload_time": upload_time or MISSING_UPLOAD_TIME,
+        "region": record["region"],
+        "url": record["link"],
+        "image_url": image_url,
+        "status": record["status"],
+        "description": description or MISSING_DESCRIPTION,
+        "platform": "당근마켓"
+    }
+
+
+class DetailClient:
+    """상세 수집기: HTTP 파싱 우선, 실패 시에만 드라이버를 띄워 Selenium 경로로 처리."""
+
+    def __init__(self, use_http=HTTP_DETAIL, controller=None):
+        self.http = DaangnDetailFetcher() if use_http else None
+        self.controller = controller
+        self.driver = None
+        self.http_ok = 0
+        self.fallbacks = 0
+
+    def fetch(self, record):
+        if self.http is not None:
+            fields, error = self.http.fetch(record["link"])
+            if fields:
+                self.http_ok += 1
+                return build_item(record, fields["image_url"], fields["description"], fields["upload_time"])
+            self.fallbacks += 1
+            metrics.inc("crawler_retries_total", platform="daangn", op="detail_browser_fallback")
+            if self.controller is not None and error:
+                # 429/5xx 와 요청 실패는 사이트가 버거워한다는 신호
+                if error.startswith("request failed"):
+                    self.controller.signal("timeout")
+                elif error == "page status 429" or error.startswith("page status 5"):
+                    self.controller.signal("throttled")
+            logging.debug(f"HTTP 상세 파싱 실패 → 브라우저로 재시도 ({error}): {record['link']}")
+        if self.driver is None:
+            self.driver = init_browser("daangn", pool=DETAIL_BROWSER_POOL)
+        return fetch_detail(self.driver, record)
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+def _save_batch(batch, label):
+    """배치를 저장하고 실제로 저장된 url 집합을 반환 (실패 시 빈 집합)."""
+    if not batch:
+        return set()
+    try:
+        result = save_to_mongodb(batch, "당근마켓")
+    except Exception as e:
+        logging.warning(f"검색 배치 저장 실패 ({label}): {e}")
+        return set()
+    failed = set(result.get("failed_urls") or ())
+    logging.info(f"검색 배치 저장: {len(batch) - len(failed)}/{len(batch)}건 ({label})")
+    return {item["url"] for item in batch} - failed
+
+
+def select_new_records(records, collection, seen=None, source=None):
+    """실행 내 중복(seen)과 DB 에 이미 있는 링크를 걸러 상세 수집 대상만 반환.
+
+    반환: (대상 레코드, 실행 내 중복 수, DB 중복 수)
+    """
+    links = [r["link"] for r in records]
+    fresh = set(seen.claim_many(links, source)) if seen is not None else set(links)
+    candidates = [r for r in records if r["link"] in fresh]
+    known = known_urls(collection, [r["link"] for r in candidates])
+    selected = [r for r in candidates if r["link"] not in known]
+    metrics.inc("crawler_skipped_total", len(records) - len(selected), platform="daangn", reason="duplicate")
+    return selected, len(records) - len(candidates), len(candidates) - len(selected)
+
+
+def scrape_daangn(region_url, seen=None):
+    """한 검색 URL 을 단일 드라이버로 목록 → 상세 순서대로 처리 (디버깅/단건 실행용)."""
+    records = load_search_list(region_url)
+    collection = _products_collection()
+    records, _, _ = select_new_records(records, collection, seen, region_url)
+    client = DetailClient()
+    results = []
+    try:
+        for record in records:
+            try:
+                results.append(client.fetch(record))
+                metrics.inc("crawler_listings_total", platform="daangn")
+            except Exception as e:
+                logging.warning(f"❌ 항목 처리 중 오류 발생: {e}")
+    finally:
+        client.close()
+        collection.database.client.close()
 
     # Persist per search_url to reduce data loss
-    if results:
+    _save_batch(results, region_url)
+    return results
+
+
+def _products_collection():
+    from pymongo import MongoClient
+    client = MongoClient("mongodb://localhost:27017/")
+    return client["market2"]["products"]
+
+
+class _TaskProgress:
+    """검색 작업별로 상세 수집 후 저장까지 끝나지 않은 항목 수를 세다가 0 이 되면 체크포인트 기록."""
+
+    def __init__(self, checkpoints):
+        self.checkpoints = checkpoints
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def listed(self, task_key, count):
+        if count == 0:
+            self.checkpoints.mark_done(task_key)
+            return
+        with self._lock:
+            self._pending[task_key] = self._pending.get(task_key, 0) + count
+
+    def finished(self, task_keys):
+        done = []
+        with self._lock:
+            for key in task_keys:
+                self._pending[key] -= 1
+                if self._pending[key] == 0:
+                    del self._pending[key]
+                    done.append(key)
+        for key in done:
+            self.checkpoints.mark_done(key)
+
+    def unfinished(self):
+        with self._lock:
+            return len(self._pending)
+
+
+def _detail_worker(worker_id, record_queue, sink, progress, controller):
+    client = DetailClient(controller=controller)
+    batch = []
+    batch_tasks = []
+    processed = 0
+
+    def flush():
+        saved = _save_batch(batch, f"detail-{worker_id}")
+        sink.write_many(batch)
+        # 저장된 매물의 작업만 진행 처리: 상세 수집·저장에 실패한 매물이 남은 작업은
+        # 체크포인트에 기록되지 않아 --resume 때 다시 수집된다
+        progress.finished([task for item, task in zip(batch, batch_tasks) if item["url"] in saved])
+        batch.clear()
+        batch_tasks.clear()
+
+    try:
+        while True:
+            record = record_queue.get()
+            if record is _STOP:
+                break
+            try:
+                # 동시 실행 수와 요청 간격은 AIMD 제어기가 정한다 (워커 수 = 최대 한도)
+                with controller.slot():
+                    data = client.fetch(record)
+                batch.append(data)
+                batch_tasks.append(record["task"])
+                processed += 1
+                metrics.inc("crawler_listings_total", platform="daangn")
+            except Exception as e:
+                logging.warning(f"❌ 항목 처리 중 오류 발생: {e}")
+            if len(batch) >= DETAIL_SAVE_BATCH:
+                flush()
+    finally:
+        flush()
+        client.close()
+    return processed, client.http_ok, client.fallbacks
+
+
+def _enqueue(record_queue, item, workers):
+    """대기열에 넣되, 상세 워커가 모두 끝나 비워 줄 쪽이 없으면 무한 대기 대신 False."""
+    while True:
         try:
-            save_to_mongodb(results, "당근마켓")
-            logging.info(f"검색 배치 저장: {len(results)}건 ({region_url})")
-        except Exception as e:
-            logging.warning(f"검색 배치 저장 실패 ({region_url}): {e}")
+            record_queue.put(item, timeout=QUEUE_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            if all(worker.done() for worker in workers):
+                return False
 
-    driver.quit()
-    return results
 
-def run_search_tasks(region_urls, keywords):
+def run_search_tasks(region_urls, keywords, time_budget=None, max_tasks=None, ignore_schedule=False,
+                     incremental=False, known_streak=DEFAULT_KNOWN_STREAK, resume=False,
+                     list_workers=None, detail_workers=None, seen=None, sink=None):
+    """지역×키워드 검색을 과거 신규 매물 yield 순으로 실행 (task_scheduler 참고).
+
+    time_budget(초) / max_tasks 를 넘기면 남은 작업은 다음 실행으로 미룬다.
+    ignore_schedule 이면 재방문 간격이 아직 안 된 작업도 포함한다.
+    incremental 이면 검색마다 이미 저장된 링크가 연속 known_streak 개 나올 때 더보기를 멈춘다.
+    resume 이면 가장 최근 미완료 실행에서 상세 저장까지 끝난 검색 작업을 건너뛴다.
+    list_workers / detail_workers / seen 은 orchestrator 가 동시성 한도와 공유 URL 목록을 넘길 때 사용.
+    detail_workers 는 상세 동시 실행의 상한이고, 실제 동시 실행 수는 concurrency.py 제어기가 조절한다.
+    결과는 sink(JsonlSink) 로 바로 기록하고, 기록한 매물 수를 반환한다.
+    """
     tasks = []
     for region_url in region_urls:
         for keyword in keywords:
             search_url = region_url + "&search=" + quote(keyword)
-            tasks.append((region_url, keyword, search_url))
+            tasks.append(SearchTask("당근마켓", region_url, keyword, search_url))
 
     if not tasks:
         logging.warning("[daangn] No region/keyword combinations to crawl.")
-        return []
-
-    max_workers = min(MAX_WORKERS, len(tasks)) or 1
-    all_results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_meta = {
-            executor.submit(scrape_daangn, search_url): (region_url, keyword)
-            for region_url, keyword, search_url in tasks
-        }
-        for future in as_completed(future_to_meta):
-            region_url, keyword = future_to_meta[future]
+        return 0
+
+    list_workers = min(list_workers or LIST_WORKERS, len(tasks)) or 1
+    detail_workers = max(detail_workers or DETAIL_WORKERS, 1)
+    collection = _products_collection()
+    scheduler = TaskScheduler(collection.database, "당근마켓")
+    tasks = scheduler.plan(tasks, include_not_due=ignore_schedule)
+    budget = TaskBudget(time_budget, max_tasks)
+    state = CrawlState(collection.database) if incremental else None
+    checkpoints = CheckpointStore(collection.database, "당근마켓").open(resume)
+    progress = _TaskProgress(checkpoints)
+    record_queue = queue.Queue(maxsize=detail_workers * 50)
+    controller = controller_for("daangn", max_limit=detail_workers)
+    own_sink = sink is None
+    if own_sink:
+        sink = JsonlSink.from_env("당근마켓")
+    written_before = sink.count
+    # 인접 지역·겹치는 키워드가 같은 게시글을 돌려주므로 실행 전체에서 한 번만 상세 수집
+    own_seen = seen is None
+    if own_seen:
+        seen = SeenUrls("daangn")
+    queued = skipped_known = 0
+
+    with ThreadPoolExecutor(max_workers=detail_workers, thread_name_prefix="daangn-detail") as detail_pool:
+        detail_futures = [
+            detail_pool.submit(_detail_worker, i, record_queue, sink, progress, controller)
+            for i in range(detail_workers)
+        ]
+
+        with ThreadPoolExecutor(max_workers=list_workers, thread_name_prefix="daangn-list") as list_pool:
+            # 예산을 작업 시작 시점에 확인하도록 워커 수만큼만 미리 제출
+            pending = (task for task in tasks if not checkpoints.is_done(task.key))
+            running = {}
+            budget_exhausted = False
+            workers_lost = False
+            # 검색이 실패한 작업은 체크포인트에 남지 않으므로 이번 실행을 완료로 닫지 않는다
+            search_failed = False
+
+            def submit_next():
+                nonlocal budget_exhausted
+                if workers_lost:
+                    return False
+                task = next(pending, None)
+                if task is None:
+                    return False
+                if not budget.take():
+                    budget_exhausted = True
+                    return False
+                streak = None
+                if state:
+                    streak = state.streak("당근마켓", f"{task.keyword}@{task.region_url}", known_streak)
+                running[list_pool.submit(load_search_list, task.search_url, streak, collection)] = (task, streak)
+                return True
+
+            for _ in range(list_workers):
+                if not submit_next():
+                    break
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, streak = running.pop(future)
+                    try:
+                        records = future.result()
+                    except Exception as exc:
+                        search_failed = True
+                        logging.error(f"[daangn] Search failed for region={task.region_url} keyword={task.keyword}: {exc}")
+                        submit_next()
+                        continue
+                    # 상세 페이지를 열기 전에 이번 실행에서 본 링크와 DB 에 있는 링크는 제외
+                    selected, _, known_count = select_new_records(
+                        records, collection, seen, f"{task.keyword}@{task.region_url}")
+                    skipped_known += known_count
+                    scheduler.record(task, len(selected), len(records))
+                    if state:
+                        state.finish("당근마켓", f"{task.keyword}@{task.region_url}",
+                                     records[0]["link"] if records else None, None, streak.stopped)
+                    progress.listed(task.key, len(selected))
+                    for record in selected:
+                        record["task"] = task.key
+                        if workers_lost or not _enqueue(record_queue, record, detail_futures):
+                            if not workers_lost:
+                                logging.error("[daangn] 상세 워커가 모두 종료됨 → 남은 검색 작업 중단")
+                            workers_lost = True
+                            break
+                        queued += 1
+                    submit_next()
+
+        if budget_exhausted:
+            logging.info(f"[daangn] 예산 소진: {budget.used}개 작업 실행, 나머지는 다음 실행(--resume)으로")
+
+        for _ in detail_futures:
+            if not _enqueue(record_queue, _STOP, detail_futures):
+                break
+        http_ok = fallbacks = 0
+        for future in detail_futures:
             try:
-                result = future.result()
+                _, worker_http, worker_fallbacks = future.result()
+                http_ok += worker_http
+                fallbacks += worker_fallbacks
             except Exception as exc:
-                logging.error(f"[daangn] Search failed for region={region_url} keyword={keyword}: {exc}")
-                continue
-            if result:
-                all_results.extend(result)
-    return all_results
+                logging.error(f"[daangn] Detail worker failed: {exc}")
 
+    unfinished = progress.unfinished()
+    if unfinished:
+        logging.info(f"[daangn] 상세 저장이 끝나지 않은 검색 작업 {unfinished}개 → 다음 실행(--resume)으로")
+    if not (budget_exhausted or workers_lost or search_failed or unfinished):
+        checkpoints.complete()
+    collection.database.client.close()
+    logging.info(f"[daangn] 상세 대기열 {queued}건, DB 중복으로 건너뜀 {skipped_known}건")
+    logging.info(f"[daangn] 상세 HTTP 파싱 {http_ok}건, 브라우저 대체 {fallbacks}건")
+    state_now = controller.state()
+    logging.info(f"[daangn] 상세 동시 실행 한도 {state_now['limit']}/{controller.max_limit}, "
+                 f"요청 간격 {state_now['interval']:.2f}s")
+    if own_seen:
+        seen.log_report()
+    wait_recorder.log_summary()
+    retry.log_report()
+    if own_sink:
+        sink.close()
+        logging.info(f"[daangn] 결과 파일: {', '.join(sink.paths) or '없음'}")
+    return sink.count - written_before
 
-if __name__ == "__main__":
-    with open("region_list.txt", "r", encoding="utf-8") as f:
-        region_urls = [line.strip() for line in f if line.strip()]
 
-    keywords = ["아이폰", "갤럭시", "아이패드"]
+KEYWORDS = ["아이폰", "갤럭시", "아이패드"]
+
+
+def load_region_urls(path="region_list.txt"):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="당근마켓 지역×키워드 검색 크롤러")
+    parser.add_argument("--time-budget", type=float, default=0, help="검색 작업을 새로 시작하는 시간 한도(초, 0=무제한)")
+    parser.add_argument("--max-tasks", type=int, default=0, help="실행할 최대 검색 작업 수 (0=무제한)")
+    parser.add_argument("--all", action="store_true", help="재방문 간격이 안 된 작업까지 모두 실행")
+    parser.add_argument("--incremental", action="store_true",
+                        help="이미 저장된 URL 이 연속으로 나오면 해당 검색의 더보기 중단")
+    parser.add_argument("--known-streak", type=int, default=DEFAULT_KNOWN_STREAK,
+                        help=f"증분 모드 중단 기준 연속 중복 수 (기본 {DEFAULT_KNOWN_STREAK})")
+    parser.add_argument("--resume", action="store_true",
+                        help="가장 최근 미완료 실행에서 끝난 검색 작업을 건너뛰고 이어서 진행")
+    args = parser.parse_args()
 
-    all_results = run_search_tasks(region_urls, keywords)
+    region_urls = load_region_urls()
+    keywords = KEYWORDS
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    os.makedirs("./output", exist_ok=True)
-    path = f"./output/당근마켓_result_{timestamp}.json"
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=4)
+    sink = JsonlSink.from_env("당근마켓")
+    exporter = metrics.start_exporter()
+    try:
+        written = run_search_tasks(
+            region_urls, keywords,
+            time_budget=args.time_budget, max_tasks=args.max_tasks, ignore_schedule=args.all,
+            incremental=args.incremental, known_streak=args.known_streak, resume=args.resume,
+            sink=sink,
+        )
+    finally:
+        sink.close()
+        exporter.stop()
 
-    print(f"당근마켓 크롤링 완료 → {path} (총 {len(all_results)}개)")
-    #save_to_mongodb(all_results, "당근마켓")
+    print(f"당근마켓 크롤링 완료 → {', '.join(sink.paths) or '파일 없음'} (총 {written}개)")
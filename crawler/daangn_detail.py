@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+# 당근 상세 페이지를 브라우저 없이 HTTP GET + lxml 로 파싱 (실패하면 daangnCrawler 가 Selenium 으로 대체).
+# 설명 순서: 본문 문단 → JSON-LD → __NEXT_DATA__ → og:description (사이트가 줄인 값, 최후 수단)
+# parse_listing_state / fetch_state 는 재확인(scripts/recheck_listings.py)용 가격·판매 상태만 읽는다.
+# 사용: python daangn_detail.py <저장한 html...> | --url <상세 url>
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import requests
+from lxml import html as lxml_html
+from requests import RequestException
+
+import fixtures
+import metrics
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/129.0.0.0 Safari/537.36"
+)
+DESCRIPTION_XPATH = "//*[@id='main-content']/article/div[1]/div[2]/section[2]/p"
+REQUIRED_FIELDS = ("description", "upload_time")
+MISSING_DESCRIPTION = "상세 설명 없음"
+MISSING_UPLOAD_TIME = "등록 시간 정보 없음"
+# schema.org availability → products.status
+AVAILABILITY_STATUS = {
+    "instock": "판매중",
+    "limitedavailability": "예약중",
+    "reserved": "예약중",
+    "soldout": "판매완료",
+    "outofstock": "판매완료",
+    "discontinued": "판매완료",
+}
+GONE_STATUS = (404, 410)
+# <meta charset> 없는 바이트 응답을 lxml 이 latin-1 로 읽지 않도록
+UTF8_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def _first(values: Iterable[Any]) -> Optional[str]:
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def _paragraph_text(element) -> str:
+    # text_content() 는 <br> 을 버리므로 줄바꿈으로 바꿔 둔다
+    for br in element.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+    return element.text_content().strip()
+
+
+def _json_ld_description(tree) -> Optional[str]:
+    for raw in tree.xpath("//script[@type='application/ld+json']/text()"):
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            continue
+        for item in payload if isinstance(payload, list) else [payload]:
+            if isinstance(item, dict) and isinstance(item.get("description"), str):
+                if item["description"].strip():
+                    return item["description"].strip()
+    return None
+
+
+def _find_description(data: Any) -> Optional[str]:
+    if isinstance(data, dict):
+        value = data.get("description")
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+        data = list(data.values())
+    if isinstance(data, list):
+        for item in data:
+            found = _find_description(item)
+            if found:
+                return found
+    return None
+
+
+def _next_data_description(tree) -> Optional[str]:
+    for raw in tree.xpath("//script[@id='__NEXT_DATA__']/text()"):
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            continue
+        if not isinstance(payload, dict):
+            continue
+        found = _find_description((payload.get("props") or {}).get("pageProps"))
+        if found:
+            return found
+    return None
+
+
+def parse_detail_html(page: str | bytes) -> Dict[str, Optional[str]]:
+    """image_url / description / upload_time (못 찾은 값은 None)."""
+    tree = lxml_html.fromstring(page, parser=UTF8_PARSER if isinstance(page, bytes) else None)
+
+    image_url = _first(tree.xpath("//meta[@property='og:image']/@content"))
+    if not image_url:
+        for img in tree.xpath("//article//img")[:1]:
+            image_url = _first((
+                img.get("src"),
+                img.get("data-src"),
+                (img.get("srcset") or "").split(" ")[0],
+            ))
+
+    description = None
+    for element in tree.xpath(DESCRIPTION_XPATH)[:1]:
+        description = _paragraph_text(element) or None
+    if not description:
+        description = _json_ld_description(tree)
+    if not description:
+        description = _next_data_description(tree)
+    if not description:
+        description = _first(tree.xpath("//meta[@property='og:description']/@content"))
+
+    upload_time = _first(tree.xpath("//time/@datetime"))
+    return {
+        "image_url": image_url,
+        "description": description,
+        "upload_time": upload_time,
+    }
+
+
+def _offer(tree) -> Dict[str, Any]:
+    for raw in tree.xpath("//script[@type='application/ld+json']/text()"):
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            continue
+        for item in payload if isinstance(payload, list) else [payload]:
+            offers = item.get("offers") if isinstance(item, dict) else None
+            if isinstance(offers, list):
+                offers = offers[0] if offers else None
+            if isinstance(offers, dict):
+                return offers
+    return {}
+
+
+def _price_int(value: Any) -> Optional[int]:
+    try:
+        return int(float(str(value).replace(",", "")))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_listing_state(page: str | bytes) -> Dict[str, Any]:
+    """price_int / status (못 찾은 값은 None)."""
+    tree = lxml_html.fromstring(page, parser=UTF8_PARSER if isinstance(page, bytes) else None)
+    offer = _offer(tree)
+    price = _price_int(offer.get("price"))
+    if price is None:
+        price = _price_int(_first(tree.xpath("//meta[@property='product:price:amount']/@content")))
+    availability = offer.get("availability") or _first(
+        tree.xpath("//meta[@property='product:availability']/@content")
+    )
+    status = None
+    if isinstance(availability, str):
+        key = availability.rsplit("/", 1)[-1].replace(" ", "").lower()
+        status = AVAILABILITY_STATUS.get(key)
+    return {"price_int": price, "status": status}
+
+
+def missing_fields(fields: Dict[str, Optional[str]]) -> list[str]:
+    return [name for name in REQUIRED_FIELDS if not fields.get(name)]
+
+
+class DaangnDetailFetcher:
+    """인스턴스마다 requests.Session 하나 — 워커 스레드마다 따로 만든다."""
+
+    def __init__(self, timeout: float = 5.0) -> None:
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept-Language": "ko-KR,ko;q=0.9",
+        })
+
+    def fetch(self, url: str) -> Tuple[Optional[Dict[str, Optional[str]]], Optional[str]]:
+        try:
+            with metrics.timer("crawler_page_load_seconds", platform="daangn", kind="detail_http"):
+                response = self.session.get(url, timeout=self.timeout)
+        except RequestException as exc:
+            return None, f"request failed ({exc.__class__.__name__})"
+        metrics.inc("crawler_pages_total", platform="daangn", kind="detail_http")
+        if response.status_code != 200:
+            return None, f"page status {response.status_code}"
+
+        with metrics.timer("crawler_parse_seconds", platform="daangn", kind="detail_http"):
+            fields = parse_detail_html(response.content)
+        if fixtures.enabled():
+            fixtures.capture("daangn", "detail", url, response.content.decode("utf-8", "replace"), fields)
+        missing = missing_fields(fields)
+        if missing:
+            return None, f"fields not found: {', '.join(missing)}"
+        return fields, None
+
+    def fetch_state(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """(state, error). 삭제된 게시글이면 state = {"gone": True}."""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except RequestException as exc:
+            return None, f"request failed ({exc.__class__.__name__})"
+        metrics.inc("crawler_pages_total", platform="daangn", kind="recheck")
+        if response.status_code in GONE_STATUS:
+            return {"gone": True}, None
+        if response.status_code != 200:
+            return None, f"page status {response.status_code}"
+        state = parse_listing_state(response.content)
+        if state["price_int"] is None and state["status"] is None:
+            return None, "price/status not found"
+        return state, None
+
+
+def verify_files(paths: Iterable[str]) -> int:
+    """저장한 상세 페이지를 파싱해 필드와 파싱 시간을 출력."""
+    failures = 0
+    total_ms = 0.0
+    count = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            page = f.read()
+        started = time.perf_counter()
+        fields = parse_detail_html(page)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        total_ms += elapsed_ms
+        count += 1
+
+        missing = missing_fields(fields)
+        failures += bool(missing)
+        status = "OK" if not missing else f"MISSING {', '.join(missing)}"
+        preview = (fields["description"] or "")[:40].replace("\n", " ")
+        print(
+            f"{status:<28} {elapsed_ms:6.1f}ms  {path}\n"
+            f"    time={fields['upload_time']} image={bool(fields['image_url'])} desc={preview!r}"
+        )
+    if count:
+        print(f"{count} files, {failures} with missing fields, avg parse {total_ms / count:.1f}ms")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Extract Daangn detail fields from saved HTML or a live URL."
+    )
+    parser.add_argument("files", nargs="*", help="Saved Daangn detail page HTML files.")
+    parser.add_argument("--url", action="append", default=[], help="Fetch a live page.")
+    args = parser.parse_args()
+
+    failures = verify_files(args.files)
+    fetcher = DaangnDetailFetcher()
+    for url in args.url:
+        started = time.perf_counter()
+        fields, error = fetcher.fetch(url)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{url} ({elapsed_ms:.0f}ms)")
+        print(json.dumps(fields, ensure_ascii=False, indent=2) if fields else f"    error: {error}")
+        failures += bool(error)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,116 @@
 import logging
-from typing import Iterable, Mapping
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+import metrics
+import price_history
+from typed_fields import apply_typed_fields
+
+# scripts/build_price_daily.py 의 집계 표시 (이름은 여기 한 곳에서 정하고 스크립트들이 가져다 쓴다).
+# $set 으로 매물을 덮어쓰면 표시를 지워 다음 집계 때 예전 가격을 빼고 새 값으로 다시 넣게 한다.
+PRICE_DAILY_MARKER = "price_daily_at"
+PRICE_DAILY_BUCKET = "price_daily_bucket"
+
+
+def _strip_price_daily(doc: Dict[str, Any]) -> None:
+    # 보관 파일 등에 섞여 온 집계 표시는 저장하지 않는다 ($unset 과 같은 경로 충돌도 막음)
+    doc.pop(PRICE_DAILY_MARKER, None)
+    doc.pop(PRICE_DAILY_BUCKET, None)
+
+
+def _upsert_update(doc: Mapping, operator: str = "$set") -> Dict[str, Any]:
+    if operator != "$set":
+        return {operator: doc}
+    return {"$set": doc, "$unset": {PRICE_DAILY_MARKER: ""}}
+
+
+class ProductWriter:
+    """여러 크롤러가 함께 쓰는 products 저장기: 클라이언트 하나로 url 기준 bulk upsert.
+
+    set_shared_writer() 로 등록하면 save_to_mongodb_upsert 호출이 모두 이쪽으로 모인다.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._lock = threading.Lock()
+        self.stats = defaultdict(lambda: {"inserted": 0, "updated": 0, "failed": 0, "batches": 0, "seconds": 0.0})
+
+    def write(self, data: Iterable[Mapping], platform: Optional[str], insert_only: bool = False) -> Dict[str, Any]:
+        """url 기준 upsert. insert_only 면 없는 매물만 추가($setOnInsert)하고 기존 매물은 그대로 둔다.
+
+        platform 이 None 이면 각 문서의 platform 을 건드리지 않는다 (보관 파일 가져오기 등).
+        반환: inserted / updated(일치) / modified(실제 변경) / failed 건수와 failed_urls.
+        """
+        from pymongo import InsertOne, UpdateOne
+        from pymongo.errors import BulkWriteError
+
+        operator = "$setOnInsert" if insert_only else "$set"
+        operations = []
+        docs = []
+        for item in data:
+            doc = dict(item)
+            if platform is not None:
+                doc["platform"] = platform
+            apply_typed_fields(doc)
+            _strip_price_daily(doc)
+            docs.append(doc)
+            url = doc.get("url")
+            if url:
+                operations.append(UpdateOne({"url": url}, _upsert_update(doc, operator), upsert=True))
+            else:
+                operations.append(InsertOne(doc))
+        if not operations:
+            return {"inserted": 0, "updated": 0, "modified": 0, "failed": 0, "failed_urls": []}
+        # $set 으로 덮어쓰기 전에 가격·상태 변화를 감지해 두었다가 저장 후 이력에 기록
+        commit_history = price_history.record_changes(self.collection, docs)
+
+        started = time.monotonic()
+        failed_urls = []
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as exc:
+            details = exc.details
+            errors = details.get("writeErrors", [])
+            failed_urls = [docs[e["index"]].get("url") for e in errors if "index" in e]
+            logging.warning(f"MongoDB bulk upsert 일부 실패 ({platform}): {len(errors)}건")
+        failed = len(details.get("writeErrors", []))
+        inserted = details.get("nUpserted", 0) + details.get("nInserted", 0)
+        updated = details.get("nMatched", 0)
+        elapsed = time.monotonic() - started
+        label = platform or "unknown"
+        metrics.observe("crawler_db_write_seconds", elapsed, platform=metrics.platform_key(label))
+        unwritten = list(failed_urls)
+        if insert_only:
+            # $setOnInsert 는 기존 매물을 바꾸지 않으므로 새로 추가된 매물만 이력에 남긴다
+            upserted = {row["index"] for row in details.get("upserted", [])}
+            unwritten += [doc.get("url") for i, doc in enumerate(docs) if i not in upserted]
+        commit_history(unwritten)
+
+        with self._lock:
+            stat = self.stats[label]
+            stat["inserted"] += inserted
+            stat["updated"] += updated
+            stat["failed"] += failed
+            stat["batches"] += 1
+            stat["seconds"] += elapsed
+        logging.info(f"MongoDB에 {inserted}개 insert, {updated}개 update ({label})")
+        return {"inserted": inserted, "updated": updated, "modified": details.get("nModified", 0),
+                "failed": failed, "failed_urls": failed_urls}
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {platform: dict(stat) for platform, stat in self.stats.items()}
+
+
+_shared_writer: Optional[ProductWriter] = None
+
+
+def set_shared_writer(writer: Optional[ProductWriter]) -> None:
+    global _shared_writer
+    _shared_writer = writer
 
 
 def save_to_mongodb_upsert(
@@ -8,7 +119,11 @@ def save_to_mongodb_upsert(
     mongo_uri: str = "mongodb://localhost:27017/",
     db_name: str = "market2",
     collection_name: str = "products",
-):
+) -> Dict[str, Any]:
+    """url 기준 upsert. 반환: inserted / updated / failed 건수와 저장에 실패한 failed_urls."""
+    if _shared_writer is not None:
+        return _shared_writer.write(data, platform)
+
     try:
         from pymongo import MongoClient
     except Exception as e:
@@ -18,15 +133,24 @@ def save_to_mongodb_upsert(
     client = MongoClient(mongo_uri)
     collection = client[db_name][collection_name]
 
+    docs = []
+    for item in data:
+        doc = dict(item)
+        doc["platform"] = platform
+        apply_typed_fields(doc)
+        _strip_price_daily(doc)
+        docs.append(doc)
+    commit_history = price_history.record_changes(collection, docs)
+
     inserted = 0
     updated = 0
-    for item in data:
+    failed_urls = []
+    started = time.monotonic()
+    for doc in docs:
         try:
-            doc = dict(item)
-            doc["platform"] = platform
             url = doc.get("url")
             if url:
-                res = collection.update_one({"url": url}, {"$set": doc}, upsert=True)
+                res = collection.update_one({"url": url}, _upsert_update(doc), upsert=True)
                 if res.matched_count == 0 and res.upserted_id is not None:
                     inserted += 1
                 else:
@@ -36,6 +160,82 @@ def save_to_mongodb_upsert(
                 inserted += 1
         except Exception as e:
             logging.warning(f"MongoDB upsert 실패: {e}")
+            failed_urls.append(doc.get("url"))
+    metrics.observe("crawler_db_write_seconds", time.monotonic() - started,
+                    platform=metrics.platform_key(platform))
+    commit_history(failed_urls)
 
     logging.info(f"MongoDB에 {inserted}개 insert, {updated}개 update ({platform})")
     client.close()
+    return {"inserted": inserted, "updated": updated, "failed": len(failed_urls), "failed_urls": failed_urls}
+
+
+# products 컬렉션에서 크롤러·스크립트·백엔드가 자주 쓰는 조회를 받쳐주는 인덱스 목록
+#   url                    : 크롤러 중복 검사, upsert 기준 (unique)
+#   title_normalization    : normalize_titles 의 {$exists: false} 조회 (null 범위만 읽음)
+#   condition              : llm_condition_backfill 의 condition="알 수 없음" 조회
+# 인덱스로 받쳐지지 않는 조회: 백엔드 키워드 검색(앞이 고정되지 않은 $regex → 전체 스캔),
+# update_condition 의 $nin/$exists:false 조회(부분 인덱스는 $exists:false 조건을 쓸 수 없음)
+#   platform + description : fetch_joongna_descriptions 의 설명 없는 매물 조회
+#   model/platform + 날짜·가격 : 백엔드 모델 검색, 기간·가격 범위 조회
+#   price_daily_at         : build_price_daily 증분 집계 대상, 백엔드 집계 반영 여부 확인
+#   recheck_due_at         : recheck_listings 의 재확인 대상 조회
+PRODUCT_INDEXES = [
+    {
+        "keys": [("url", 1)],
+        "name": "url_unique",
+        "unique": True,
+        "partialFilterExpression": {"url": {"$type": "string"}},
+    },
+    {"keys": [("title_normalization", 1)], "name": "title_normalization"},
+    {"keys": [("condition", 1)], "name": "condition"},
+    {"keys": [("platform", 1), ("description", 1)], "name": "platform_description"},
+    {
+        "keys": [("model_name", 1), ("storage", 1), ("uploaded_at", -1)],
+        "name": "model_storage_uploaded_at",
+    },
+    {"keys": [("model_name", 1), ("storage", 1), ("price_int", 1)], "name": "model_storage_price"},
+    {"keys": [("platform", 1), ("uploaded_at", -1)], "name": "platform_uploaded_at"},
+    {"keys": [("price_int", 1)], "name": "price_int"},
+    {"keys": [("price_daily_at", 1)], "name": "price_daily_at"},
+    {"keys": [("recheck_due_at", 1)], "name": "recheck_due_at"},
+]
+
+
+def ensure_indexes(collection, indexes=None) -> Dict[str, str]:
+    """선언된 인덱스를 백그라운드로 생성하고 이름별 결과("ok" 또는 오류 메시지)를 반환."""
+    from pymongo.errors import OperationFailure
+
+    results: Dict[str, str] = {}
+    for spec in indexes or PRODUCT_INDEXES:
+        options = {k: v for k, v in spec.items() if k != "keys"}
+        try:
+            collection.create_index(spec["keys"], background=True, **options)
+            results[spec["name"]] = "ok"
+        except OperationFailure as e:
+            # 예: url 중복 데이터가 남아 있으면 unique 인덱스 생성이 실패한다
+            logging.warning(f"인덱스 생성 실패 ({spec['name']}): {e}")
+            results[spec["name"]] = str(e)
+    return results
+
+
+def index_usage(collection) -> List[Dict[str, Any]]:
+    """$indexStats 기준 인덱스별 사용 횟수."""
+    usage = []
+    for row in collection.aggregate([{"$indexStats": {}}]):
+        accesses = row.get("accesses", {})
+        usage.append({
+            "name": row.get("name"),
+            "ops": int(accesses.get("ops", 0)),
+            "since": accesses.get("since"),
+        })
+    return sorted(usage, key=lambda r: r["ops"], reverse=True)
+
+
+def known_urls(collection, urls: Iterable[str]) -> Set[str]:
+    """urls 중 이미 DB에 있는 것만 한 번의 $in 조회로 돌려준다."""
+    candidates = [u for u in dict.fromkeys(urls) if u]
+    if not candidates:
+        return set()
+    cursor = collection.find({"url": {"$in": candidates}}, {"url": 1, "_id": 0})
+    return {doc["url"] for doc in cursor}
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Create the indexes declared in db_utils.PRODUCT_INDEXES and report usage.
+
+Indexes are built in the background, so this is safe to run while crawlers
+are writing. Usage counters come from `$indexStats` and reset when mongod
+restarts, so check them after the crawlers and scripts have run for a while.
+
+Usage:
+    python ensure_indexes.py --mongodb-uri mongodb://localhost:27017 \
+        --database market2 --collection products
+    python ensure_indexes.py --stats-only
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from pymongo import MongoClient
+
+from db_utils import PRODUCT_INDEXES, ensure_indexes, index_usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ensure products indexes and print $indexStats usage."
+    )
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument(
+        "--stats-only",
+        action="store_true",
+        help="Only print index usage statistics, do not create anything.",
+    )
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongodb_uri)
+    collection = client[args.database][args.collection]
+
+    if not args.stats_only:
+        results = ensure_indexes(collection)
+        failed = {name: msg for name, msg in results.items() if msg != "ok"}
+        print(f"Ensured {len(results) - len(failed)}/{len(PRODUCT_INDEXES)} indexes.")
+        for name, msg in failed.items():
+            print(f"  ! {name}: {msg}")
+
+    print("=== Index usage ($indexStats) ===")
+    for row in index_usage(collection):
+        since = row["since"].strftime("%Y-%m-%d %H:%M") if row["since"] else "-"
+        print(f"{row['name']:<28} ops={row['ops']:<10} since={since}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+# 파서 오프라인 검증용 HTML 수집 모드.
+# CRAWLER_FIXTURE_DIR 가 설정되면 크롤러가 목록/상세 페이지 원본 HTML 과 그때의 파싱 결과를
+#   <dir>/<platform>/<kind>/<slug>.html
+#   <dir>/<platform>/<kind>/<slug>.meta.json   (url, 수집 시각, expected = 파싱 결과)
+#   <dir>/<platform>/<kind>/<slug>.next.json   (__NEXT_DATA__ 가 있으면)
+# 로 저장한다. (platform, kind) 당 CRAWLER_FIXTURE_LIMIT 개(기본 50)까지만 저장.
+# 저장된 fixture 는 bench_parsers.py 로 파싱 속도·정확도를 측정한다.
+FIXTURE_DIR = os.environ.get("CRAWLER_FIXTURE_DIR")
+FIXTURE_LIMIT = int(os.environ.get("CRAWLER_FIXTURE_LIMIT", "50"))
+NEXT_DATA_PATTERN = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
+_counts = {}
+_lock = threading.Lock()
+
+
+def enabled():
+    return bool(FIXTURE_DIR)
+
+
+def _slug(url):
+    tail = re.sub(r"[^0-9A-Za-z]+", "_", url.split("//", 1)[-1])[-60:].strip("_")
+    return f"{tail}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}"
+
+
+def capture(platform, kind, url, html, expected=None):
+    """fixture 저장 (수집 모드가 아니거나 한도를 넘으면 아무것도 하지 않음)."""
+    if not FIXTURE_DIR or not html:
+        return
+    with _lock:
+        count = _counts.get((platform, kind), 0)
+        if count >= FIXTURE_LIMIT:
+            return
+        _counts[(platform, kind)] = count + 1
+    try:
+        directory = os.path.join(FIXTURE_DIR, platform, kind)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, _slug(url))
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(html)
+        meta = {"url": url, "captured_at": datetime.now().isoformat(timespec="seconds"),
+                "expected": expected}
+        with open(base + ".meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+        match = NEXT_DATA_PATTERN.search(html)
+        if match:
+            with open(base + ".next.json", "w", encoding="utf-8") as f:
+                f.write(match.group(1))
+    except OSError as e:
+        logging.warning(f"[fixture] 저장 실패 ({platform}/{kind}): {e}")
+
+
+def load(platform, kind, directory=None):
+    """저장된 fixture 목록: [(html, meta), ...]"""
+    root = os.path.join(directory or FIXTURE_DIR or "fixtures", platform, kind)
+    if not os.path.isdir(root):
+        return []
+    fixtures = []
+    for name in sorted(os.listdir(root)):
+        if not name.endswith(".html"):
+            continue
+        base = os.path.join(root, name[:-len(".html")])
+        with open(base + ".html", "r", encoding="utf-8") as f:
+            html = f.read()
+        meta = {}
+        if os.path.exists(base + ".meta.json"):
+            with open(base + ".meta.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        fixtures.append((html, meta))
+    return fixtures
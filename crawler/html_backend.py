@@ -0,0 +1,131 @@
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # 선택 의존성 (pip install selectolax)
+    LexborHTMLParser = None
+
+# 목록/상세 HTML 파싱 백엔드.
+#   html.parser  BeautifulSoup + 표준 라이브러리 파서 (가장 느림, 의존성 없음)
+#   lxml         BeautifulSoup + lxml 트리 빌더 (2~3배 빠름)
+#   selectolax   lexbor 엔진 (C 구현, 가장 빠름, 선택 설치)
+# 사이트별 파서는 Node 의 select / select_one / text / strings / attr 와
+# 세 백엔드가 모두 지원하는 CSS 선택자(태그, .class, #id, [attr^=..], [attr*=..], 자손 결합자)만 쓴다.
+# CRAWLER_HTML_PARSER 로 백엔드 지정, 없으면 설치된 것 중 가장 빠른 것을 쓴다.
+BACKENDS = ("html.parser", "lxml", "selectolax")
+SIMPLE_SELECTOR = re.compile(r"^([A-Za-z][A-Za-z0-9]*)?(?:#([\w-]+))?(?:\.([\w-]+))?$")
+
+
+def available_backends():
+    backends = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        backends.append("lxml")
+    except ImportError:
+        pass
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    return backends
+
+
+DEFAULT_BACKEND = os.environ.get("CRAWLER_HTML_PARSER") or available_backends()[-1]
+
+
+class SoupNode:
+    """BeautifulSoup 요소 래퍼 (html.parser / lxml 백엔드)."""
+    __slots__ = ("_el",)
+
+    def __init__(self, el):
+        self._el = el
+
+    @property
+    def tag(self):
+        return self._el.name
+
+    def select(self, css):
+        return [SoupNode(el) for el in self._el.select(css)]
+
+    def select_one(self, css):
+        el = self._el.select_one(css)
+        return SoupNode(el) if el is not None else None
+
+    def text(self, strip=True):
+        # strip=True: 텍스트 노드마다 공백 제거 후 이어붙임 (bs4 get_text(strip=True))
+        return self._el.get_text(strip=strip)
+
+    def strings(self):
+        return list(self._el.stripped_strings)
+
+    def attr(self, name, default=None):
+        value = self._el.get(name)
+        if value is None:
+            return default
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class LexborNode:
+    """selectolax(lexbor) 노드 래퍼."""
+    __slots__ = ("_el",)
+
+    def __init__(self, el):
+        self._el = el
+
+    @property
+    def tag(self):
+        return self._el.tag
+
+    def select(self, css):
+        return [LexborNode(el) for el in self._el.css(css)]
+
+    def select_one(self, css):
+        el = self._el.css_first(css)
+        return LexborNode(el) if el is not None else None
+
+    def text(self, strip=True):
+        return self._el.text(deep=True, separator="", strip=strip)
+
+    def strings(self):
+        joined = self._el.text(deep=True, separator="\x1f", strip=True)
+        return [s for s in joined.split("\x1f") if s]
+
+    def attr(self, name, default=None):
+        value = self._el.attributes.get(name)
+        return default if value is None else value
+
+
+def _strainer(only):
+    match = SIMPLE_SELECTOR.match(only or "")
+    if not only or not match:
+        return None
+    name, id_, class_ = match.groups()
+    attrs = {}
+    if id_:
+        attrs["id"] = id_
+    if class_:
+        attrs["class"] = class_
+    return SoupStrainer(name or True, attrs=attrs)
+
+
+def parse_html(html, backend=None, only=None):
+    """HTML → Node.
+
+    only: 'a', 'main', 'div#id', 'div.class' 형태의 단순 선택자. BeautifulSoup 백엔드는
+    일치하는 요소(와 그 하위)만 트리로 만든다. 이후 select 는 그 하위에서만 찾는 선택자여야 한다.
+    selectolax 는 전체 파싱이 이미 충분히 빨라 힌트를 무시한다.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "selectolax":
+        if LexborHTMLParser is None:
+            raise RuntimeError("selectolax 가 설치되어 있지 않습니다 (pip install selectolax)")
+        return LexborNode(LexborHTMLParser(html).root)
+    if backend not in BACKENDS:
+        raise ValueError(f"알 수 없는 HTML 파서 백엔드: {backend}")
+    strainer = _strainer(only)
+    if strainer is not None:
+        soup = BeautifulSoup(html, backend, parse_only=strainer)
+        if soup.contents:
+            return SoupNode(soup)
+    return SoupNode(BeautifulSoup(html, backend))
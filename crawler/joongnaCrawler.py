@@ -1,56 +1,66 @@
-﻿from shared import BaseCrawler, parse_relative_time, wait_for_element, get_soup
-from db_utils import save_to_mongodb_upsert
-import os
-import json
+﻿from shared import BaseCrawler, CategoryInterrupted, parse_relative_time, wait_for_element, crawl_arg_parser
+from waits import wait_for_count_increase
 import re
 import time
 import logging
+from lxml import etree, html as lxml_html
 from selenium.webdriver.common.by import By
+import fixtures
+import metrics
+import retry
+from html_backend import parse_html
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
 class JoongnaCrawler(BaseCrawler):
     EMPTY_PAGE_RETRIES = 2
     MAX_SCROLL_ATTEMPTS = 12
-    SCROLL_PAUSE = 0.4
+    LINK_CSS = "a[href^='/product/']"
+    HOST = "web.joongna.com"
 
     def __init__(self):
         base_urls = {
             "스마트폰": "https://web.joongna.com/search?category=139&saleYn=SALE_Y&sort=RECENT_SORT",
             "태블릿PC": "https://web.joongna.com/search?category=140&saleYn=SALE_Y&sort=RECENT_SORT",
         }
-        super().__init__("중고나라", base_urls)
-
-    def get_links(self, url, max_attempts=3):
-        last_error = None
-        for attempt in range(1, max_attempts + 1):
-            try:
-                self.driver.get(url)
-                wait_for_element(self.driver, By.CSS_SELECTOR, "a[href^='/product/']")
-                links = self._collect_links()
-                return links, 0
-            except TimeoutException as exc:
-                last_error = exc
-                logging.warning(f"[{self.name}] Page load timeout ({attempt}/{max_attempts}) for {url}")
+        super().__init__("중고나라", base_urls, site="joongna")
+        # 차단기는 크롤러마다 따로 (설명 수집·재확인 스크립트의 실패가 목록 수집을 막지 않도록)
+        self.breaker = retry.breaker_from_env()
+        # 목록 로딩 실패: 백오프 후 드라이버 재시작. 빈 페이지: 새로고침 → 마지막엔 재시작
+        self.list_retry = retry.retrier("joongna.list_load", retry.policy_for("joongna"),
+                                        platform=self.site, breaker=self.breaker)
+        self.empty_retry = retry.retrier(
+            "joongna.empty_page",
+            retry.policy_for("joongna", max_attempts=self.EMPTY_PAGE_RETRIES + 1, base_delay=0.4,
+                             retry_on=(), retry_if=lambda result: not result[0]),
+            platform=self.site,
+            breaker=self.breaker,
+        )
+
+    def get_links(self, url):
+        def before_retry(attempt, exc):
+            if isinstance(exc, TimeoutException):
                 try:
                     self.driver.execute_script("window.stop();")
                 except Exception:
                     pass
-                self.restart_driver()
-            except WebDriverException as exc:
-                last_error = exc
-                logging.warning(f"[{self.name}] Page load failed ({attempt}/{max_attempts}) for {url}: {exc}")
-                self.restart_driver()
-        if last_error:
-            raise last_error
-        return [], 0
+            self.restart_driver()
+
+        return self.list_retry.call(self._load_links, url, host=self.HOST, before_retry=before_retry)
+
+    def _load_links(self, url):
+        self.load_page(url, "list")
+        wait_for_element(self.driver, By.CSS_SELECTOR, self.LINK_CSS, site="joongna")
+        links = self._collect_links()
+        if fixtures.enabled():
+            fixtures.capture("joongna", "list", url, self.driver.page_source, {"links": links})
+        return links, 0
 
     def _collect_links(self):
-        collected = set()
-        stagnant_rounds = 0
-        last_count = 0
+        # 최신순 목록의 순서를 유지 (증분 모드의 연속 중복 판정에 필요)
+        collected = {}
 
         for _ in range(self.MAX_SCROLL_ATTEMPTS):
-            anchors = self.driver.find_elements(By.CSS_SELECTOR, "a[href^='/product/']")
+            anchors = self.driver.find_elements(By.CSS_SELECTOR, self.LINK_CSS)
             for a in anchors:
                 href = a.get_attribute("href") or ""
                 if not href:
@@ -59,260 +69,156 @@ class JoongnaCrawler(BaseCrawler):
                     href = "https://web.joongna.com" + href
                 if "/product/" not in href:
                     continue
-                collected.add(href.split("?")[0])
-
-            if len(collected) == last_count:
-                stagnant_rounds += 1
-            else:
-                last_count = len(collected)
-                stagnant_rounds = 0
-
-            if stagnant_rounds >= 2:
-                break
+                collected.setdefault(href.split("?")[0], None)
 
             try:
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             except Exception:
                 break
-            time.sleep(self.SCROLL_PAUSE)
+            # 고정 sleep 대신 스크롤 후 상품 링크 수가 늘어날 때까지만 대기
+            count = wait_for_count_increase(self.driver, self.LINK_CSS, len(anchors), site="joongna")
+            if count <= len(anchors):
+                break
 
         return list(collected)
 
     def parse_detail(self, url):
         try:
-            self.driver.get(url)
+            self.load_page(url, "detail")
         except Exception as e:
             logging.warning(f"상세 페이지 로딩 실패: {url} — {e}")
             return None
         
-        wait_for_element(self.driver, By.CSS_SELECTOR, "h1")
-        soup = get_soup(self.driver)
-
-        #post_content = soup.select_one("div.flex.flex-col.h-auto")
-        #if post_content and "매입" in post_content.get_text():
-        #    return None
+        wait_for_element(self.driver, By.CSS_SELECTOR, "h1", site="joongna")
+        # 렌더링된 DOM 스냅샷 한 번(page_source)만 가져오고 나머지는 lxml XPath 로 추출
+        # (요소별 find_element/.text 는 매번 Chrome 왕복이라 상세 1건당 ~15회였음)
+        html = self.driver.page_source
+        with metrics.timer("crawler_parse_seconds", platform=self.site, kind="detail"):
+            data = parse_detail_html(html, url)
+        fixtures.capture("joongna", "detail", url, html, data)
+        if data is None:
+            self.count_filtered()
+        return data
+
+    # 빈 페이지는 새로고침 → 재시작으로 재시도하고, 로딩 실패는 드라이버를 재시작한 뒤 페이지만 건너뜀
+    def fetch_links(self, category, page, page_url):
+        def before_empty_retry(attempt, _):
+            logging.warning(f"[{self.name}] 링크 없음 → 재시도 ({category} {page}페이지)")
+            self.controller.signal("empty")
+            if attempt == self.EMPTY_PAGE_RETRIES:
+                self.restart_driver()
+            else:
+                try:
+                    self.driver.refresh()
+                except Exception:
+                    pass
 
-        #title = soup.select_one("div.flex.items-center.justify-between.mb-1 h1")
-        #title_text = title.get_text(strip=True) if title else "제목없음"
-        
-        # 상세 제목: h1이 뜨면 바로 사용, 실패 시 og:title 백업
-        title_text = "제목없음"
         try:
-            h1 = self.driver.find_element(By.TAG_NAME, "h1")
-            candidate = (h1.text or h1.get_attribute("innerText") or "").strip()
-            if candidate:
-                title_text = candidate
-        except Exception:
-            pass
-        if title_text == "제목없음":
             try:
-                og = self.driver.find_element(By.CSS_SELECTOR, "meta[property='og:title']")
-                candidate = (og.get_attribute("content") or "").strip()
-                if candidate:
-                    title_text = candidate
-            except Exception:
-                pass
-
-        if re.search(r"(매입|삽니다)", title_text):
-            self.filtered_count += 1
+                links, ad_skipped = self.empty_retry.call(self.get_links, page_url,
+                                                          before_retry=before_empty_retry)
+            except retry.CircuitOpenError as exc:
+                # 차단 시간만큼 기다렸다가 한 번 시험(half-open). 그래도 막히면 이 카테고리만 중단
+                logging.warning(f"[{self.name}] {exc} → {exc.retry_after:.0f}s 대기 후 재시도 ({category} {page}페이지)")
+                time.sleep(exc.retry_after)
+                self.restart_driver()
+                links, ad_skipped = self.empty_retry.call(self.get_links, page_url,
+                                                          before_retry=before_empty_retry)
+        except retry.CircuitOpenError as exc:
+            raise CategoryInterrupted(str(exc)) from exc
+        except (TimeoutException, WebDriverException, retry.RetryExhausted) as exc:
+            logging.warning(f"[{self.name}] 페이지 로딩 실패: {category} {page}페이지 — {exc}")
+            self.restart_driver()
             return None
+        if not links:
+            logging.warning(f"[{self.name}] 링크를 찾지 못해 페이지 건너뜀: {category} {page}페이지")
+            return None
+        return links, ad_skipped
+
+# 드라이버 없이 HTML 만으로 동작하는 파서 (fixture 벤치마크: bench_parsers.py)
+def parse_list_html(html, backend=None):
+    root = parse_html(html, backend, only="a")
+    links = {}
+    for a in root.select(JoongnaCrawler.LINK_CSS):
+        href = a.attr("href", "")
+        if href.startswith("/product/"):
+            href = "https://web.joongna.com" + href
+        links.setdefault(href.split("?")[0], None)
+    return list(links)
+
+
+def _has_classes(*names):
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {n} ')" for n in names)
+
+
+# 예전 라이브 조회 순서 그대로: 정확한 XPath → 느슨한 XPath → 라벨 다음 요소
+TITLE_XPATHS = ["//h1", "//meta[@property='og:title']/@content"]
+PRICE_XPATH = "//div[contains(@class, 'font-bold') and contains(@class, 'text-heading')]"
+TIME_XPATH = f"//div[{_has_classes('flex', 'items-center', 'justify-between', 'mb-4', 'text-xs', 'font-normal')}]//span"
+CONDITION_XPATHS = [
+    "//*[@id='__next']//span[normalize-space()='상품 상태']/following-sibling::*[1]//p[1]",
+    "//*[@id='__next']//span[normalize-space()='상품 상태']/following-sibling::*[1]//*[self::p or self::button or self::span][1]",
+    "//*[@id='__next']//main//dl//dd[1]//*[self::p or self::button][1]",
+    "(//span[contains(., '상품 상태')])[1]/following::*[self::p or self::button or self::span][1]",
+]
+REGION_XPATHS = [
+    "//*[@id='__next']/div/main/div[1]/div[1]/div[2]/div[4]/div[2]/dl/div/dd/button/p",
+    "//*[@id='__next']//main//dl//dd//button/p",
+    "(//span[contains(., '거래 지역') or contains(., '거래지역')])[1]"
+    "/following::*[self::p or self::button or self::span][1]",
+]
+IMAGE_XPATH = "//img[starts-with(@src, 'https://img2.joongna.com/media/original/')]/@src"
+
+
+def _first_text(tree, xpaths):
+    """xpaths 를 순서대로 시도해 처음 나오는 비어 있지 않은 텍스트 (요소는 공백 정리한 텍스트)."""
+    for xpath in xpaths:
+        for node in tree.xpath(xpath)[:1]:
+            text = node if isinstance(node, str) else node.text_content()
+            text = " ".join(text.split())
+            if text:
+                return text
+    return None
+
+
+def parse_detail_html(html, url):
+    """상세 HTML 스냅샷 → 저장용 dict. 매입/삽니다 글이면 None."""
+    try:
+        tree = lxml_html.fromstring(html)
+    except (ValueError, etree.ParserError):
+        tree = lxml_html.fromstring("<html></html>")
+
+    title_text = _first_text(tree, TITLE_XPATHS) or "제목없음"
+    if re.search(r"(매입|삽니다)", title_text):
+        return None
+
+    price_text = _first_text(tree, [PRICE_XPATH]) or "가격 정보 없음"
+
+    upload_time = "시간 정보 없음"
+    time_match = re.match(r"\d+(초|분|시간|일) 전", _first_text(tree, [TIME_XPATH]) or "")
+    if time_match:
+        upload_time = parse_relative_time(time_match.group())
+
+    images = tree.xpath(IMAGE_XPATH)
+    return {
+        "title": title_text,
+        "price": price_text,
+        "condition": _first_text(tree, CONDITION_XPATHS) or "제품 상태 정보 없음",
+        "upload_time": upload_time,
+        "region": _first_text(tree, REGION_XPATHS) or "거래 지역 정보 없음",
+        "url": url,
+        "image_url": images[0] if images else "",
+        "status": "판매중"
+    }
 
-        price_div = soup.select_one('div[class*="font-bold"][class*="text-heading"]')
-        price_text = price_div.get_text(strip=True) if price_div else "가격 정보 없음"
-
-        time_info = soup.select_one("div.flex.items-center.justify-between.mb-4.text-xs.font-normal span")
-        upload_time = "시간 정보 없음"
-        if time_info:
-            time_text = time_info.get_text(strip=True)
-            time_match = re.match(r"\d+(초|분|시간|일) 전", time_text)
-            if time_match:
-                upload_time = parse_relative_time(time_match.group())
-
-        #condition = "제품 상태 정보 없음"
-        #condition_li = soup.select_one("ul.box-border.flex.text-center.border.border-gray-300.rounded.items-center.py-6.mb-6 li:nth-child(1) button")
-        #if condition_li:
-        #    condition = condition_li.get_text(strip=True)
-        
-        # dt가 '상품 상태'인 행의 dd 값을 가져옴 → '중고' 등
-        condition = "제품 상태 정보 없음"
-        condition_xpaths = [
-            "//*[@id='__next']//span[normalize-space()='상품 상태']/following-sibling::*[1]//p[1]",
-            "//*[@id='__next']//span[normalize-space()='상품 상태']/following-sibling::*[1]//*[self::p or self::button or self::span][1]",
-            "//*[@id='__next']//main//dl//dd[1]//*[self::p or self::button][1]",
-        ]
-
-        for xpath in condition_xpaths:
-            try:
-                elems = self.driver.find_elements(By.XPATH, xpath)
-                if not elems:
-                    continue
-                text_candidate = (elems[0].text or elems[0].get_attribute("innerText") or "").strip()
-                if text_candidate:
-                    condition = text_candidate
-                    break
-            except Exception:
-                continue
-
-        if condition == "제품 상태 정보 없음":
-            # 최후 백업: BeautifulSoup로 형제 요소 텍스트 추출
-            label = soup.find("span", string=lambda s: s and "상품 상태" in s)
-            if label:
-                next_elem = label.find_next(["p", "button", "span"])
-                if next_elem:
-                    text_candidate = next_elem.get_text(strip=True)
-                    if text_candidate:
-                        condition = text_candidate
-
-        #region = "거래 지역 정보 없음"
-        #region_block = soup.select_one("div.pb-5")
-        #if region_block:
-        #    region_span = region_block.select_one("button span")
-        #    if region_span:
-        #        region = region_span.get_text(strip=True)
-        
-        region = "거래 지역 정보 없음"
-        region_xpaths = [
-            "//*[@id='__next']/div/main/div[1]/div[1]/div[2]/div[4]/div[2]/dl/div/dd/button/p",
-            "//*[@id='__next']//main//dl//dd//button/p",
-        ]
-        for xpath in region_xpaths:
-            try:
-                elems = self.driver.find_elements(By.XPATH, xpath)
-                if not elems:
-                    continue
-                text_candidate = (elems[0].text or elems[0].get_attribute("innerText") or "").strip()
-                if text_candidate:
-                    region = text_candidate
-                    break
-            except Exception:
-                continue
-        if region == "거래 지역 정보 없음":
-            label = soup.find("span", string=lambda s: s and ("거래 지역" in s or "거래지역" in s))
-            if label:
-                next_elem = label.find_next(["p", "button", "span"])
-                if next_elem:
-                    text_candidate = next_elem.get_text(strip=True)
-                    if text_candidate:
-                        region = text_candidate
-
-        #delivery_fee = "배송비 정보 없음"
-        #delivery_fee_li = soup.select_one("ul.box-border.flex.text-center.border.border-gray-300.rounded.items-center.py-6.mb-6 li:nth-child(3) button")
-        #if delivery_fee_li:
-        #    delivery_fee = delivery_fee_li.get_text(strip=True)
-
-        img_tag = soup.find("img", src=lambda x: x and x.startswith("https://img2.joongna.com/media/original/"))
-
-        return {
-            "title": title_text,
-            "price": price_text,
-            "condition": condition,
-            "upload_time": upload_time,
-            "region": region,
-            "url": url,
-            "image_url": img_tag["src"] if img_tag else "",
-            "status": "판매중"
-        }
-
-    # 페이지 단위 저장: 각 페이지 완료 시 DB에 upsert 저장
-    def crawl(self, start_page, end_page):
-        from pymongo import MongoClient
-        client = MongoClient("mongodb://localhost:27017/")
-        collection = client["market2"]["products"]
-
-        ad_total_skipped = 0
-        duplicate_skipped = 0
-
-        for category, base_url in self.base_urls.items():
-            logging.info(f"[{self.name}] 카테고리 시작: {category} ({start_page}~{end_page} 페이지)")
-            for page in range(start_page, end_page + 1):
-                page_url = self.build_page_url(base_url, page)
-                links = []
-                ad_skipped = 0
-                page_failed = False
-
-                remaining_empty_retries = self.EMPTY_PAGE_RETRIES
-                while True:
-                    try:
-                        result = self.get_links(page_url)
-                    except (TimeoutException, WebDriverException) as exc:
-                        logging.warning(f"[{self.name}] 페이지 로딩 실패: {category} {page}페이지 — {exc}")
-                        page_failed = True
-                        break
-
-                    if isinstance(result, tuple):
-                        links, ad_skipped = result
-                    else:
-                        links = result
-                        ad_skipped = 0
-
-                    if links:
-                        ad_total_skipped += ad_skipped
-                        break
-
-                    if remaining_empty_retries == 0:
-                        logging.warning(
-                            f"[{self.name}] 링크를 찾지 못해 페이지 건너뜀: {category} {page}페이지"
-                        )
-                        break
-
-                    logging.warning(
-                        f"[{self.name}] 링크 없음 → 재시도 ({category} {page}페이지, 남은 재시도 {remaining_empty_retries})"
-                    )
-                    if remaining_empty_retries == 1:
-                        self.restart_driver()
-                    else:
-                        try:
-                            self.driver.refresh()
-                        except Exception:
-                            pass
-                    time.sleep(0.4)
-                    remaining_empty_retries -= 1
-
-                if page_failed:
-                    self.restart_driver()
-                    continue
-
-                if not links:
-                    continue
-
-                page_results = []
-                for link in links:
-                    # 이미 DB에 있으면 스킵
-                    if collection.find_one({"url": link}):
-                        duplicate_skipped += 1
-                        continue
-
-                    data = self.parse_detail(link)
-                    if data:
-                        data["category"] = category
-                        data["platform"] = self.name
-                        self.results.append(data)
-                        page_results.append(data)
-
-                if page_results:
-                    try:
-                        save_to_mongodb_upsert(page_results, self.name)
-                        logging.info(f"[{self.name}] 페이지 저장 완료: {len(page_results)}건 (카테고리: {category}, 페이지: {page})")
-                    except Exception as e:
-                        logging.warning(f"[{self.name}] 페이지 저장 실패 (카테고리: {category}, 페이지: {page}): {e}")
-
-        logging.info(f"광고 필터 스킵: {ad_total_skipped}건")
-        logging.info(f"매입/의니어 필터: {self.filtered_count}건")
-        logging.info(f"중복 스킵: {duplicate_skipped}건")
-        client.close()
-        self.driver.quit()
-
-    # 최종 저장은 JSON 파일만 기록 (DB는 페이지 단위로 이미 저장됨)
-    def save(self):
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs("./output", exist_ok=True)
-        path = f"./output/{self.name}_result_{timestamp}.json"
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.results, f, ensure_ascii=False, indent=4)
-        print(f"{self.name} 크롤링 완료 → {path} (총 {len(self.results)}개)")
 
 if __name__ == "__main__":
+    args = crawl_arg_parser("중고나라 크롤러", end_page=500).parse_args()
+    exporter = metrics.start_exporter()
     crawler = JoongnaCrawler()
-    crawler.crawl(start_page=1, end_page=500)
-    crawler.save()
+    try:
+        crawler.crawl(start_page=args.start_page, end_page=args.end_page,
+                      incremental=args.incremental, known_streak=args.known_streak, resume=args.resume)
+        crawler.save()
+    finally:
+        exporter.stop()
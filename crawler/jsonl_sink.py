@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming JSON-lines output for crawler results.
+
+Each listing is appended as one JSON line as soon as it is parsed, so memory
+stays flat and a crash loses at most the unflushed tail. Files rotate by size
+or record count and can be gzip or zstd (optional `zstandard` package)
+compressed:
+
+    ./output/중고나라_20251109_120000_0001.jsonl.gz
+
+fsync policy:
+    none      leave flushing to the OS
+    interval  flush + fsync at most every `fsync_interval` seconds (default)
+    rotate    fsync only when a file is closed
+    always    flush + fsync after every record
+
+Environment overrides used by the crawlers (JsonlSink.from_env):
+    CRAWLER_OUTPUT_DIR, CRAWLER_OUTPUT_COMPRESSION (none|gzip|zstd),
+    CRAWLER_OUTPUT_FSYNC, CRAWLER_OUTPUT_MAX_MB, CRAWLER_OUTPUT_MAX_RECORDS
+
+Replay files into MongoDB:
+    python jsonl_sink.py replay ./output/중고나라_*.jsonl.gz --platform 중고나라
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+SUFFIXES = {"none": ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+FSYNC_POLICIES = ("none", "interval", "rotate", "always")
+# raised while decompressing a file cut off by a crash (gzip has no trailer yet)
+TRUNCATED_ERRORS = (EOFError, zlib.error, gzip.BadGzipFile) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def _open_for_write(path: str, compression: str):
+    raw = open(path, "wb")
+    if compression == "gzip":
+        stream = gzip.GzipFile(fileobj=raw, mode="wb")
+    elif compression == "zstd":
+        stream = zstandard.ZstdCompressor().stream_writer(raw)
+    else:
+        stream = raw
+    return raw, stream
+
+
+def open_jsonl(path: str) -> io.TextIOBase:
+    """Open a (possibly compressed) JSON-lines file for text reading."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is not installed; cannot read {path}")
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+class JsonlSink:
+    """Thread-safe, rotating JSON-lines writer."""
+
+    def __init__(
+        self,
+        prefix: str,
+        directory: str = "./output",
+        compression: str = "none",
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_records: int = 0,
+    ) -> None:
+        if compression not in SUFFIXES:
+            raise ValueError(f"unknown compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {fsync}")
+        self.prefix = prefix
+        self.directory = directory
+        self.compression = compression
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.paths: List[str] = []
+        self.count = 0
+        self._lock = threading.Lock()
+        self._raw = None
+        self._stream = None
+        self._file_bytes = 0
+        self._file_records = 0
+        self._last_sync = time.monotonic()
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "JsonlSink":
+        env = os.environ
+        return cls(
+            prefix,
+            directory=env.get("CRAWLER_OUTPUT_DIR", "./output"),
+            compression=env.get("CRAWLER_OUTPUT_COMPRESSION", "none"),
+            fsync=env.get("CRAWLER_OUTPUT_FSYNC", "interval"),
+            max_bytes=int(float(env.get("CRAWLER_OUTPUT_MAX_MB", "256")) * 1024 * 1024),
+            max_records=int(env.get("CRAWLER_OUTPUT_MAX_RECORDS", "0")),
+        )
+
+    def _open_next(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        part = len(self.paths) + 1
+        path = os.path.join(
+            self.directory, f"{self.prefix}_{self.stamp}_{part:04d}{SUFFIXES[self.compression]}"
+        )
+        self._raw, self._stream = _open_for_write(path, self.compression)
+        self.paths.append(path)
+        self._file_bytes = 0
+        self._file_records = 0
+
+    def _sync(self) -> None:
+        self._stream.flush()
+        if self._raw is not self._stream:
+            self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._last_sync = time.monotonic()
+
+    def _close_current(self) -> None:
+        if self._stream is None:
+            return
+        if self.compression == "zstd":
+            self._stream.flush(zstandard.FLUSH_FRAME)
+        if self.compression == "gzip":
+            self._stream.close()  # writes the gzip trailer; raw stays open
+        if self.fsync != "none":
+            self._raw.flush()
+            os.fsync(self._raw.fileno())
+        if self._stream is not self._raw and self.compression != "gzip":
+            self._stream.close()
+        if not self._raw.closed:
+            self._raw.close()
+        self._raw = self._stream = None
+
+    def write(self, record: Mapping[str, Any]) -> None:
+        line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            if self._stream is None:
+                self._open_next()
+            elif (self.max_bytes and self._file_bytes + len(line) > self.max_bytes) or (
+                self.max_records and self._file_records >= self.max_records
+            ):
+                self._close_current()
+                self._open_next()
+            self._stream.write(line)
+            self._file_bytes += len(line)
+            self._file_records += 1
+            self.count += 1
+            if self.fsync == "always" or (
+                self.fsync == "interval" and time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+    def write_many(self, records: Iterable[Mapping[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_current()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def read_jsonl(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield records from JSON-lines files.
+
+    A truncated last line (crash) is skipped, and a compressed file that ends
+    early keeps the records decoded before the cut.
+    """
+    for path in paths:
+        line_no = 0
+        try:
+            with open_jsonl(path) as f:
+                for line_no, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        print(f"[jsonl] skipping unreadable line {path}:{line_no}")
+        except TRUNCATED_ERRORS as exc:
+            print(f"[jsonl] {path} is truncated after line {line_no}, keeping the records before it ({exc})")
+
+
+def replay_to_mongodb(
+    paths: Iterable[str],
+    collection,
+    platform: Optional[str] = None,
+    batch_size: int = 500,
+) -> Dict[str, int]:
+    from db_utils import ProductWriter
+
+    writer = ProductWriter(collection)
+    totals = {"read": 0, "inserted": 0, "updated": 0, "failed": 0}
+    batches: Dict[str, List[Dict[str, Any]]] = {}
+
+    def flush(name: str) -> None:
+        result = writer.write(batches.pop(name), name)
+        for key in ("inserted", "updated", "failed"):
+            totals[key] += result[key]
+
+    for record in read_jsonl(paths):
+        totals["read"] += 1
+        name = platform or record.get("platform") or "unknown"
+        batches.setdefault(name, []).append(record)
+        if len(batches[name]) >= batch_size:
+            flush(name)
+    for name in list(batches):
+        flush(name)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawler JSON-lines output tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    replay = sub.add_parser("replay", help="Upsert JSON-lines records into MongoDB by url.")
+    replay.add_argument("files", nargs="+", help="Files or glob patterns (.jsonl, .gz, .zst).")
+    replay.add_argument("--platform", help="Override the platform of every record.")
+    replay.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    replay.add_argument("--database", default="market2")
+    replay.add_argument("--collection", default="products")
+    replay.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+
+    paths = sorted(p for pattern in args.files for p in (glob.glob(pattern) or [pattern]))
+    client = MongoClient(args.mongodb_uri)
+    started = time.monotonic()
+    totals = replay_to_mongodb(
+        paths, client[args.database][args.collection], args.platform, args.batch_size
+    )
+    client.close()
+    elapsed = time.monotonic() - started
+    print(
+        f"Replayed {totals['read']} records from {len(paths)} files in {elapsed:.1f}s: "
+        f"inserted {totals['inserted']}, updated {totals['updated']}, failed {totals['failed']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
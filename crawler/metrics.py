@@ -0,0 +1,277 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 크롤링 시간이 어디에 쓰이는지 보기 위한 계측.
+# 히스토그램 (초):
+#   crawler_page_load_seconds{platform,kind}   driver.get / HTTP GET (kind=list|detail|detail_http)
+#   crawler_wait_seconds{platform,kind}        waits.py 대기 (kind=element|count_increase|network_idle)
+#   crawler_parse_seconds{platform,kind}       HTML → dict 파싱
+#   crawler_db_write_seconds{platform}         products upsert 한 번
+#   crawler_retry_seconds{platform,op}         retry.py 호출 하나가 실패 시도 + 백오프로 쓴 시간
+# 카운터:
+#   crawler_pages_total{platform,kind}, crawler_listings_total{platform},
+#   crawler_skipped_total{platform,reason}, crawler_retries_total{platform,op},
+#   crawler_driver_restarts_total{platform}
+# 게이지 (concurrency.py 의 AIMD 제어기 상태):
+#   crawler_concurrency_limit{platform}, crawler_in_flight{platform}, crawler_request_interval_seconds{platform}
+# 내보내기 (start_exporter, 환경변수로 켬):
+#   CRAWLER_METRICS_FILE      Prometheus 텍스트 파일 경로 (node_exporter textfile collector 용)
+#   CRAWLER_METRICS_PORT      /metrics HTTP 엔드포인트 포트
+#   CRAWLER_METRICS_INTERVAL  요약 로그 + 파일 갱신 주기(초, 기본 60, 0=끄기)
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PLATFORM_KEYS = {"번개장터": "bunjang", "중고나라": "joongna", "당근마켓": "daangn"}
+
+HELP = {
+    "crawler_page_load_seconds": ("histogram", "Page navigation time."),
+    "crawler_wait_seconds": ("histogram", "Time spent in explicit waits (kind=element|count_increase|network_idle)."),
+    "crawler_parse_seconds": ("histogram", "HTML parse/extract time."),
+    "crawler_db_write_seconds": ("histogram", "MongoDB write latency per batch."),
+    "crawler_pages_total": ("counter", "Pages loaded."),
+    "crawler_listings_total": ("counter", "Listings written."),
+    "crawler_skipped_total": ("counter", "Listings skipped before detail crawl."),
+    "crawler_retries_total": ("counter", "Retried operations."),
+    "crawler_retry_seconds": ("histogram", "Time lost to failed attempts and backoff per call."),
+    "crawler_driver_restarts_total": ("counter", "Browser restarts."),
+    "crawler_concurrency_limit": ("gauge", "Current adaptive concurrency limit."),
+    "crawler_in_flight": ("gauge", "Requests currently in flight."),
+    "crawler_request_interval_seconds": ("gauge", "Current minimum interval between requests."),
+    "crawler_concurrency_changes_total": ("counter", "Adaptive limit changes."),
+}
+
+
+def platform_key(name):
+    """'번개장터' → 'bunjang' (라벨 값은 영문 키로 통일)."""
+    return PLATFORM_KEYS.get(name, name or "unknown")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, **labels)
+
+    def render(self):
+        """Prometheus 텍스트 포맷."""
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.items()) + sorted(self._gauges.items())
+            histograms = sorted((k, (list(h.counts), h.sum, h.count, h.buckets))
+                                for k, h in self._histograms.items())
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            describe(name)
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """플랫폼별 한 줄 요약: 카운터 + 히스토그램 평균/최대."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {k: (h.sum, h.count, h.max) for k, h in self._histograms.items()}
+        per_platform = {}
+        for (name, labels), value in counters.items():
+            labels = dict(labels)
+            short = name.replace("crawler_", "").replace("_total", "")
+            if "reason" in labels:
+                short = f"skip_{labels['reason']}"
+            bucket = per_platform.setdefault(labels.get("platform", "-"), {"counts": {}, "times": {}})
+            bucket["counts"][short] = bucket["counts"].get(short, 0) + value
+        for (name, labels), value in gauges.items():
+            labels = dict(labels)
+            short = name.replace("crawler_", "").replace("_seconds", "")
+            bucket = per_platform.setdefault(labels.get("platform", "-"), {"counts": {}, "times": {}})
+            bucket["counts"][short] = value
+        for (name, labels), (total, count, peak) in histograms.items():
+            labels = dict(labels)
+            short = name.replace("crawler_", "").replace("_seconds", "")
+            bucket = per_platform.setdefault(labels.get("platform", "-"), {"counts": {}, "times": {}})
+            prev = bucket["times"].get(short, (0.0, 0, 0.0))
+            bucket["times"][short] = (prev[0] + total, prev[1] + count, max(prev[2], peak))
+        lines = []
+        for platform, data in sorted(per_platform.items()):
+            counts = ", ".join(f"{k} {v:g}" for k, v in sorted(data["counts"].items()))
+            times = ", ".join(f"{k} 합계 {t:.0f}s 평균 {t / n:.2f}s 최대 {m:.1f}s"
+                              for k, (t, n, m) in sorted(data["times"].items()) if n)
+            lines.append(f"[metrics] {platform}: {counts or '-'} | {times or '-'}")
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set_gauge
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+render = REGISTRY.render
+
+
+def write_textfile(path, registry=REGISTRY):
+    tmp = f"{path}.tmp"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)  # 수집기가 반쯤 쓴 파일을 읽지 않도록
+
+
+class MetricsExporter:
+    """주기적 요약 로그 + 텍스트 파일 갱신 + (선택) /metrics HTTP 엔드포인트."""
+
+    def __init__(self, path=None, port=None, interval=60.0, registry=REGISTRY):
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ
+        port = env.get("CRAWLER_METRICS_PORT")
+        return cls(
+            path=env.get("CRAWLER_METRICS_FILE") or None,
+            port=int(port) if port else None,
+            interval=float(env.get("CRAWLER_METRICS_INTERVAL", "60")),
+        )
+
+    def _serve(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("", self.port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logging.info(f"[metrics] http://localhost:{self.port}/metrics")
+
+    def flush(self):
+        for line in self.registry.summary_lines():
+            logging.info(line)
+        if self.path:
+            try:
+                write_textfile(self.path, self.registry)
+            except OSError as e:
+                logging.warning(f"[metrics] 파일 기록 실패: {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        if self.port:
+            self._serve()
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="metrics-report", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.flush()  # 마지막 요약 + 최종 파일
+
+
+def start_exporter():
+    return MetricsExporter.from_env().start()
@@ -0,0 +1,189 @@
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from pymongo import MongoClient
+
+import metrics
+import shared
+from db_utils import ProductWriter, set_shared_writer
+from jsonl_sink import JsonlSink
+from seen_urls import SeenUrls
+from waits import wait_recorder
+
+# 세 플랫폼 크롤러를 한 프로세스에서 함께 실행한다.
+#   - 브라우저 총량(set_browser_limit): 예산을 슬롯 풀별로 나눈다 (번개장터, 중고나라, 당근 목록, 당근 상세).
+#     실행 내내 드라이버를 쥐는 쪽이 다른 풀의 슬롯을 잡지 못하므로 풀마다 최소 1개는 항상 돌아간다
+#   - 공유 DB writer(ProductWriter): MongoClient 하나로 bulk upsert, 플랫폼별 저장 통계
+#   - 공유 URL 목록(SeenUrls): 한 실행에서 같은 링크를 두 번 상세 수집하지 않음
+#   - 플랫폼별 동시성: 당근마켓 목록/상세 워커 수, 번개장터·중고나라는 브라우저 1개
+# 각 플랫폼은 스레드 하나에서 돌고, 끝나면 통합 요약을 출력한다.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class PlatformRun:
+    name: str
+    target: Callable[[], int]
+    browsers: Dict[str, int]  # 슬롯 풀 → 요청 브라우저 수
+    started: float = 0.0
+    elapsed: float = 0.0
+    listings: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class OrchestratorConfig:
+    platforms: List[str] = field(default_factory=lambda: ["bunjang", "joongna", "daangn"])
+    browser_budget: int = 6
+    bunjang_pages: tuple = (1, 100)
+    joongna_pages: tuple = (1, 500)
+    daangn_list_workers: int = 1
+    daangn_detail_workers: int = 2
+    daangn_time_budget: float = 0
+    incremental: bool = False
+    resume: bool = False
+    mongo_uri: str = "mongodb://localhost:27017/"
+
+
+class CrawlOrchestrator:
+    def __init__(self, config: OrchestratorConfig):
+        self.config = config
+        self.client = MongoClient(config.mongo_uri)
+        self.writer = ProductWriter(self.client["market2"]["products"])
+        self.seen = SeenUrls("orchestrator")
+        self.runs: Dict[str, PlatformRun] = {}
+
+    # 플랫폼별 실행 함수: 저장 건수를 반환
+    def _run_bunjang(self):
+        from bunjangCrawler import BunjangCrawler
+        crawler = BunjangCrawler()
+        start, end = self.config.bunjang_pages
+        crawler.crawl(start, end, incremental=self.config.incremental,
+                      resume=self.config.resume, seen=self.seen)
+        crawler.save()
+        return crawler.result_count
+
+    def _run_joongna(self):
+        from joongnaCrawler import JoongnaCrawler
+        crawler = JoongnaCrawler()
+        start, end = self.config.joongna_pages
+        crawler.crawl(start, end, incremental=self.config.incremental,
+                      resume=self.config.resume, seen=self.seen)
+        crawler.save()
+        return crawler.result_count
+
+    def _run_daangn(self):
+        import daangnCrawler
+        sink = JsonlSink.from_env("당근마켓")
+        written = daangnCrawler.run_search_tasks(
+            daangnCrawler.load_region_urls(os.path.join(SCRIPT_DIR, "region_list.txt")),
+            daangnCrawler.KEYWORDS,
+            time_budget=self.config.daangn_time_budget,
+            incremental=self.config.incremental,
+            resume=self.config.resume,
+            list_workers=self.config.daangn_list_workers,
+            detail_workers=self.config.daangn_detail_workers,
+            seen=self.seen,
+            sink=sink,
+        )
+        sink.close()
+        return written
+
+    def _plan(self):
+        import daangnCrawler
+        targets = {
+            "bunjang": (self._run_bunjang, {"bunjang": 1}),
+            "joongna": (self._run_joongna, {"joongna": 1}),
+            "daangn": (self._run_daangn, {
+                "daangn": self.config.daangn_list_workers,
+                daangnCrawler.DETAIL_BROWSER_POOL: self.config.daangn_detail_workers,
+            }),
+        }
+        runs = []
+        for name in self.config.platforms:
+            target, browsers = targets[name]
+            runs.append(PlatformRun(name, target, browsers))
+        return runs
+
+    @staticmethod
+    def _allocate(runs, budget):
+        """풀마다 1개씩 먼저 주고, 남은 예산은 요청이 남은 풀에 하나씩 돌아가며 나눈다."""
+        requested = {pool: max(1, n) for run in runs for pool, n in run.browsers.items()}
+        slots = {pool: 1 for pool in requested}
+        remaining = budget - len(slots)
+        while remaining > 0:
+            hungry = [pool for pool in requested if slots[pool] < requested[pool]]
+            if not hungry:
+                break
+            for pool in hungry[:remaining]:
+                slots[pool] += 1
+            remaining -= len(hungry[:remaining])
+        return slots
+
+    def _execute(self, run: PlatformRun):
+        run.started = time.monotonic()
+        try:
+            run.listings = run.target() or 0
+        except Exception as exc:
+            run.error = f"{exc.__class__.__name__}: {exc}"
+            logging.exception(f"[orchestrator] {run.name} 실패")
+        finally:
+            run.elapsed = time.monotonic() - run.started
+            logging.info(f"[orchestrator] {run.name} 종료 ({run.elapsed:.0f}s)")
+
+    def run(self):
+        runs = self._plan()
+        # 슬롯 풀마다 브라우저 1개는 잡을 수 있어야 교착이 없다
+        pools = sum(len(r.browsers) for r in runs)
+        budget = max(self.config.browser_budget, pools)
+        requested = sum(max(1, n) for r in runs for n in r.browsers.values())
+        slots = self._allocate(runs, budget)
+        if requested > budget:
+            logging.info(f"[orchestrator] 요청 브라우저 {requested}개 > 예산 {budget}개 → 슬롯을 기다리며 실행")
+        logging.info("[orchestrator] 브라우저 슬롯: " + ", ".join(f"{k} {v}" for k, v in slots.items()))
+        shared.set_browser_limit(slots)
+        set_shared_writer(self.writer)
+        exporter = metrics.start_exporter()
+
+        started = time.monotonic()
+        threads = []
+        try:
+            for run in runs:
+                self.runs[run.name] = run
+                thread = threading.Thread(target=self._execute, args=(run,), name=f"crawl-{run.name}", daemon=True)
+                thread.start()
+                threads.append(thread)
+            while any(t.is_alive() for t in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            logging.warning("[orchestrator] 중단 요청 — 브라우저 종료 (--resume 으로 이어서 실행 가능)")
+            shared.quit_all_browsers()
+            raise
+        finally:
+            set_shared_writer(None)
+            shared.set_browser_limit(None)
+            self.log_summary(time.monotonic() - started)
+            exporter.stop()
+            self.client.close()
+        return 0 if all(r.error is None for r in runs) else 1
+
+    def log_summary(self, elapsed):
+        writes = self.writer.summary()
+        logging.info(f"===== 통합 크롤링 요약 ({elapsed:.0f}s, 브라우저 예산 {self.config.browser_budget}) =====")
+        platform_names = {"bunjang": "번개장터", "joongna": "중고나라", "daangn": "당근마켓"}
+        for name, run in self.runs.items():
+            write = writes.get(platform_names[name], {})
+            rate = run.listings / run.elapsed * 60 if run.elapsed else 0.0
+            logging.info(
+                f"  {name}: 신규 {run.listings}건 / {run.elapsed:.0f}s ({rate:.1f}건/분), "
+                f"DB insert {write.get('inserted', 0)} update {write.get('updated', 0)} "
+                f"실패 {write.get('failed', 0)} (쓰기 {write.get('seconds', 0.0):.1f}s), "
+                f"{'오류: ' + run.error if run.error else '정상'}"
+            )
+        self.seen.log_report()
+        wait_recorder.log_summary()
@@ -0,0 +1,220 @@
+import argparse
+import logging
+import statistics
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping
+
+# 매물 가격·상태 변화 이력 (append-only).
+# products 는 재수집 때 price/status 를 $set 으로 덮어쓰므로, 값이 바뀔 때만 점 하나를 남긴다:
+#   {observed_at, platform, url, price_int, status}
+# MongoDB 5.0+ 에서는 time-series 컬렉션으로 만들어 버킷 단위로 압축 저장하고,
+# 지원하지 않는 서버에서는 일반 컬렉션 + (url, observed_at) 인덱스로 대신한다.
+# 조회는 모두 url 기준이라 metaField 도 url 이다: 버킷이 매물별로 나뉘고 (url, observed_at) 인덱스가
+# meta + time 인덱스가 되어 5.x 에서도 만들어진다 (측정 필드 보조 인덱스는 6.0 부터).
+# 기록 지점: db_utils.save_to_mongodb_upsert / ProductWriter.write, scripts/recheck_listings.py
+# 조회: listing_history(url), price_curve(모델별 일자 곡선)
+PRICE_HISTORY_COLLECTION = "price_history"
+META_FIELD = "url"
+KST = timezone(timedelta(hours=9))
+ON_SALE = ("판매중", "예약중")
+
+_ensured = set()
+
+
+def ensure_collection(db):
+    """time-series 컬렉션(또는 대체 컬렉션)과 url 인덱스를 한 번만 준비."""
+    from pymongo.errors import CollectionInvalid, OperationFailure
+
+    key = (id(db.client), db.name)
+    if key in _ensured:
+        return db[PRICE_HISTORY_COLLECTION]
+    existing = list(db.list_collections(filter={"name": PRICE_HISTORY_COLLECTION}))
+    if not existing:
+        try:
+            db.create_collection(
+                PRICE_HISTORY_COLLECTION,
+                timeseries={"timeField": "observed_at", "metaField": META_FIELD, "granularity": "hours"},
+            )
+        except (OperationFailure, CollectionInvalid, TypeError) as e:
+            logging.info(f"[price_history] time-series 컬렉션 생성 불가 → 일반 컬렉션 사용 ({e})")
+    else:
+        timeseries = (existing[0].get("options") or {}).get("timeseries") or {}
+        if timeseries and timeseries.get("metaField") != META_FIELD:
+            # metaField 는 만든 뒤 바꿀 수 없다: 새 컬렉션으로 옮겨야 url 조회가 버킷 인덱스를 탄다
+            logging.warning(f"[price_history] metaField={timeseries.get('metaField')} 로 만들어진 컬렉션 "
+                            f"→ url 조회가 전체 버킷을 풀어 읽음 (metaField={META_FIELD} 로 재생성 필요)")
+    collection = db[PRICE_HISTORY_COLLECTION]
+    try:
+        collection.create_index([("url", 1), ("observed_at", 1)], name="url_observed_at", background=True)
+    except OperationFailure as e:
+        logging.warning(f"[price_history] 인덱스 생성 실패: {e}")
+    _ensured.add(key)
+    return collection
+
+
+def _state(doc: Mapping[str, Any]):
+    return doc.get("price_int"), doc.get("status")
+
+
+def _changed(before, after) -> bool:
+    # 양쪽 모두 값이 있는 필드만 비교 (목록 수집처럼 status 를 모르는 저장은 변화가 아님)
+    if before is None or all(v is None for v in before):
+        return True
+    return any(b is not None and a is not None and b != a for b, a in zip(before, after))
+
+
+def detect_changes(products, docs: Iterable[Mapping[str, Any]], observed_at=None) -> List[Dict[str, Any]]:
+    """저장 직전 docs 를 products 의 현재 값과 비교해 바뀐(또는 처음 본) 매물의 점 목록을 만든다.
+
+    한쪽에만 있는 필드는 비교하지 않는다 (None ↔ 값은 변화로 보지 않음).
+
+    upsert 전에 호출해야 이전 값을 읽을 수 있다 (배치당 $in 조회 한 번).
+    """
+    docs = [d for d in docs if d.get("url") and any(v is not None for v in _state(d))]
+    if not docs:
+        return []
+    observed_at = observed_at or datetime.now(timezone.utc)
+    urls = list(dict.fromkeys(d["url"] for d in docs))
+    previous = {
+        row["url"]: _state(row)
+        for row in products.find({"url": {"$in": urls}}, {"url": 1, "price_int": 1, "status": 1, "_id": 0})
+    }
+    points = []
+    for doc in docs:
+        before = previous.get(doc["url"])
+        if not _changed(before, _state(doc)):
+            continue
+        # 빠진 필드는 이전 값으로 채운다 (price_curve 가 점 단위로 forward fill 하므로)
+        state = tuple(a if a is not None else b for a, b in zip(_state(doc), before or (None, None)))
+        previous[doc["url"]] = state  # 같은 배치 안의 중복 url
+        points.append({
+            "observed_at": observed_at,
+            "platform": doc.get("platform"),
+            "url": doc["url"],
+            "price_int": state[0],
+            "status": state[1],
+        })
+    return points
+
+
+def record(db, points: List[Dict[str, Any]]) -> int:
+    if not points:
+        return 0
+    ensure_collection(db).insert_many(points, ordered=False)
+    return len(points)
+
+
+def record_changes(products, docs: Iterable[Mapping[str, Any]]):
+    """upsert 전에 변경을 감지해 두고, 저장이 끝난 뒤 호출할 commit(failed_urls) 을 돌려준다.
+
+    failed_urls 의 점은 저장되지 않은 값이므로 기록하지 않는다.
+    이력 기록 실패가 products 저장을 막지 않도록 예외는 경고로만 남긴다.
+    """
+    try:
+        points = detect_changes(products, docs)
+    except Exception as e:
+        logging.warning(f"[price_history] 변경 감지 실패: {e}")
+        points = []
+
+    def commit(failed_urls=()):
+        failed = set(failed_urls)
+        try:
+            return record(products.database, [p for p in points if p["url"] not in failed])
+        except Exception as e:
+            logging.warning(f"[price_history] 기록 실패: {e}")
+            return 0
+
+    return commit
+
+
+def listing_history(db, url) -> List[Dict[str, Any]]:
+    cursor = db[PRICE_HISTORY_COLLECTION].find({"url": url}, {"_id": 0}).sort("observed_at", 1)
+    return list(cursor)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def price_curve(db, model_name, storage=None, platform=None, days=30, now=None,
+                products_collection="products") -> List[Dict[str, Any]]:
+    """모델(+용량, 플랫폼)의 일자별 판매중 가격 곡선.
+
+    각 날(KST) 끝 시점에 매물별 마지막 관측값을 이어 붙여(forward fill) 판매중/예약중인 매물의
+    가격 분포와 그날 가격이 내려간 매물 수를 계산한다.
+    """
+    query: Dict[str, Any] = {"model_name": model_name}
+    if storage:
+        query["storage"] = storage
+    if platform:
+        query["platform"] = platform
+    urls = [row["url"] for row in db[products_collection].find(query, {"url": 1, "_id": 0}) if row.get("url")]
+    if not urls:
+        return []
+
+    now = now or datetime.now(KST)
+    first_day = (now - timedelta(days=days - 1)).astimezone(KST).date()
+    history: Dict[str, List[Dict[str, Any]]] = {}
+    for point in db[PRICE_HISTORY_COLLECTION].find(
+        {"url": {"$in": urls}, "observed_at": {"$lte": now}}, {"_id": 0}
+    ).sort("observed_at", 1):
+        point["observed_at"] = _as_utc(point["observed_at"])
+        history.setdefault(point["url"], []).append(point)
+
+    curve = []
+    cursors = {url: 0 for url in history}
+    current: Dict[str, Dict[str, Any]] = {}
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        day_start = datetime(day.year, day.month, day.day, tzinfo=KST)
+        day_end = day_start + timedelta(days=1)
+        drops = 0
+        for url, points in history.items():
+            i = cursors[url]
+            while i < len(points) and points[i]["observed_at"] < day_end:
+                point, before = points[i], current.get(url)
+                if (point["observed_at"] >= day_start and before and point.get("price_int")
+                        and before.get("price_int") and point["price_int"] < before["price_int"]):
+                    drops += 1
+                current[url] = point
+                i += 1
+            cursors[url] = i
+        prices = [p["price_int"] for p in current.values() if p.get("price_int") and p.get("status") in ON_SALE]
+        curve.append({
+            "day": day.isoformat(),
+            "listings": len(prices),
+            "median": statistics.median(prices) if prices else None,
+            "min": min(prices) if prices else None,
+            "max": max(prices) if prices else None,
+            "drops": drops,
+        })
+    return curve
+
+
+def _won(value):
+    return f"{value:,.0f}" if value is not None else "-"
+
+
+def main() -> None:
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Print a per-model daily price curve from price_history.")
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--model", required=True, help="model_name (e.g. galaxy_s24)")
+    parser.add_argument("--storage", help="storage (e.g. 256g)")
+    parser.add_argument("--platform")
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongodb_uri, tz_aware=True)
+    curve = price_curve(client[args.database], args.model, args.storage, args.platform, args.days)
+    print(f"{'day':<12}{'listings':>9}{'median':>12}{'min':>12}{'max':>12}{'drops':>7}")
+    for row in curve:
+        print(f"{row['day']:<12}{row['listings']:>9}{_won(row['median']):>12}"
+              f"{_won(row['min']):>12}{_won(row['max']):>12}{row['drops']:>7}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
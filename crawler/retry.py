@@ -0,0 +1,285 @@
+import os
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+import metrics
+
+try:
+    from selenium.common.exceptions import (StaleElementReferenceException, TimeoutException,
+                                            WebDriverException)
+except ImportError:  # scripts/ 에서 selenium 없이 쓰는 경우
+    StaleElementReferenceException = TimeoutException = WebDriverException = None
+
+try:
+    from requests import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+except ImportError:
+    RequestsConnectionError = RequestsTimeout = None
+
+# 크롤러 공용 재시도 엔진.
+#   RetryPolicy     최대 시도 수, 지수 백오프 + jitter, 재시도할 예외/결과 판정
+#   RetryBudget     실행 전체의 재시도 횟수·시간 상한 (CRAWLER_RETRY_BUDGET, CRAWLER_RETRY_BUDGET_SECONDS)
+#   CircuitBreaker  호스트별 연속 실패가 쌓이면 일정 시간 호출 자체를 막음
+#   Retrier         위 셋을 묶어 fn 을 실행하고, 작업별 재시도 횟수·소요 시간을 기록
+# 재시도에 쓴 시간(실패한 시도 + 대기)은 metrics 의 crawler_retry_seconds 와 log_report() 로 보고된다.
+# 플랫폼별 기본값은 RETRY_PROFILES, 환경변수 CRAWLER_RETRY_<SITE>_<KEY> 로 덮어쓴다
+# (예: CRAWLER_RETRY_JOONGNA_MAX_ATTEMPTS=5).
+
+RETRY_PROFILES: Dict[str, Dict[str, float]] = {
+    "default": {"max_attempts": 3, "base_delay": 0.5, "max_delay": 10.0, "multiplier": 2.0, "jitter": 0.5},
+    "joongna": {"base_delay": 1.0},
+    "daangn": {"base_delay": 0.3},
+}
+
+TRANSIENT_EXCEPTIONS: Tuple[Type[BaseException], ...] = tuple(
+    exc for exc in (TimeoutException, StaleElementReferenceException, WebDriverException,
+                    RequestsConnectionError, RequestsTimeout, ConnectionError, TimeoutError)
+    if exc is not None
+)
+
+
+class RetryExhausted(Exception):
+    """재시도 예산이 바닥나 더 시도하지 않음."""
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host, retry_after):
+        super().__init__(f"circuit open for {host} ({retry_after:.0f}s)")
+        self.host = host
+        self.retry_after = retry_after
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    multiplier: float = 2.0
+    jitter: float = 0.5  # 지연의 ±50% 무작위
+    retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_EXCEPTIONS
+    give_up_on: Tuple[Type[BaseException], ...] = ()
+    retry_if: Optional[Callable[[Any], bool]] = None  # 결과로 재시도 판정 (예: 빈 페이지)
+
+    def retryable(self, exc):
+        if self.give_up_on and isinstance(exc, self.give_up_on):
+            return False
+        return isinstance(exc, self.retry_on)
+
+    def delay(self, attempt):
+        """attempt 번째 실패 뒤 대기 시간."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
+
+
+def retry_setting(site, key):
+    env_key = f"CRAWLER_RETRY_{site.upper()}_{key.upper()}"
+    if env_key in os.environ:
+        return float(os.environ[env_key])
+    profile = RETRY_PROFILES.get(site, {})
+    return float(profile.get(key, RETRY_PROFILES["default"][key]))
+
+
+def policy_for(site, **overrides):
+    """플랫폼 설정으로 RetryPolicy 생성. overrides 는 호출 지점 고유 값 (retry_on, retry_if 등)."""
+    values = {key: retry_setting(site, key) for key in RETRY_PROFILES["default"]}
+    values["max_attempts"] = int(values["max_attempts"])
+    values.update(overrides)
+    return RetryPolicy(**values)
+
+
+class RetryBudget:
+    """실행 하나에서 쓸 수 있는 재시도 횟수/시간 (None = 무제한)."""
+
+    def __init__(self, max_retries=None, max_seconds=None):
+        self.max_retries = max_retries
+        self.max_seconds = max_seconds
+        self.retries = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        retries = os.environ.get("CRAWLER_RETRY_BUDGET")
+        seconds = os.environ.get("CRAWLER_RETRY_BUDGET_SECONDS")
+        return cls(int(retries) if retries else None, float(seconds) if seconds else None)
+
+    def take(self):
+        with self._lock:
+            if self.max_retries is not None and self.retries >= self.max_retries:
+                return False
+            if self.max_seconds is not None and self.seconds >= self.max_seconds:
+                return False
+            self.retries += 1
+            return True
+
+    def spend(self, seconds):
+        with self._lock:
+            self.seconds += seconds
+
+
+class CircuitBreaker:
+    """호스트별 연속 실패 failure_threshold 회 → reset_timeout 초 동안 open, 그 뒤 한 번 시험(half-open)."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+
+    def check(self, host):
+        if not host:
+            return
+        with self._lock:
+            opened = self._opened_at.get(host)
+            if opened is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - opened)
+            if remaining > 0:
+                raise CircuitOpenError(host, remaining)
+            # half-open: 이번 호출을 시험으로 통과시키고, 실패하면 바로 다시 open
+            del self._opened_at[host]
+            self._failures[host] = self.failure_threshold - 1
+
+    def success(self, host):
+        if host:
+            with self._lock:
+                self._failures.pop(host, None)
+
+    def failure(self, host):
+        if not host:
+            return
+        with self._lock:
+            count = self._failures.get(host, 0) + 1
+            self._failures[host] = count
+            if count >= self.failure_threshold and host not in self._opened_at:
+                self._opened_at[host] = time.monotonic()
+                logging.warning(f"[retry] {host}: 연속 실패 {count}회 → {self.reset_timeout:.0f}s 동안 차단")
+
+
+@dataclass
+class RetryStats:
+    calls: int = 0
+    retries: int = 0
+    gave_up: int = 0
+    seconds: float = 0.0  # 실패한 시도 + 백오프 대기
+    last_error: str = ""
+
+
+@dataclass
+class Retrier:
+    name: str
+    policy: RetryPolicy = field(default_factory=RetryPolicy)
+    budget: Optional[RetryBudget] = None
+    breaker: Optional[CircuitBreaker] = None
+    platform: str = "default"
+
+    def __post_init__(self):
+        self.stats = RetryStats()
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, host=None, before_retry=None, **kwargs):
+        """fn(*args, **kwargs) 실행. before_retry(attempt, exc_or_result) 는 다음 시도 전에 호출.
+
+        retry_if 로 재시도한 결과가 끝까지 나쁘면 마지막 결과를 그대로 돌려준다.
+        """
+        policy = self.policy
+        spent = 0.0
+        retried = 0
+        try:
+            for attempt in range(1, policy.max_attempts + 1):
+                if self.breaker is not None:
+                    self.breaker.check(host)
+                started = time.monotonic()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as exc:
+                    if self.breaker is not None and policy.retryable(exc):
+                        self.breaker.failure(host)
+                    if not policy.retryable(exc) or attempt == policy.max_attempts:
+                        self._gave_up(exc, attempt, policy.retryable(exc))
+                        raise
+                    outcome = exc
+                else:
+                    if policy.retry_if is None or not policy.retry_if(result) or attempt == policy.max_attempts:
+                        if self.breaker is not None:
+                            self.breaker.success(host)
+                        return result
+                    outcome = result
+                failed_for = time.monotonic() - started
+
+                if self.budget is not None and not self.budget.take():
+                    self._gave_up(outcome, attempt, True)
+                    raise RetryExhausted(f"{self.name}: 재시도 예산 소진")
+                delay = policy.delay(attempt)
+                label = outcome.__class__.__name__ if isinstance(outcome, Exception) else "빈 결과"
+                logging.warning(f"[retry] {self.name}: {label} → {delay:.1f}s 후 재시도 "
+                                f"({attempt}/{policy.max_attempts - 1})")
+                metrics.inc("crawler_retries_total", platform=self.platform, op=self.name)
+                if before_retry is not None:
+                    before_retry(attempt, outcome)
+                time.sleep(delay)
+                retried += 1
+                spent += failed_for + delay
+                if self.budget is not None:
+                    self.budget.spend(failed_for + delay)
+        finally:
+            with self._lock:
+                self.stats.calls += 1
+                self.stats.retries += retried
+                self.stats.seconds += spent
+            if retried:
+                metrics.observe("crawler_retry_seconds", spent, platform=self.platform, op=self.name)
+
+    def _gave_up(self, outcome, attempt, retryable):
+        if not retryable:
+            return  # 재시도 대상이 아닌 예외는 그대로 전달
+        with self._lock:
+            self.stats.gave_up += 1
+            self.stats.last_error = repr(outcome)[:200]
+        logging.warning(f"[retry] {self.name}: {attempt}회 시도 후 포기 ({self.stats.last_error})")
+
+
+def breaker_from_env():
+    return CircuitBreaker(
+        failure_threshold=int(os.environ.get("CRAWLER_CIRCUIT_FAILURES", "5")),
+        reset_timeout=float(os.environ.get("CRAWLER_CIRCUIT_RESET", "60")),
+    )
+
+
+_registry: Dict[Tuple[str, Optional[CircuitBreaker]], Retrier] = {}
+_registry_lock = threading.Lock()
+BUDGET = RetryBudget.from_env()
+# 따로 차단기를 넘기지 않은 retrier 끼리만 공유 (크롤러·스크립트는 각자 breaker_from_env() 로 만든 것을 씀)
+BREAKER = breaker_from_env()
+
+
+def retrier(name, policy=None, platform="default", budget=BUDGET, breaker=BREAKER):
+    """(이름, 차단기)별 공유 Retrier. policy 는 처음 만들 때만 적용, 통계는 log_report 에서 이름별로 합산."""
+    with _registry_lock:
+        instance = _registry.get((name, breaker))
+        if instance is None:
+            instance = _registry[(name, breaker)] = Retrier(name, policy or RetryPolicy(), budget, breaker, platform)
+        return instance
+
+
+def log_report():
+    totals: Dict[str, RetryStats] = {}
+    with _registry_lock:
+        retriers = list(_registry.values())
+    for r in retriers:
+        total = totals.setdefault(r.name, RetryStats())
+        with r._lock:
+            total.calls += r.stats.calls
+            total.retries += r.stats.retries
+            total.gave_up += r.stats.gave_up
+            total.seconds += r.stats.seconds
+    for name, s in sorted(totals.items()):
+        if s.retries or s.gave_up:
+            logging.info(f"[retry] {name}: 호출 {s.calls}회, 재시도 {s.retries}회, 포기 {s.gave_up}회, "
+                         f"재시도에 쓴 시간 {s.seconds:.1f}s")
@@ -1,5 +1,6 @@
 import os
 import sys
+import argparse
 import threading
 import subprocess
 from typing import List, Tuple
@@ -14,12 +15,63 @@ def stream_output(name: str, proc: subprocess.Popen) -> None:
         print(f"[{name}] Output reader error: {e}")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run all platform crawlers.")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="Launch each crawler's __main__ as a separate process (previous behaviour).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue each crawler's latest unfinished run (crawl_checkpoints).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Stop each category once already-stored listings repeat.")
+    parser.add_argument("--platforms", nargs="+", choices=("bunjang", "joongna", "daangn"),
+                        default=["bunjang", "joongna", "daangn"])
+    parser.add_argument("--browsers", type=int, default=max(3, (os.cpu_count() or 4) // 2),
+                        help="Total Chrome instances shared by all platforms (in-process mode).")
+    parser.add_argument("--bunjang-pages", type=int, nargs=2, default=[1, 100], metavar=("START", "END"))
+    parser.add_argument("--joongna-pages", type=int, nargs=2, default=[1, 500], metavar=("START", "END"))
+    parser.add_argument("--daangn-list-workers", type=int, default=1)
+    parser.add_argument("--daangn-detail-workers", type=int, default=2)
+    parser.add_argument("--daangn-time-budget", type=float, default=0,
+                        help="Seconds after which no new Daangn searches start (0 = no limit).")
+    return parser.parse_args()
+
+
+def run_in_process(args: argparse.Namespace) -> int:
+    from orchestrator import CrawlOrchestrator, OrchestratorConfig
+
+    # keep ./output and relative paths where the subprocess mode put them
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    config = OrchestratorConfig(
+        platforms=args.platforms,
+        browser_budget=args.browsers,
+        bunjang_pages=tuple(args.bunjang_pages),
+        joongna_pages=tuple(args.joongna_pages),
+        daangn_list_workers=args.daangn_list_workers,
+        daangn_detail_workers=args.daangn_detail_workers,
+        daangn_time_budget=args.daangn_time_budget,
+        incremental=args.incremental,
+        resume=args.resume,
+    )
+    try:
+        return CrawlOrchestrator(config).run()
+    except KeyboardInterrupt:
+        print("\nKeyboardInterrupt received. Crawlers stopped.")
+        return 130
+
+
 def main() -> int:
+    args = parse_args()
+    if not args.subprocess:
+        return run_in_process(args)
+
+    extra_args = [flag for flag, enabled in (("--resume", args.resume),
+                                             ("--incremental", args.incremental)) if enabled]
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
+    scripts = {"bunjang": "bunjangCrawler.py", "daangn": "daangnCrawler.py", "joongna": "joongnaCrawler.py"}
     cmds: List[Tuple[str, List[str]]] = [
-        ("bunjang", [sys.executable, os.path.join(script_dir, "bunjangCrawler.py")]),
-        ("daangn", [sys.executable, os.path.join(script_dir, "daangnCrawler.py")]),
-        ("joongna", [sys.executable, os.path.join(script_dir, "joongnaCrawler.py")]),
+        (name, [sys.executable, os.path.join(script_dir, scripts[name]), *extra_args])
+        for name in args.platforms
     ]
 
     procs: List[Tuple[str, subprocess.Popen]] = []
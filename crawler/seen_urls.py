@@ -0,0 +1,73 @@
+import logging
+import threading
+from collections import Counter
+
+
+class SeenUrls:
+    """한 실행 동안 처리하기로 한 URL 집합 (스레드 안전).
+
+    여러 검색 작업(지역×키워드)이 같은 게시글을 돌려줄 때 처음 제출한 작업만
+    상세 수집을 맡도록 claim 으로 선점한다. source 별 제출/중복 건수를 모아
+    실행 종료 시 중복 비율을 보고한다.
+    """
+
+    def __init__(self, name="crawl"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._urls = set()
+        self._offered = Counter()
+        self._duplicates = Counter()
+
+    def claim(self, url, source=None):
+        return bool(self.claim_many([url], source))
+
+    def claim_many(self, urls, source=None):
+        """아직 본 적 없는 URL 만 순서를 유지해 반환하고 본 것으로 기록."""
+        fresh = []
+        with self._lock:
+            for url in urls:
+                self._offered[source] += 1
+                if url in self._urls:
+                    self._duplicates[source] += 1
+                    continue
+                self._urls.add(url)
+                fresh.append(url)
+        return fresh
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._urls
+
+    def __len__(self):
+        with self._lock:
+            return len(self._urls)
+
+    def stats(self):
+        with self._lock:
+            offered = sum(self._offered.values())
+            duplicates = sum(self._duplicates.values())
+            return {
+                "offered": offered,
+                "unique": len(self._urls),
+                "duplicates": duplicates,
+                "duplicate_ratio": duplicates / offered if offered else 0.0,
+                "by_source": {
+                    source: (self._offered[source], self._duplicates[source])
+                    for source in self._offered
+                },
+            }
+
+    def log_report(self, top=5):
+        stats = self.stats()
+        logging.info(
+            f"[{self.name}] 수집 URL {stats['offered']}건 중 고유 {stats['unique']}건, "
+            f"실행 내 중복 {stats['duplicates']}건 ({stats['duplicate_ratio']:.1%})"
+        )
+        worst = sorted(
+            ((dup / offered, source, offered, dup)
+             for source, (offered, dup) in stats["by_source"].items() if offered and dup),
+            reverse=True,
+        )[:top]
+        for ratio, source, offered, dup in worst:
+            logging.info(f"[{self.name}]   중복 상위 {source}: {dup}/{offered} ({ratio:.1%})")
+        return stats
@@ -1,17 +1,24 @@
 import time
 import re
-import os
-import json
 import logging
+import argparse
+import threading
 from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from bs4 import BeautifulSoup
-from pymongo import MongoClient
+from typed_fields import apply_typed_fields
+from db_utils import known_urls, save_to_mongodb_upsert
+from waits import wait_for_located, wait_for_network_idle, wait_recorder
+from crawl_state import CrawlState, DEFAULT_KNOWN_STREAK
+from checkpoints import CheckpointStore
+from jsonl_sink import JsonlSink
+from html_backend import parse_html
+import browser_profile
+import metrics
+import retry
+from concurrency import controller_for
+from selenium.common.exceptions import TimeoutException
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -27,33 +34,118 @@ def parse_relative_time(text):
              "일": timedelta(days=int(value))}[unit]
     return (now - delta).strftime("%Y-%m-%d %H:%M:%S")
 
-def init_browser():
-    opts = Options()
-    opts.add_argument("--headless")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    driver = webdriver.Chrome(options=opts)
-    driver.set_page_load_timeout(30)
-    driver.implicitly_wait(3)
-    return driver
+# 한 프로세스에서 여러 크롤러를 돌릴 때(orchestrator.py) 동시에 띄울 브라우저 수 상한.
+# None 이면 제한 없음. 제한이 있으면 init_browser 가 빈 슬롯을 기다리고 quit() 시 반납한다.
+# 풀별 상한({풀 이름: 슬롯 수})을 주면 풀끼리 슬롯을 빼앗지 않는다: 실행 내내 드라이버를 쥐는
+# 쪽(상세 워커 등)이 목록 로더가 기다리는 슬롯까지 잡아 서로 끝나기만 기다리는 교착을 막기 위함.
+_browser_slots = None  # {풀 이름 또는 None(공용): BoundedSemaphore}
+_live_drivers = set()
+_live_lock = threading.Lock()
+
+
+def set_browser_limit(limit):
+    """limit: 전체 상한(int), 풀별 상한(dict) 또는 None(무제한). 풀에 없는 이름은 무제한."""
+    global _browser_slots
+    if not limit:
+        _browser_slots = None
+    elif isinstance(limit, dict):
+        _browser_slots = {pool: threading.BoundedSemaphore(max(1, n)) for pool, n in limit.items()}
+    else:
+        _browser_slots = {None: threading.BoundedSemaphore(limit)}
+
+
+def _slots_for(pool):
+    slots = _browser_slots
+    if slots is None:
+        return None
+    return slots.get(pool) or slots.get(None)
+
+
+def live_browser_count():
+    with _live_lock:
+        return len(_live_drivers)
+
+
+def quit_all_browsers():
+    with _live_lock:
+        drivers = list(_live_drivers)
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
 
-def get_soup(driver):
-    return BeautifulSoup(driver.page_source, "html.parser")
+def _track_driver(driver, slots):
+    original_quit = driver.quit
+    released = threading.Event()
 
-def wait_for_element(driver, by, value, timeout=5):
+    def quit():
+        try:
+            original_quit()
+        finally:
+            if not released.is_set():
+                released.set()
+                with _live_lock:
+                    _live_drivers.discard(driver)
+                if slots is not None:
+                    slots.release()
+
+    driver.quit = quit
+    with _live_lock:
+        _live_drivers.add(driver)
+
+
+def init_browser(site=None, profile=None, pool=None):
+    """site: 'bunjang' / 'joongna' / 'daangn' (browser_profile 의 사이트별 허용 목록)
+    profile: 'fast'(리소스 차단, 기본) / 'full'. 없으면 CRAWLER_BROWSER_PROFILE.
+    pool: 브라우저 슬롯 풀 이름 (기본 site, set_browser_limit 참고)."""
+    slots = _slots_for(pool or site)
+    if slots is not None:
+        slots.acquire()
     try:
-        WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((by, value)))
-    except:
-        logging.warning(f"[경고] 요소 로딩 실패: {value} → fallback sleep 1초 적용")
-        time.sleep(0.5)
-        
+        opts = Options()
+        opts.add_argument("--headless")
+        opts.add_argument("--no-sandbox")
+        opts.add_argument("--disable-dev-shm-usage")
+        profile = browser_profile.apply_options(opts, site, profile)
+        driver = webdriver.Chrome(options=opts)
+        browser_profile.apply_driver(driver, site, profile)
+        driver.set_page_load_timeout(30)
+        driver.implicitly_wait(3)
+    except Exception:
+        if slots is not None:
+            slots.release()
+        raise
+    _track_driver(driver, slots)
+    return driver
+
+def get_soup(driver, only=None, backend=None):
+    """현재 페이지 → html_backend.Node.
+
+    only: CSS 선택자. 브라우저에서 해당 요소의 outerHTML 만 받아 파싱 (없으면 전체 페이지).
+    """
+    if only:
+        try:
+            # find_element 는 implicitly_wait 만큼 기다리므로 querySelector 로 즉시 조회
+            subtree = driver.execute_script(
+                "const el = document.querySelector(arguments[0]); return el ? el.outerHTML : null;", only)
+            if subtree:
+                return parse_html(subtree, backend)
+        except Exception:
+            pass
+    return parse_html(driver.page_source, backend, only=only)
+
+def wait_for_element(driver, by, value, timeout=5, site="default"):
+    if wait_for_located(driver, by, value, site, timeout, visible=True) is None:
+        logging.warning(f"[경고] 요소 로딩 실패: {value} → 네트워크 유휴 대기로 대체")
+        wait_for_network_idle(driver, site)
+
 # 당근마켓 전용
-def wait_for_presence(driver, by, value, timeout=5):
-    try:
-        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((by, value)))
-    except:
-        logging.warning(f"[경고] 요소 존재 감지 실패: {value} → fallback sleep 1초 적용")
-        time.sleep(0.5)
+def wait_for_presence(driver, by, value, timeout=5, site="daangn"):
+    if wait_for_located(driver, by, value, site, timeout) is None:
+        logging.warning(f"[경고] 요소 존재 감지 실패: {value} → 네트워크 유휴 대기로 대체")
+        wait_for_network_idle(driver, site)
 
 def save_to_mongodb(data, platform):
     from pymongo import MongoClient
@@ -64,18 +156,42 @@ def save_to_mongodb(data, platform):
     inserted = 0
     for item in data:
         item["platform"] = platform
+        apply_typed_fields(item)
         collection.insert_one(item)
         inserted += 1
     
     logging.info(f"MongoDB에 {inserted}개 저장 완료 ({platform})")
     client.close()
 
+def crawl_arg_parser(description, end_page):
+    """플랫폼 크롤러 공통 CLI 인자 (페이지 범위 / 증분 모드 / 이어서 실행)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--end-page", type=int, default=end_page)
+    parser.add_argument("--incremental", action="store_true",
+                        help="이미 저장된 URL 이 연속으로 나오면 카테고리 페이징 중단")
+    parser.add_argument("--known-streak", type=int, default=DEFAULT_KNOWN_STREAK,
+                        help=f"증분 모드 중단 기준 연속 중복 수 (기본 {DEFAULT_KNOWN_STREAK})")
+    parser.add_argument("--resume", action="store_true",
+                        help="가장 최근 미완료 실행에서 끝난 페이지를 건너뛰고 이어서 진행")
+    return parser
+
+
+class CategoryInterrupted(Exception):
+    """카테고리를 더 진행할 수 없음 (예: 호스트 차단). 남은 페이지는 --resume 으로 이어서."""
+
+
 class BaseCrawler(ABC):
-    def __init__(self, name, base_urls):
+    def __init__(self, name, base_urls, site=None):
         self.name = name
+        self.site = site
+        # 요청 간격 자동 조절 (브라우저 1개라 동시성 한도는 1로 고정, concurrency.py)
+        self.controller = controller_for(site or name)
         self.base_urls = base_urls
-        self.driver = init_browser()
-        self.results = []
+        self.driver = init_browser(site)
+        # 결과는 메모리에 모으지 않고 파싱 즉시 JSON-lines 파일로 흘려보낸다
+        self.sink = None
+        self.result_count = 0
         self.filtered_count = 0  # 매입/삽니다 필터 개수 누적용
 
     @abstractmethod
@@ -86,63 +202,159 @@ class BaseCrawler(ABC):
     def parse_detail(self, url):
         pass
 
-    def crawl(self, start_page, end_page):
+    def load_page(self, url, kind):
+        """driver.get + 로딩 시간/페이지 수 계측 (kind: list / detail).
+
+        요청 전 제어기 간격만큼 쉬고, 결과(지연·타임아웃·오류)를 제어기에 알린다.
+        """
+        self.controller.pace()
+        started = time.monotonic()
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            self.controller.signal("timeout")
+            raise
+        except Exception:
+            self.controller.signal("error")
+            raise
+        elapsed = time.monotonic() - started
+        self.controller.record(elapsed)
+        metrics.observe("crawler_page_load_seconds", elapsed, platform=self.site, kind=kind)
+        metrics.inc("crawler_pages_total", platform=self.site, kind=kind)
+
+    def count_filtered(self):
+        self.filtered_count += 1
+        metrics.inc("crawler_skipped_total", platform=self.site, reason="filtered")
+
+    def fetch_links(self, category, page, page_url):
+        """목록 페이지 하나의 (links, ad_skipped).
+
+        None 이면 이 페이지만 건너뛰고, links 가 비어 있으면 카테고리 끝으로 본다.
+        더 진행할 수 없으면 CategoryInterrupted (플랫폼별 재시도 정책은 하위 클래스가 덮어씀).
+        """
+        result = self.get_links(page_url)
+        if isinstance(result, tuple):
+            return result
+        return result, 0
+
+    def crawl(self, start_page, end_page, incremental=False, known_streak=DEFAULT_KNOWN_STREAK,
+              resume=False, seen=None):
         from pymongo import MongoClient  # 중복 확인용 DB 연결 추가
         client = MongoClient("mongodb://localhost:27017/")
         collection = client["market2"]["products"]
-        
-        ad_total_skipped = 0  # 광고 건너뛴 총 개수 카운트
-        duplicate_skipped = 0  # 중복 카운트
-
-        for category, base_url in self.base_urls.items():
-            logging.info(f"▶ {self.name} 크롤링 시작 — {category} ({start_page}~{end_page} 페이지)")
-            for page in range(start_page, end_page + 1):
-                page_url = self.build_page_url(base_url, page)
-                result = self.get_links(page_url)
-
-                # get_links() 결과 처리
-                if isinstance(result, tuple):
-                    links, ad_skipped = result
-                    ad_total_skipped += ad_skipped
-                else:
-                    links = result
-
-                if not links:
-                    break
-                
-                for link in links:
-                    # 상세 페이지 진입 전 중복 검사
-                    if collection.find_one({"url": link}):
-                        duplicate_skipped += 1
+        # 예외로 끝나도 드라이버를 닫아 브라우저 슬롯을 반납한다 (orchestrator 의 다른 플랫폼이 기다림)
+        try:
+            state = CrawlState(client["market2"]) if incremental else None
+            checkpoints = CheckpointStore(client["market2"], self.name).open(resume)
+            if self.sink is None:
+                self.sink = JsonlSink.from_env(self.name)
+
+            ad_total_skipped = 0  # 광고 건너뛴 총 개수 카운트
+            duplicate_skipped = 0  # 중복 카운트
+            # 중단한 카테고리나 완료로 기록하지 못한 페이지(건너뜀·저장 실패)가 있으면
+            # 실행을 완료로 기록하지 않는다 (--resume 이 그 페이지들을 다시 시도하도록)
+            incomplete = False
+
+            for category, base_url in self.base_urls.items():
+                logging.info(f"▶ {self.name} 크롤링 시작 — {category} ({start_page}~{end_page} 페이지)")
+                streak = state.streak(self.name, category, known_streak) if state else None
+                newest_url = None
+                stopped_early = False
+                category_interrupted = False
+                page = start_page
+                for page in range(start_page, end_page + 1):
+                    unit = f"{category}|{page}"
+                    if checkpoints.is_done(unit):
                         continue
+                    try:
+                        fetched = self.fetch_links(category, page, self.build_page_url(base_url, page))
+                    except CategoryInterrupted as exc:
+                        logging.warning(f"▶ {self.name} {category}: {exc} → 카테고리 중단 ({page}페이지부터 재개 필요)")
+                        category_interrupted = incomplete = True
+                        break
+                    if fetched is None:
+                        incomplete = True
+                        continue
+                    links, ad_skipped = fetched
+                    ad_total_skipped += ad_skipped
+                    metrics.inc("crawler_skipped_total", ad_skipped, platform=self.site, reason="ad")
+
+                    if not links:
+                        break
+
+                    # 상세 페이지 진입 전 중복 검사 (페이지 단위로 한 번에 조회)
+                    # seen(공유 URL 목록)이 있으면 이번 실행에서 이미 처리한 링크도 중복으로 취급
+                    fresh = seen.claim_many(links, f"{self.name}/{category}") if seen is not None else links
+                    known = known_urls(collection, fresh) | (set(links) - set(fresh))
+                    page_results = []
+                    for link in links:
+                        if link in known:
+                            duplicate_skipped += 1
+                            metrics.inc("crawler_skipped_total", platform=self.site, reason="duplicate")
+                            continue
                     
-                    data = self.parse_detail(link)
-                    if data:
-                        data["category"] = category
-                        data["platform"] = self.name
-                        self.results.append(data)
-
-        logging.info(f"광고 필터링: {ad_total_skipped}개")
-        logging.info(f"매입/삽니다 필터링: {self.filtered_count}개")
-        logging.info(f"중복 필터링: {duplicate_skipped}개")
-        client.close()
-        self.driver.quit()
+                        data = self.parse_detail(link)
+                        if data:
+                            data["category"] = category
+                            data["platform"] = self.name
+                            self.sink.write(data)
+                            self.result_count += 1
+                            metrics.inc("crawler_listings_total", platform=self.site)
+                            page_results.append(data)
+
+                    # 페이지 단위로 DB 에 저장한 뒤 체크포인트 기록 (중단 시 저장된 페이지만 건너뜀)
+                    if page_results:
+                        try:
+                            failed = save_to_mongodb_upsert(page_results, self.name)["failed"]
+                        except Exception as e:
+                            logging.warning(f"▶ {self.name} 페이지 저장 실패 ({category} {page}페이지): {e}")
+                            incomplete = True
+                            continue  # 저장 실패 페이지는 완료로 기록하지 않음
+                        if failed:
+                            logging.warning(f"▶ {self.name} 페이지 일부 저장 실패 ({category} {page}페이지): {failed}건")
+                            incomplete = True
+                            continue
+                    checkpoints.mark_done(unit)
+                    # high-water 는 이번 실행에서 1페이지를 실제로 가져와 저장했을 때만 옮긴다
+                    # (--resume 으로 건너뛴 페이지나 저장 실패 페이지의 링크가 기준이 되면 다음 증분 실행이 엉뚱한 곳에서 멈춤)
+                    if page == 1:
+                        newest_url = links[0]
+
+                    if streak and streak.feed(links, known):
+                        logging.info(f"▶ {self.name} {category}: 연속 중복 {streak.streak}건 → {page}페이지에서 중단")
+                        stopped_early = True
+                        break
+
+                if state and not category_interrupted:
+                    state.finish(self.name, category, newest_url, page, stopped_early)
+
+            logging.info(f"광고 필터링: {ad_total_skipped}개")
+            logging.info(f"매입/삽니다 필터링: {self.filtered_count}개")
+            logging.info(f"중복 필터링: {duplicate_skipped}개")
+            wait_recorder.log_summary()
+            retry.log_report()
+            if not incomplete:
+                checkpoints.complete()
+        finally:
+            client.close()
+            self.driver.quit()
 
     def save(self):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs("./output", exist_ok=True)
-        path = f"./output/{self.name}_result_{timestamp}.json"
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.results, f, ensure_ascii=False, indent=4)
-        print(f"{self.name} 크롤링 완료 → {path} (총 {len(self.results)}개)")
-        save_to_mongodb(self.results, self.name)
+        # DB 는 crawl() 에서 페이지 단위로, 파일은 jsonl_sink 로 이미 기록됨 → 파일만 닫는다
+        if self.sink is None:
+            return
+        self.sink.close()
+        paths = ", ".join(self.sink.paths) or "파일 없음"
+        print(f"{self.name} 크롤링 완료 → {paths} (총 {self.result_count}개)")
 
     def restart_driver(self):
         try:
             self.driver.quit()
         except Exception:
             pass
-        self.driver = init_browser()
+        metrics.inc("crawler_driver_restarts_total", platform=self.site)
+        self.controller.signal("restart")
+        self.driver = init_browser(self.site)
 
     def build_page_url(self, base_url, page):
         return f"{base_url}&page={page}"
@@ -0,0 +1,126 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+# 지역×키워드 검색 작업의 과거 신규 매물 수(yield)를 Mongo 에 저장해 두고,
+#   - 기대 신규 건수(시간당 신규율 × 마지막 실행 후 경과 시간)가 큰 작업부터 실행
+#   - 시간당 신규율에 맞춰 재방문 간격을 조정 (활발한 지역은 자주, 조용한 지역은 드물게)
+#   - 시간/작업 수 예산 안에서만 실행
+STATS_COLLECTION = "crawl_task_stats"
+EWMA_ALPHA = 0.3               # 최근 실행에 주는 가중치
+TARGET_NEW_PER_VISIT = 3.0     # 방문 한 번에 이 정도 신규 매물이 쌓이도록 간격을 잡는다
+MIN_INTERVAL = timedelta(minutes=30)
+MAX_INTERVAL = timedelta(days=3)
+
+
+@dataclass
+class SearchTask:
+    platform: str
+    region_url: str
+    keyword: str
+    search_url: str
+    score: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.platform}|{self.region_url}|{self.keyword}"
+
+
+class TaskBudget:
+    """시간(초) / 작업 수 예산. 0 또는 None 이면 제한 없음."""
+
+    def __init__(self, seconds: Optional[float] = None, max_tasks: Optional[int] = None):
+        self.seconds = seconds or None
+        self.max_tasks = max_tasks or None
+        self.started = time.monotonic()
+        self.used = 0
+
+    def take(self) -> bool:
+        if self.max_tasks is not None and self.used >= self.max_tasks:
+            return False
+        if self.seconds is not None and time.monotonic() - self.started >= self.seconds:
+            return False
+        self.used += 1
+        return True
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def adaptive_interval(rate_per_hour: float) -> timedelta:
+    if rate_per_hour <= 0:
+        return MAX_INTERVAL
+    interval = timedelta(hours=TARGET_NEW_PER_VISIT / rate_per_hour)
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+
+class TaskScheduler:
+    def __init__(self, db, platform: str):
+        self.collection = db[STATS_COLLECTION]
+        self.platform = platform
+
+    def _load(self, tasks: Sequence[SearchTask]) -> Dict[str, dict]:
+        keys = [t.key for t in tasks]
+        return {doc["_id"]: doc for doc in self.collection.find({"_id": {"$in": keys}})}
+
+    def plan(self, tasks: Sequence[SearchTask], include_not_due: bool = False,
+             now: Optional[datetime] = None) -> List[SearchTask]:
+        """실행할 작업을 기대 신규 건수 내림차순으로 반환. 처음 보는 작업이 가장 먼저."""
+        now = now or datetime.now(timezone.utc)
+        history = self._load(tasks)
+        planned = []
+        skipped = 0
+        for task in tasks:
+            doc = history.get(task.key)
+            if not doc or not doc.get("last_run_at"):
+                task.score = float("inf")
+                planned.append(task)
+                continue
+            last_run = _as_utc(doc["last_run_at"])
+            hours = max((now - last_run).total_seconds() / 3600, 0.0)
+            task.score = doc.get("rate_per_hour", 0.0) * hours
+            next_due = _as_utc(doc.get("next_due_at")) or now
+            if include_not_due or next_due <= now:
+                planned.append(task)
+            else:
+                skipped += 1
+        planned.sort(key=lambda t: t.score, reverse=True)
+        logging.info(f"[scheduler] {self.platform}: 실행 대상 {len(planned)}개, 간격 미도래로 보류 {skipped}개")
+        return planned
+
+    def record(self, task: SearchTask, new_count: int, listed_count: int,
+               now: Optional[datetime] = None) -> None:
+        now = now or datetime.now(timezone.utc)
+        doc = self.collection.find_one({"_id": task.key}) or {}
+        last_run = _as_utc(doc.get("last_run_at"))
+        if last_run is not None:
+            hours = max((now - last_run).total_seconds() / 3600, 1 / 60)
+            observed_rate = new_count / hours
+            rate = EWMA_ALPHA * observed_rate + (1 - EWMA_ALPHA) * doc.get("rate_per_hour", observed_rate)
+        else:
+            # 첫 실행은 누적분이 한꺼번에 잡히므로 신규율을 추정하지 않고 최소 간격으로 재방문
+            rate = doc.get("rate_per_hour", TARGET_NEW_PER_VISIT / (MIN_INTERVAL.total_seconds() / 3600))
+        interval = adaptive_interval(rate)
+        self.collection.update_one(
+            {"_id": task.key},
+            {
+                "$set": {
+                    "platform": task.platform,
+                    "region_url": task.region_url,
+                    "keyword": task.keyword,
+                    "last_run_at": now,
+                    "last_new": new_count,
+                    "last_listed": listed_count,
+                    "rate_per_hour": rate,
+                    "interval_minutes": interval.total_seconds() / 60,
+                    "next_due_at": now + interval,
+                },
+                "$inc": {"runs": 1, "total_new": new_count},
+            },
+            upsert=True,
+        )
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 크롤러 모듈은 crawler/ 에서 평면 import 로 서로를 부른다 (python bunjangCrawler.py 와 같은 방식)
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+if CRAWLER_DIR not in sys.path:
+    sys.path.insert(0, CRAWLER_DIR)
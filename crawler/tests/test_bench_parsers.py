@@ -0,0 +1,17 @@
+import pytest
+
+import bench_parsers
+import fixtures
+import html_backend
+from conftest import FIXTURE_DIR
+
+
+@pytest.mark.parametrize("platform,kind", list(bench_parsers.PARSERS))
+@pytest.mark.parametrize("backend", html_backend.available_backends())
+def test_fixture_pages_parse_to_expected(platform, kind, backend):
+    pages = fixtures.load(platform, kind, FIXTURE_DIR)
+    assert pages, f"{platform}/{kind} 에 fixture 가 없음"
+
+    result = bench_parsers.bench(platform, kind, pages, backend, repeat=1, show_mismatches=False)
+
+    assert result["accuracy"] == 1.0, result["mismatches"]
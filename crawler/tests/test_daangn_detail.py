@@ -0,0 +1,49 @@
+import pytest
+from lxml import html as lxml_html
+
+import fixtures
+from conftest import FIXTURE_DIR
+from daangn_detail import DESCRIPTION_XPATH, parse_detail_html, parse_listing_state
+
+# 손으로 만든 합성 페이지 (meta.json "synthetic"). 실제 페이지는 CRAWLER_FIXTURE_DIR 수집 모드로 추가
+PAGES = fixtures.load("daangn", "detail", FIXTURE_DIR)
+FULL_TEXT = PAGES[0][1]["expected"]["description"]
+
+JSON_LD = "//script[@type='application/ld+json']"
+NEXT_DATA = "//script[@id='__NEXT_DATA__']"
+
+
+def _without(page, *xpaths):
+    tree = lxml_html.fromstring(page)
+    for xpath in xpaths:
+        for element in tree.xpath(xpath):
+            element.getparent().remove(element)
+    return lxml_html.tostring(tree, encoding="unicode")
+
+
+@pytest.mark.parametrize("page,meta", PAGES)
+def test_saved_page_matches_expected(page, meta):
+    assert parse_detail_html(page) == meta["expected"]
+    assert parse_detail_html(page.encode("utf-8")) == meta["expected"]  # 바이트 응답도 UTF-8 로 읽어야 함
+
+
+def test_json_ld_fallback():
+    page = _without(PAGES[0][0], DESCRIPTION_XPATH, NEXT_DATA)
+    assert parse_detail_html(page)["description"] == FULL_TEXT
+
+
+def test_next_data_fallback():
+    page = _without(PAGES[0][0], DESCRIPTION_XPATH, JSON_LD)
+    assert parse_detail_html(page)["description"] == FULL_TEXT
+
+
+def test_og_description_fallback():
+    page = _without(PAGES[0][0], DESCRIPTION_XPATH, JSON_LD, NEXT_DATA)
+    description = parse_detail_html(page)["description"]
+    assert description.startswith("배터리 성능 91%") and description.endswith("...")
+
+
+def test_listing_state_from_json_ld_then_meta():
+    page = PAGES[0][0]
+    assert parse_listing_state(page) == {"price_int": 720000, "status": "판매중"}
+    assert parse_listing_state(_without(page, JSON_LD)) == {"price_int": 720000, "status": "판매중"}
@@ -0,0 +1,49 @@
+from jsonl_sink import JsonlSink, read_jsonl
+
+
+def _write(tmp_path, compression, count):
+    sink = JsonlSink("test", directory=str(tmp_path), compression=compression, fsync="none")
+    with sink:
+        for i in range(count):
+            sink.write({"url": f"https://example.com/{i}", "title": "아이폰 15", "pad": "x" * 40})
+    return sink.paths[0]
+
+
+def test_round_trip(tmp_path):
+    path = _write(tmp_path, "gzip", 10)
+    assert [r["url"] for r in read_jsonl([path])] == [f"https://example.com/{i}" for i in range(10)]
+
+
+def test_truncated_gzip_keeps_decoded_records(tmp_path, capsys):
+    path = _write(tmp_path, "gzip", 2000)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[: len(data) // 2])  # 크래시로 gzip 트레일러 없이 끊긴 파일
+
+    records = list(read_jsonl([path]))
+
+    assert 0 < len(records) < 2000
+    assert [r["url"] for r in records] == [f"https://example.com/{i}" for i in range(len(records))]
+    assert "truncated" in capsys.readouterr().out
+
+
+def test_truncated_file_does_not_stop_later_files(tmp_path):
+    first = _write(tmp_path / "a", "gzip", 500)
+    with open(first, "rb") as f:
+        data = f.read()
+    with open(first, "wb") as f:
+        f.write(data[:-20])
+    second = _write(tmp_path / "b", "none", 3)
+
+    records = list(read_jsonl([first, second]))
+
+    assert [r["url"] for r in records[-3:]] == [f"https://example.com/{i}" for i in range(3)]
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = _write(tmp_path, "none", 3)
+    with open(path, "ab") as f:
+        f.write(b'{"url": "https://example.com/cut')
+
+    assert len(list(read_jsonl([path]))) == 3
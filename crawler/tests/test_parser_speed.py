@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import bench_parsers  # noqa: E402
+import fixtures  # noqa: E402
+import html_backend  # noqa: E402
+from conftest import FIXTURE_DIR  # noqa: E402
+
+# 수집 모드로 모은 실제 페이지가 있으면 그것으로, 없으면 저장소의 합성 fixture 로 측정
+PAGE_DIR = fixtures.FIXTURE_DIR or FIXTURE_DIR
+
+
+@pytest.mark.parametrize("platform,kind", list(bench_parsers.PARSERS))
+@pytest.mark.parametrize("backend", html_backend.available_backends())
+def test_parser_speed(benchmark, platform, kind, backend):
+    pages = fixtures.load(platform, kind, PAGE_DIR)
+    if not pages:
+        pytest.skip(f"{platform}/{kind} fixture 없음")
+    parser, _ = bench_parsers.PARSERS[(platform, kind)]
+    benchmark.extra_info["synthetic"] = sum(bool(meta.get("synthetic")) for _, meta in pages)
+
+    benchmark(lambda: [parser(html, meta, backend) for html, meta in pages])
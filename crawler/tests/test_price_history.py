@@ -0,0 +1,36 @@
+import mongomock
+import pytest
+
+from price_history import detect_changes
+
+
+@pytest.fixture
+def products():
+    collection = mongomock.MongoClient()["market2"]["products"]
+    collection.insert_many([
+        {"url": "https://example.com/1", "price_int": 700000, "status": "판매중"},
+        {"url": "https://example.com/2", "price_int": 500000, "status": None},
+    ])
+    return collection
+
+
+def _points(products, *docs):
+    return [(p["url"], p["price_int"], p["status"]) for p in detect_changes(products, docs)]
+
+
+def test_missing_status_is_not_a_change(products):
+    # 목록 수집은 status 를 모른다: 가격이 같으면 점을 남기지 않음
+    assert _points(products, {"url": "https://example.com/1", "price_int": 700000}) == []
+    assert _points(products, {"url": "https://example.com/2", "price_int": 500000, "status": "판매중"}) == []
+
+
+def test_change_keeps_known_fields(products):
+    assert _points(products, {"url": "https://example.com/1", "price_int": 650000}) == [
+        ("https://example.com/1", 650000, "판매중")
+    ]
+
+
+def test_new_url_is_recorded(products):
+    assert _points(products, {"url": "https://example.com/3", "price_int": 300000}) == [
+        ("https://example.com/3", 300000, None)
+    ]
@@ -0,0 +1,58 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, MutableMapping, Optional
+
+# 문자열 price / upload_time 을 저장 시점에 숫자·날짜 필드로 함께 기록한다.
+#   price "1,250,000원"               → price_int 1250000
+#   upload_time "2025-11-09 12:00:00" → uploaded_at (KST 기준 datetime)
+KST = timezone(timedelta(hours=9))
+PRICE_DIGITS = re.compile(r"\d+")
+UPLOAD_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y.%m.%d")
+
+
+def parse_price_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, str):
+        return None
+    digits = PRICE_DIGITS.findall(value)
+    if not digits:
+        return None
+    return int("".join(digits))
+
+
+def parse_uploaded_at(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=KST)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    if not text:
+        return None
+    for candidate in (text, text.replace("Z", "+00:00")):
+        try:
+            parsed = datetime.fromisoformat(candidate)
+        except ValueError:
+            continue
+        return parsed.replace(tzinfo=KST) if parsed.tzinfo is None else parsed.astimezone(KST)
+    for fmt in UPLOAD_TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).replace(tzinfo=KST)
+        except ValueError:
+            continue
+    return None
+
+
+def typed_fields(doc: MutableMapping[str, Any]) -> Dict[str, Any]:
+    """price_int / uploaded_at 값만 계산해 반환 (파싱 실패 시 None)."""
+    return {
+        "price_int": parse_price_int(doc.get("price")),
+        "uploaded_at": parse_uploaded_at(doc.get("upload_time")),
+    }
+
+
+def apply_typed_fields(doc: MutableMapping[str, Any]) -> MutableMapping[str, Any]:
+    doc.update(typed_fields(doc))
+    return doc
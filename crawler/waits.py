@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import metrics
+
+# 고정 sleep 대신 DOM 변화 / 네트워크 유휴를 기다리는 대기 함수 모음.
+# 사이트별 타임아웃은 WAIT_PROFILES 에서 조정하고, 환경변수
+# CRAWLER_WAIT_<SITE>_<KEY> (예: CRAWLER_WAIT_DAANGN_MORE_TIMEOUT=8) 로 덮어쓸 수 있다.
+
+WAIT_PROFILES: Dict[str, Dict[str, float]] = {
+    "default": {
+        "element_timeout": 5.0,     # 요소 등장 대기
+        "more_timeout": 5.0,        # 더보기/스크롤 후 새 항목 대기
+        "idle_ms": 300.0,           # 이 시간 동안 새 리소스 요청이 없으면 유휴로 판단
+        "idle_timeout": 3.0,        # 네트워크 유휴 대기 상한
+        "poll": 0.1,
+    },
+    "daangn": {"more_timeout": 6.0},
+    "joongna": {"more_timeout": 1.5, "idle_ms": 400.0},
+    "bunjang": {"element_timeout": 5.0},
+}
+
+
+def wait_setting(site: str, key: str) -> float:
+    env_key = f"CRAWLER_WAIT_{site.upper()}_{key.upper()}"
+    if env_key in os.environ:
+        return float(os.environ[env_key])
+    profile = WAIT_PROFILES.get(site, {})
+    return float(profile.get(key, WAIT_PROFILES["default"][key]))
+
+
+class WaitRecorder:
+    """대기 종류별 소요 시간 누적 (스레드 안전)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+
+    def record(self, site: str, kind: str, seconds: float, timed_out: bool = False):
+        with self._lock:
+            stat = self._stats[(site, kind)]
+            stat["count"] += 1
+            stat["total"] += seconds
+            stat["max"] = max(stat["max"], seconds)
+            if timed_out:
+                stat["timeouts"] += 1
+
+    def summary(self):
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def log_summary(self):
+        for (site, kind), stat in sorted(self.summary().items()):
+            avg = stat["total"] / stat["count"] if stat["count"] else 0.0
+            logging.info(
+                f"[wait] {site}/{kind}: {stat['count']}회, 합계 {stat['total']:.1f}s, "
+                f"평균 {avg:.2f}s, 최대 {stat['max']:.2f}s, 타임아웃 {stat['timeouts']}회"
+            )
+
+
+wait_recorder = WaitRecorder()
+
+
+def _timed_wait(driver, site, kind, timeout, condition, poll=None):
+    started = time.monotonic()
+    timed_out = False
+    result = None
+    try:
+        result = WebDriverWait(
+            driver, timeout, poll_frequency=poll or wait_setting(site, "poll")
+        ).until(condition)
+    except TimeoutException:
+        timed_out = True
+    finally:
+        elapsed = time.monotonic() - started
+        wait_recorder.record(site, kind, elapsed, timed_out)
+        metrics.observe("crawler_wait_seconds", elapsed, platform=site, kind=kind)
+    return result, timed_out
+
+
+def count_elements(driver, css: str) -> int:
+    try:
+        return int(driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length;", css) or 0)
+    except WebDriverException:
+        return 0
+
+
+def wait_for_count_increase(driver, css: str, previous: int, site: str = "default",
+                            timeout: Optional[float] = None) -> int:
+    """css 에 매칭되는 요소 수가 previous 보다 커질 때까지 대기. 최종 개수를 반환."""
+    timeout = timeout if timeout is not None else wait_setting(site, "more_timeout")
+
+    def increased(d):
+        count = count_elements(d, css)
+        return count if count > previous else False
+
+    result, _ = _timed_wait(driver, site, "count_increase", timeout, increased)
+    return result if result else count_elements(driver, css)
+
+
+# 기본 리소스 타이밍 버퍼(250개)가 차면 개수가 멈춰 유휴로 오인하므로 한 번 늘려 둔다
+_RESOURCE_COUNT_JS = """
+if (!window.__crawlerResourceBuffer) {
+  performance.setResourceTimingBufferSize(5000);
+  window.__crawlerResourceBuffer = true;
+}
+return [performance.getEntriesByType('resource').length, document.readyState];
+"""
+
+
+def wait_for_network_idle(driver, site: str = "default", idle_ms: Optional[float] = None,
+                          timeout: Optional[float] = None) -> bool:
+    """idle_ms 동안 새 리소스 요청이 없고 문서 로딩이 끝나면 True."""
+    idle = (idle_ms if idle_ms is not None else wait_setting(site, "idle_ms")) / 1000.0
+    timeout = timeout if timeout is not None else wait_setting(site, "idle_timeout")
+    state = {"count": -1, "since": time.monotonic()}
+
+    def quiet(d):
+        try:
+            count, ready = d.execute_script(_RESOURCE_COUNT_JS)
+        except WebDriverException:
+            return False
+        now = time.monotonic()
+        if count != state["count"]:
+            state["count"], state["since"] = count, now
+            return False
+        return ready == "complete" and now - state["since"] >= idle
+
+    _, timed_out = _timed_wait(driver, site, "network_idle", timeout, quiet)
+    return not timed_out
+
+
+def wait_for_located(driver, by, value, site: str = "default", timeout: Optional[float] = None,
+                     visible: bool = False):
+    """요소 등장(또는 표시) 대기. 실패 시 None."""
+    timeout = timeout if timeout is not None else wait_setting(site, "element_timeout")
+    condition = (EC.visibility_of_element_located((by, value)) if visible
+                 else EC.presence_of_element_located((by, value)))
+    result, _ = _timed_wait(driver, site, "element", timeout, condition)
+    return result
+
+
+def wait_for_css(driver, css: str, site: str = "default", timeout: Optional[float] = None,
+                 visible: bool = False):
+    return wait_for_located(driver, By.CSS_SELECTOR, css, site, timeout, visible)
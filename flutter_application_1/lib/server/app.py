@@ -1,10 +1,12 @@
 # app.py
-import os, re, json, logging, httpx
+import os, re, json, asyncio, logging, httpx
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import google.generativeai as genai
 
@@ -19,6 +21,7 @@ PRODUCT_BASE = os.getenv("BACKEND_BASE_URL", "http://localhost:3001").rstrip("/"
 PRODUCT_API = f"{PRODUCT_BASE}/products"
 PRICE_TREND_API = f"{PRODUCT_BASE}/products/price-trend"
 RECOMMEND_PRICE_API = f"{PRODUCT_BASE}/products/recommend-price"
+TIME_TO_SELL_API = f"{PRODUCT_BASE}/products/time-to-sell"
 
 if not GOOGLE_API_KEY:
     raise RuntimeError("GOOGLE_API_KEY가 설정되지 않음")
@@ -160,6 +163,40 @@ async def _call_recommend_price(keyword: str) -> Dict[str, Any]:
         log.warning("recommend-price 호출 실패: %s", e)
         return {}
 
+async def _call_time_to_sell(keyword: str, price: Optional[int]) -> Dict[str, Any]:
+    """미리 집계된 판매 소요 기간 (build_time_to_sell.py → /products/time-to-sell)."""
+    if not keyword: return {}
+    params: Dict[str, Any] = {"keyword": keyword}
+    if price: params["price"] = price
+    try:
+        async with httpx.AsyncClient(timeout=5) as c:
+            r = await c.get(TIME_TO_SELL_API, params=params)
+            r.raise_for_status()
+            return r.json()
+    except Exception as e:
+        log.warning("time-to-sell 호출 실패: %s", e)
+        return {}
+
+async def _call_time_to_sell_for(keyword: str, rec_task: "asyncio.Task", ask: Optional[int]) -> Dict[str, Any]:
+    """사용자가 말한 가격, 없으면 중고 권장가(rec_task 결과)가 나오는 대로 판매 소요 기간 조회."""
+    if not ask:
+        used = (await rec_task).get("used")
+        ask = used.get("recommended") if isinstance(used, dict) else None
+    return await _call_time_to_sell(keyword, ask)
+
+def _summarize_time_to_sell(tts: Dict[str, Any]) -> str:
+    within = tts.get("sell_within") or {}
+    if not tts.get("sold") or not within:
+        return ""
+    week = within.get("7")
+    median = tts.get("median_days")
+    parts = []
+    if isinstance(median, (int, float)):
+        parts.append(f"보통 {median:g}일 안에 팔립니다")
+    if isinstance(week, (int, float)):
+        parts.append(f"7일 내 판매 확률 약 {round(week * 100)}%")
+    return "이 가격이면 " + ", ".join(parts) if parts else ""
+
 # =========================
 # 상태
 # =========================
@@ -174,8 +211,49 @@ _last_intent: str = ""
 async def health():
     return {"ok": True, "backend": PRODUCT_BASE}
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest):
+# =========================
+# 응답 조립 / 스트리밍
+# =========================
+def _to_card(p: Dict[str, Any]) -> Card:
+    return Card(
+        title=str(p.get("title","")), price=str(p.get("price","")),
+        url=p.get("url") or p.get("link"),
+        image_url=p.get("image_url") or p.get("imageUrl") or p.get("image") or p.get("thumbnail"),
+        platform=p.get("platform"), uploaded_at=p.get("upload_time") or p.get("uploaded_at"),
+    )
+
+def _products_params(key: str, ctx: ClientCtx, page: int, limit: int) -> Dict[str, Any]:
+    params = {
+        "keyword": key,
+        "platform": ",".join(ctx.platforms),
+        "sort": {"latest": "newest", "price_asc": "low", "price_desc": "high"}[ctx.sort],
+        "minPrice": ctx.minPrice, "maxPrice": ctx.maxPrice, "page": page, "limit": limit,
+    }
+    return {k: v for k, v in params.items() if v not in (None, "", [])}
+
+def _summarize_trend(key: str, trend: Dict[str, Any]) -> str:
+    # 간단 평균 요약
+    vals = []
+    for p, days in trend.items():
+        for d, stat in (days or {}).items():
+            used = (stat or {}).get("used", {})
+            if isinstance(used.get("avg"), (int, float)):
+                vals.append(float(used["avg"]))
+    if not vals:
+        return ""
+    avg = sum(vals) / len(vals)
+    return f"최근 7일 {key} 중고 평균가 약 {int(round(avg)):,}원."
+
+def _sse(event: str, data: Any) -> str:
+    payload = json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+async def _chat_events(req: ChatRequest) -> AsyncIterator[Tuple[str, Any]]:
+    """/chat 처리 단계를 (이벤트명, 데이터) 순서로 내보낸다.
+
+    intent → cards → trend → text → done 순서이며, 마지막 done에는 /chat과 동일한
+    ChatResponse가 담긴다. 해당 분기에서 만들지 않는 이벤트는 생략된다.
+    """
     global _last_condition, _last_intent
 
     user_q = (req.message or "").strip()
@@ -207,6 +285,8 @@ async def chat(req: ChatRequest):
     _last_condition = merged.copy()
     _last_intent = intent
 
+    yield "intent", {"intent": intent, "followup": followup, "params": merged}
+
     # 2) 분기 처리
     cards: List[Card] = []
     trend: Dict[str, Any] | None = None
@@ -216,25 +296,31 @@ async def chat(req: ChatRequest):
     if intent == "시세_분석":
         key = merged.get("model") or ctx.keyword or ""
         trend = await _call_price_trend(key)
+        yield "trend", trend
         # 요약 텍스트(선택)
         if trend:
-            # 간단 평균 요약
-            vals = []
-            for p, days in trend.items():
-                for d, stat in (days or {}).items():
-                    used = (stat or {}).get("used", {})
-                    if isinstance(used.get("avg"), (int, float)):
-                        vals.append(float(used["avg"]))
-            if vals:
-                avg = sum(vals) / len(vals)
-                text = f"최근 7일 {key} 중고 평균가 약 {int(round(avg)):,}원."
+            text = _summarize_trend(key, trend)
         # 카드 비움
         cards = []
 
     # ---- 가격_추천: 권장가 텍스트 + (선택) 카드 간단 노출 ----
     elif intent == "가격_추천":
         key = merged.get("model") or ctx.keyword or ""
-        rec = await _call_recommend_price(key)
+        # 권장가·판매 소요 기간·보조 카드(상위 5개)를 동시에 요청하고, 카드가 먼저 오면 먼저 내보낸다.
+        # 판매 소요 기간은 사용자가 말한 가격, 없으면 중고 권장가 기준 (집계 문서 조회만)
+        rec_task = asyncio.create_task(_call_recommend_price(key))
+        ask = merged.get("max_price") or merged.get("min_price")
+        tts_task = asyncio.create_task(_call_time_to_sell_for(key, rec_task, ask))
+        try:
+            items = await _call_products(_products_params(key, ctx, page=1, limit=5))
+            cards = [_to_card(p) for p in items[:5]]
+            yield "cards", cards
+
+            rec, tts = await asyncio.gather(rec_task, tts_task)
+        finally:
+            # 클라이언트가 끊겨 제너레이터가 닫히거나 카드 조회가 실패하면 남은 요청을 정리
+            rec_task.cancel()
+            tts_task.cancel()
         parts = []
         if isinstance(rec.get("new"), dict):
             parts.append(f"새상품 권장가 {rec['new'].get('recommended', 0):,}원")
@@ -242,45 +328,25 @@ async def chat(req: ChatRequest):
             parts.append(f"중고 권장가 {rec['used'].get('recommended', 0):,}원")
         text = " / ".join(parts) if parts else "권장가 산출에 필요한 데이터가 부족합니다."
 
-        # 보조 카드(상위 5개)
-        params = {
-            "keyword": key,
-            "platform": ",".join(ctx.platforms),
-            "sort": {"latest": "newest", "price_asc": "low", "price_desc": "high"}[ctx.sort],
-            "minPrice": ctx.minPrice, "maxPrice": ctx.maxPrice, "page": 1, "limit": 5,
-        }
-        items = await _call_products({k: v for k, v in params.items() if v not in (None, "", [])})
-        for p in items[:5]:
-            cards.append(Card(
-                title=str(p.get("title","")), price=str(p.get("price","")),
-                url=p.get("url") or p.get("link"),
-                image_url=p.get("image_url") or p.get("imageUrl") or p.get("image") or p.get("thumbnail"),
-                platform=p.get("platform"), uploaded_at=p.get("upload_time") or p.get("uploaded_at"),
-            ))
+        speed = _summarize_time_to_sell(tts)
+        if speed:
+            text = f"{text}\n{speed}."
 
     # ---- 제품_추천: 카드 중심 ----
     elif intent == "제품_추천":
         key = merged.get("model") or ctx.keyword or ""
-        params = {
-            "keyword": key,
-            "platform": ",".join(ctx.platforms),
-            "sort": {"latest": "newest", "price_asc": "low", "price_desc": "high"}[ctx.sort],
-            "minPrice": ctx.minPrice, "maxPrice": ctx.maxPrice, "page": ctx.page, "limit": ctx.limit,
-        }
-        items = await _call_products({k: v for k, v in params.items() if v not in (None, "", [])})
-        for p in items[:5]:
-            cards.append(Card(
-                title=str(p.get("title","")), price=str(p.get("price","")),
-                url=p.get("url") or p.get("link"),
-                image_url=p.get("image_url") or p.get("imageUrl") or p.get("image") or p.get("thumbnail"),
-                platform=p.get("platform"), uploaded_at=p.get("upload_time") or p.get("uploaded_at"),
-            ))
+        items = await _call_products(_products_params(key, ctx, page=ctx.page, limit=ctx.limit))
+        cards = [_to_card(p) for p in items[:5]]
+        yield "cards", cards
         text = ""  # 카드만
 
     # ---- 일반/기타: 안내만 ----
     else:
         text = "원하시는 기능을 선택하세요: 제품_추천 / 시세_분석 / 가격_추천"
 
+    if text:
+        yield "text", {"text": text}
+
     # 3) 메모리(프론트가 재사용)
     memory = {"last_ctx": {
         "keyword": merged.get("model") or ctx.keyword,
@@ -288,4 +354,29 @@ async def chat(req: ChatRequest):
         "minPrice": ctx.minPrice, "maxPrice": ctx.maxPrice, "page": ctx.page, "limit": ctx.limit,
     }, "last_intent": intent}
 
-    return ChatResponse(text=text, cards=cards, memory=memory, trend=trend)
+    yield "done", ChatResponse(text=text, cards=cards, memory=memory, trend=trend)
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
+    response = ChatResponse(text="")
+    async for event, data in _chat_events(req):
+        if event == "done":
+            response = data
+    return response
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """/chat과 같은 처리를 Server-Sent Events로 단계별 전송."""
+    async def event_source():
+        try:
+            async for event, data in _chat_events(req):
+                yield _sse(event, data)
+        except Exception as e:
+            log.warning("chat stream 실패: %s", e)
+            yield _sse("error", {"message": str(e)})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
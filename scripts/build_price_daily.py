@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+Materialize daily price aggregates of market2.products into `price_daily`.
+
+Each bucket is keyed by (model_name, storage, condition_group, platform, day)
+and keeps the parsed integer prices plus count / sum / mean / trimmed mean /
+median / percentiles computed with NumPy, so trend queries become index
+lookups instead of rescanning raw listings.
+
+Incremental by default: only products without the `price_daily_at` marker are
+merged into their buckets. Each aggregated product records what it added in
+`price_daily_bucket` (bucket key + price). Writers that change a product's
+price, condition, model_name or storage unset the marker (crawler upserts,
+recheck_listings, the enrichment worker, update_condition, parse_model_storage).
+The next run then takes the old price out of the recorded bucket and adds the
+current one, so buckets follow the products instead of keeping the first
+values seen. Products are read, merged and marked one batch at a time; the
+marker is only set if the product still holds the values that were read, so a
+change made during the run is picked up by a later batch. `--rebuild` clears the buckets and markers and aggregates
+everything again; run it once for products aggregated before
+`price_daily_bucket` existed.
+
+Titles excluded from the raw price trend API are excluded here too, so both
+paths answer alike: accessories/trades (EXCLUDED_TITLE_PATTERN), and mini/pro
+listings under a base iPhone model.
+
+The API only answers from the buckets for a model with no unmarked products
+left, i.e. when every change has been merged.
+
+Usage:
+    python build_price_daily.py --mongodb-uri mongodb://localhost:27017 \
+        --database market2 --collection products
+    python build_price_daily.py --query galaxy_s24 --storage 256g --days 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from pymongo import ASCENDING, DeleteOne, MongoClient, ReplaceOne, UpdateOne
+from pymongo.collection import Collection
+
+from preprocess_products import parse_price
+from remove_duplicate_spam import KST, parse_upload_time
+
+# the marker names are shared with the crawler-side writers (db_utils)
+CRAWLER_DIR = Path(__file__).resolve().parent.parent / "crawler"
+sys.path.insert(0, str(CRAWLER_DIR))
+
+# price_daily_at: aggregated; price_daily_bucket: bucket key fields + price it added (None = nothing)
+from db_utils import PRICE_DAILY_BUCKET as CONTRIBUTION_FIELD  # noqa: E402
+from db_utils import PRICE_DAILY_MARKER as MARKER_FIELD  # noqa: E402
+
+DAILY_COLLECTION = "price_daily"
+CONDITION_GROUPS = {
+    "새 상품": "S",
+    "사용감 없음": "S",
+    "사용감 적음": "A",
+    "사용감 많음": "B",
+    "고장/파손 상품": "C",
+}
+OTHER_GROUP = "기타"
+EXCLUDED_TITLE_PATTERN = re.compile(r"케이스|교환|구합니다", re.IGNORECASE)
+# productController.getPriceTrend: a base iPhone query leaves out mini/pro titles
+IPHONE_VARIANT_PATTERN = re.compile(r"미니|mini|프로|pro|프로맥스|promax", re.IGNORECASE)
+TRIM_FRACTION = 0.1
+PERCENTILES = (10, 25, 50, 75, 90)
+# product fields that decide its bucket and price; mark_aggregated re-checks them
+STATE_FIELDS = (
+    "model_name", "storage", "condition", "platform", "title",
+    "price", "price_int", "upload_time", "uploaded_at",
+)
+UNMARKED_QUERY = {
+    MARKER_FIELD: {"$exists": False},
+    # a product whose model_name was cleared still has to leave its old bucket
+    "$or": [
+        {"model_name": {"$nin": [None, ""]}},
+        {CONTRIBUTION_FIELD: {"$type": "object"}},
+    ],
+}
+UNMARKED_PROJECTION = {"_id": 1, CONTRIBUTION_FIELD: 1, **dict.fromkeys(STATE_FIELDS, 1)}
+
+BucketKey = Tuple[str, Any, str, str, str]
+KEY_FIELDS = ("model_name", "storage", "condition_group", "platform", "day")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build daily price aggregates (price_daily) from products."
+    )
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop existing buckets and aggregate every product again.",
+    )
+    parser.add_argument(
+        "--query",
+        metavar="MODEL_NAME",
+        help="Print the stored trend for a canonical model instead of building.",
+    )
+    parser.add_argument("--storage", help="Storage filter for --query (e.g. 256g).")
+    parser.add_argument("--days", type=int, default=7, help="Window for --query.")
+    return parser.parse_args()
+
+
+def condition_group(value: Any) -> str:
+    if isinstance(value, str):
+        return CONDITION_GROUPS.get(value.strip(), OTHER_GROUP)
+    return OTHER_GROUP
+
+
+def excluded_title(model_name: str, title: str) -> bool:
+    if EXCLUDED_TITLE_PATTERN.search(title):
+        return True
+    return (
+        model_name.startswith("iphone")
+        and not IPHONE_VARIANT_PATTERN.search(model_name)
+        and bool(IPHONE_VARIANT_PATTERN.search(title))
+    )
+
+
+def bucket_key(doc: Dict[str, Any]) -> BucketKey | None:
+    model_name = doc.get("model_name")
+    if not model_name:
+        return None
+    title = doc.get("title") if isinstance(doc.get("title"), str) else ""
+    if excluded_title(model_name, title):
+        return None
+    uploaded = parse_upload_time(doc.get("uploaded_at") or doc.get("upload_time"))
+    if not uploaded:
+        return None
+    platform = doc.get("platform").strip() if isinstance(doc.get("platform"), str) else ""
+    return (
+        model_name,
+        doc.get("storage"),
+        condition_group(doc.get("condition")),
+        platform or OTHER_GROUP,
+        uploaded.strftime("%Y-%m-%d"),
+    )
+
+
+def doc_price(doc: Dict[str, Any]) -> int | None:
+    price = doc.get("price_int")
+    if not isinstance(price, int):
+        price = parse_price(doc.get("price"))
+    if price is None or price <= 0:
+        return None
+    return price
+
+
+def compute_stats(prices: Sequence[int]) -> Dict[str, int]:
+    """Summary statistics for one bucket (prices in won, rounded to int)."""
+    arr = np.sort(np.asarray(prices, dtype=np.int64))
+    n = int(arr.size)
+    cut = int(n * TRIM_FRACTION)
+    trimmed = arr if cut * 2 >= n else arr[cut : n - cut]
+    p10, p25, p50, p75, p90 = np.percentile(arr, PERCENTILES)
+    return {
+        "count": n,
+        "sum": int(arr.sum()),
+        "min": int(arr[0]),
+        "max": int(arr[-1]),
+        "mean": int(round(float(arr.mean()))),
+        "trimmed_mean": int(round(float(trimmed.mean()))),
+        "median": int(round(float(p50))),
+        "p10": int(round(float(p10))),
+        "p25": int(round(float(p25))),
+        "p75": int(round(float(p75))),
+        "p90": int(round(float(p90))),
+    }
+
+
+def key_filter(key: BucketKey) -> Dict[str, Any]:
+    return dict(zip(KEY_FIELDS, key))
+
+
+def ensure_daily_indexes(daily: Collection) -> None:
+    daily.create_index(
+        [
+            ("model_name", ASCENDING),
+            ("storage", ASCENDING),
+            ("day", ASCENDING),
+            ("condition_group", ASCENDING),
+            ("platform", ASCENDING),
+        ],
+        unique=True,
+        name="price_daily_key",
+    )
+
+
+def collect_new_prices(
+    docs: Iterable[Dict[str, Any]],
+) -> Tuple[Dict[BucketKey, List[int]], Dict[BucketKey, List[int]], List[Tuple[Dict[str, Any], Any]]]:
+    """Prices to add and to remove per bucket for one batch of unmarked products.
+
+    Also returns (doc, contribution) per product for mark_aggregated.
+    """
+    added: Dict[BucketKey, List[int]] = {}
+    removed: Dict[BucketKey, List[int]] = {}
+    contributions: List[Tuple[Dict[str, Any], Any]] = []
+    for doc in docs:
+        previous = doc.get(CONTRIBUTION_FIELD)
+        if isinstance(previous, dict):
+            old_key = tuple(previous.get(f) for f in KEY_FIELDS)
+            removed.setdefault(old_key, []).append(previous["price"])
+        key = bucket_key(doc)
+        price = doc_price(doc)
+        contribution = None
+        if key and price:
+            added.setdefault(key, []).append(price)
+            contribution = dict(key_filter(key), price=price)
+        contributions.append((doc, contribution))
+    return added, removed, contributions
+
+
+def mark_aggregated(products: Collection, contributions: List[Tuple[Dict[str, Any], Any]]) -> int:
+    """Record what each product now adds to the buckets; mark those that did not change meanwhile.
+
+    The contribution always matches the buckets just written, so it is stored
+    unconditionally. The marker is only set while the product still has the
+    values that were read: a writer that changed it in between has unset the
+    marker, and the product stays unmarked for the next batch. Returns the
+    number of products marked.
+    """
+    if not contributions:
+        return 0
+    products.bulk_write(
+        [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {CONTRIBUTION_FIELD: contribution}})
+            for doc, contribution in contributions
+        ],
+        ordered=False,
+    )
+    now = datetime.now(KST)
+    result = products.bulk_write(
+        [
+            UpdateOne(
+                {
+                    "_id": doc["_id"],
+                    MARKER_FIELD: {"$exists": False},
+                    **{field: doc.get(field) for field in STATE_FIELDS},
+                },
+                {"$set": {MARKER_FIELD: now}},
+            )
+            for doc, _ in contributions
+        ],
+        ordered=False,
+    )
+    return result.modified_count
+
+
+def merge_buckets(
+    daily: Collection,
+    added: Dict[BucketKey, List[int]],
+    batch_size: int,
+    removed: Dict[BucketKey, List[int]] | None = None,
+) -> int:
+    removed = removed or {}
+    keys = list(dict.fromkeys([*added, *removed]))
+    written = 0
+    for i in range(0, len(keys), batch_size):
+        chunk = keys[i : i + batch_size]
+        existing: Dict[BucketKey, List[int]] = {}
+        projection = {"prices": 1, **dict.fromkeys(KEY_FIELDS, 1)}
+        for doc in daily.find({"$or": [key_filter(k) for k in chunk]}, projection):
+            existing[tuple(doc.get(f) for f in KEY_FIELDS)] = doc.get("prices") or []
+
+        operations: List[ReplaceOne | DeleteOne] = []
+        now = datetime.now(KST)
+        for key in chunk:
+            counts = Counter(existing.get(key, []))
+            counts.subtract(removed.get(key, []))
+            counts.update(added.get(key, []))
+            prices = sorted(counts.elements())
+            if not prices:
+                operations.append(DeleteOne(key_filter(key)))
+                continue
+            bucket = key_filter(key)
+            bucket.update(compute_stats(prices))
+            bucket["prices"] = prices
+            bucket["updated_at"] = now
+            operations.append(ReplaceOne(key_filter(key), bucket, upsert=True))
+        if operations:
+            result = daily.bulk_write(operations, ordered=False)
+            written += result.upserted_count + result.modified_count + result.deleted_count
+    return written
+
+
+def build(
+    mongo_uri: str,
+    database: str,
+    collection_name: str,
+    batch_size: int = 1000,
+    rebuild: bool = False,
+) -> Dict[str, int]:
+    client = MongoClient(mongo_uri)
+    db = client[database]
+    products = db[collection_name]
+    daily = db[DAILY_COLLECTION]
+    ensure_daily_indexes(daily)
+
+    if rebuild:
+        daily.delete_many({})
+        products.update_many(
+            {"$or": [{MARKER_FIELD: {"$exists": True}}, {CONTRIBUTION_FIELD: {"$exists": True}}]},
+            {"$unset": {MARKER_FIELD: "", CONTRIBUTION_FIELD: ""}},
+        )
+
+    stats = {"scanned": 0, "prices": 0, "replaced": 0, "buckets": 0, "requeued": 0}
+    while True:
+        docs = list(products.find(UNMARKED_QUERY, UNMARKED_PROJECTION).limit(batch_size))
+        if not docs:
+            break
+        added, removed, contributions = collect_new_prices(docs)
+        stats["buckets"] += merge_buckets(daily, added, batch_size, removed)
+        # Mark only after the buckets are written so a failed run is retried next time.
+        marked = mark_aggregated(products, contributions)
+        stats["scanned"] += len(docs)
+        stats["prices"] += sum(len(v) for v in added.values())
+        stats["replaced"] += sum(len(v) for v in removed.values())
+        stats["requeued"] += len(docs) - marked
+        if not marked:
+            # every product in the batch changed again while it was merged; leave them to the next run
+            break
+    client.close()
+    return stats
+
+
+def load_trend(
+    daily: Collection,
+    model_name: str,
+    storage: str | None = None,
+    days: int = 7,
+    end: datetime | None = None,
+    condition_groups: Iterable[str] | None = None,
+    platforms: Iterable[str] | None = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+    """Return {platform: {day: {condition_group: stats}}} for the window ending at `end`."""
+    end_day = (end or datetime.now(KST)).astimezone(KST).date()
+    start_day = end_day - timedelta(days=max(days, 1) - 1)
+    query: Dict[str, Any] = {
+        "model_name": model_name,
+        "day": {"$gte": start_day.isoformat(), "$lte": end_day.isoformat()},
+    }
+    if storage:
+        query["storage"] = storage
+    if condition_groups:
+        query["condition_group"] = {"$in": list(condition_groups)}
+    if platforms:
+        query["platform"] = {"$in": list(platforms)}
+
+    trend: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+    for doc in daily.find(query, {"_id": 0, "prices": 0, "updated_at": 0}):
+        stats = {k: v for k, v in doc.items() if k not in KEY_FIELDS}
+        trend.setdefault(doc["platform"], {}).setdefault(doc["day"], {})[doc["condition_group"]] = stats
+    return trend
+
+
+def main() -> None:
+    args = parse_args()
+    if args.query:
+        client = MongoClient(args.mongodb_uri)
+        trend = load_trend(
+            client[args.database][DAILY_COLLECTION],
+            args.query,
+            storage=args.storage,
+            days=args.days,
+        )
+        print(json.dumps(trend, ensure_ascii=False, indent=2))
+        client.close()
+        return
+
+    stats = build(
+        mongo_uri=args.mongodb_uri,
+        database=args.database,
+        collection_name=args.collection,
+        batch_size=args.batch_size,
+        rebuild=args.rebuild,
+    )
+    print(
+        "price_daily build complete. "
+        f"Scanned: {stats['scanned']}, prices: {stats['prices']} "
+        f"({stats['replaced']} replaced), buckets written: {stats['buckets']}, "
+        f"changed during the run: {stats['requeued']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
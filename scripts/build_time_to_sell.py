@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Infer sale events and materialize time-to-sell statistics into `time_to_sell`.
+
+A listing counts as sold at the first of:
+    * `sold_at`      status turned 판매완료 (recheck_listings.py)
+    * `delisted_at`  the listing disappeared (recheck_listings.py); counted as a sale
+    * the first 판매완료 point in `price_history` after an on-sale observation
+
+Listings still on sale are right-censored at their last observation
+(`rechecked_at` or the latest `price_history` point), so the sell-through
+probabilities are Kaplan-Meier estimates rather than averages over sold
+listings only. Listings first seen already sold carry no timing and are skipped.
+
+One document per (model_name, storage, condition_group, platform) holds the
+distribution (median / quartiles in days, P(sold within N days)) overall and
+per price band relative to the bucket's median asking price, so the API and
+the gateway read a single indexed document per question.
+
+Usage:
+    python build_time_to_sell.py --mongodb-uri mongodb://localhost:27017 \
+        --database market2 --collection products
+    python build_time_to_sell.py --query galaxy_s24 --storage 256g
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from pymongo import ASCENDING, MongoClient, ReplaceOne
+from pymongo.collection import Collection
+
+from build_price_daily import EXCLUDED_TITLE_PATTERN, OTHER_GROUP, condition_group, doc_price
+from remove_duplicate_spam import KST, parse_upload_time
+
+TIME_TO_SELL_COLLECTION = "time_to_sell"
+PRICE_HISTORY_COLLECTION = "price_history"
+SOLD = "판매완료"
+ON_SALE = ("판매중", "예약중")
+HORIZONS = (1, 3, 7, 14, 30)
+MAX_DAYS = 365
+# asking price / bucket median price
+BAND_EDGES = (0.95, 1.05)
+BAND_NAMES = ("below", "at", "above")
+MIN_BAND_LISTINGS = 5
+
+KEY_FIELDS = ("model_name", "storage", "condition_group", "platform")
+BucketKey = Tuple[str, Any, str, str]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build time-to-sell statistics (time_to_sell) from products."
+    )
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--query",
+        metavar="MODEL_NAME",
+        help="Print the stored statistics for a canonical model instead of building.",
+    )
+    parser.add_argument("--storage", help="Storage filter for --query (e.g. 256g).")
+    return parser.parse_args()
+
+
+def history_marks(history: Collection) -> Dict[str, Dict[str, datetime]]:
+    """Per url: first on-sale / first sold / last observation from price_history."""
+    pipeline = [
+        {
+            "$group": {
+                "_id": "$url",
+                "first_on_sale": {
+                    "$min": {"$cond": [{"$in": ["$status", list(ON_SALE)]}, "$observed_at", None]}
+                },
+                "first_sold": {
+                    "$min": {"$cond": [{"$eq": ["$status", SOLD]}, "$observed_at", None]}
+                },
+                "last_seen": {"$max": "$observed_at"},
+            }
+        }
+    ]
+    return {row["_id"]: row for row in history.aggregate(pipeline, allowDiskUse=True)}
+
+
+def listing_outcome(
+    doc: Dict[str, Any], marks: Dict[str, Any] | None
+) -> Tuple[datetime, bool, bool] | None:
+    """(end time, sold, inferred from disappearance) or None when timing is unknown."""
+    marks = marks or {}
+    sold_at = parse_upload_time(doc.get("sold_at"))
+    if sold_at:
+        return sold_at, True, False
+    delisted_at = parse_upload_time(doc.get("delisted_at"))
+    if delisted_at:
+        return delisted_at, True, True
+    if doc.get("status") == SOLD:
+        first_sold = parse_upload_time(marks.get("first_sold"))
+        first_on_sale = parse_upload_time(marks.get("first_on_sale"))
+        if first_sold and first_on_sale and first_on_sale < first_sold:
+            return first_sold, True, False
+        return None
+    last_seen = [
+        value for value in (parse_upload_time(doc.get("rechecked_at")),
+                            parse_upload_time(marks.get("last_seen")))
+        if value
+    ]
+    return (max(last_seen), False, False) if last_seen else None
+
+
+def collect_listings(
+    products: Collection, history: Collection, batch_size: int
+) -> Tuple[List[BucketKey], np.ndarray, np.ndarray, np.ndarray, int]:
+    """Bucket keys with parallel arrays of days / sold flags / asking prices."""
+    marks = history_marks(history)
+    query = {"model_name": {"$nin": [None, ""]}}
+    projection = {
+        "url": 1, "model_name": 1, "storage": 1, "condition": 1, "platform": 1, "title": 1,
+        "price": 1, "price_int": 1, "status": 1, "upload_time": 1, "uploaded_at": 1,
+        "sold_at": 1, "delisted_at": 1, "rechecked_at": 1,
+    }
+    keys: List[BucketKey] = []
+    days: List[float] = []
+    sold: List[bool] = []
+    prices: List[float] = []
+    inferred = 0
+    cursor = products.find(query, projection, no_cursor_timeout=True).batch_size(batch_size)
+    try:
+        for doc in cursor:
+            title = doc.get("title") if isinstance(doc.get("title"), str) else ""
+            if EXCLUDED_TITLE_PATTERN.search(title):
+                continue
+            uploaded = parse_upload_time(doc.get("uploaded_at") or doc.get("upload_time"))
+            outcome = listing_outcome(doc, marks.get(doc.get("url")))
+            if not uploaded or not outcome:
+                continue
+            end, is_sold, from_delisting = outcome
+            elapsed = (end - uploaded).total_seconds() / 86400
+            if elapsed < 0 or elapsed > MAX_DAYS:
+                continue
+            platform = doc.get("platform").strip() if isinstance(doc.get("platform"), str) else ""
+            keys.append((
+                doc["model_name"],
+                doc.get("storage"),
+                condition_group(doc.get("condition")),
+                platform or OTHER_GROUP,
+            ))
+            days.append(elapsed)
+            sold.append(is_sold)
+            prices.append(doc_price(doc) or np.nan)
+            inferred += from_delisting
+    finally:
+        cursor.close()
+    return (
+        keys,
+        np.asarray(days, dtype=np.float64),
+        np.asarray(sold, dtype=bool),
+        np.asarray(prices, dtype=np.float64),
+        inferred,
+    )
+
+
+def kaplan_meier(days: np.ndarray, sold: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Event times and the survival (still unsold) probability right after each."""
+    order = np.argsort(days, kind="stable")
+    t, e = days[order], sold[order].astype(np.int64)
+    times, first = np.unique(t, return_index=True)
+    events = np.add.reduceat(e, first)
+    at_risk = t.size - first
+    return times, np.cumprod(1.0 - events / at_risk)
+
+
+def distribution(days: np.ndarray, sold: np.ndarray) -> Dict[str, Any]:
+    """Summary for one group of listings (days since upload, sold flags)."""
+    times, survival = kaplan_meier(days, sold)
+    pos = np.searchsorted(times, HORIZONS, side="right") - 1
+    within = np.where(pos >= 0, 1.0 - survival[np.clip(pos, 0, None)], 0.0)
+    crossed = np.nonzero(survival <= 0.5)[0]
+    sold_days = days[sold]
+    stats: Dict[str, Any] = {
+        "listings": int(days.size),
+        "sold": int(sold_days.size),
+        "open": int(days.size - sold_days.size),
+        "median_days": round(float(times[crossed[0]]), 2) if crossed.size else None,
+        "sell_within": {str(h): round(float(p), 3) for h, p in zip(HORIZONS, within)},
+    }
+    if sold_days.size:
+        p25, p50, p75 = np.percentile(sold_days, (25, 50, 75))
+        stats.update({
+            "sold_p25_days": round(float(p25), 2),
+            "sold_median_days": round(float(p50), 2),
+            "sold_p75_days": round(float(p75), 2),
+            "sold_mean_days": round(float(sold_days.mean()), 2),
+        })
+    return stats
+
+
+def bucket_stats(days: np.ndarray, sold: np.ndarray, prices: np.ndarray) -> Dict[str, Any]:
+    stats = distribution(days, sold)
+    priced = ~np.isnan(prices)
+    if not priced.any():
+        return stats
+    median_price = float(np.median(prices[priced]))
+    stats["median_price"] = int(round(median_price))
+    band_index = np.digitize(prices[priced] / median_price, BAND_EDGES)
+    bands = {}
+    for index, name in enumerate(BAND_NAMES):
+        members = band_index == index
+        if members.sum() >= MIN_BAND_LISTINGS:
+            bands[name] = distribution(days[priced][members], sold[priced][members])
+    stats["bands"] = bands
+    return stats
+
+
+def bucket_index(keys: List[BucketKey], unique_keys: List[BucketKey]) -> np.ndarray:
+    index = {key: i for i, key in enumerate(unique_keys)}
+    return np.fromiter((index[k] for k in keys), dtype=np.int64, count=len(keys))
+
+
+def ensure_indexes(collection: Collection) -> None:
+    collection.create_index(
+        [(field, ASCENDING) for field in KEY_FIELDS], unique=True, name="time_to_sell_key"
+    )
+
+
+def build(
+    mongo_uri: str, database: str, collection_name: str, batch_size: int = 1000
+) -> Dict[str, int]:
+    client = MongoClient(mongo_uri)
+    db = client[database]
+    target = db[TIME_TO_SELL_COLLECTION]
+    ensure_indexes(target)
+
+    keys, days, sold, prices, inferred = collect_listings(
+        db[collection_name], db[PRICE_HISTORY_COLLECTION], batch_size
+    )
+    started = datetime.now(KST)
+    operations: List[ReplaceOne] = []
+    written = 0
+    if keys:
+        # group rows by bucket once: indices sorted by bucket id, split at boundaries
+        unique_keys = list(dict.fromkeys(keys))
+        bucket_ids = bucket_index(keys, unique_keys)
+        order = np.argsort(bucket_ids, kind="stable")
+        boundaries = np.flatnonzero(np.diff(bucket_ids[order])) + 1
+        for rows in np.split(order, boundaries):
+            group_sold = sold[rows]
+            if not group_sold.any():
+                continue
+            key = unique_keys[bucket_ids[rows[0]]]
+            doc = dict(zip(KEY_FIELDS, key))
+            doc.update(bucket_stats(days[rows], group_sold, prices[rows]))
+            doc["updated_at"] = started
+            operations.append(ReplaceOne(dict(zip(KEY_FIELDS, key)), doc, upsert=True))
+            if len(operations) >= batch_size:
+                written += target.bulk_write(operations, ordered=False).upserted_count
+                operations = []
+        if operations:
+            written += target.bulk_write(operations, ordered=False).upserted_count
+    # buckets not refreshed in this run no longer have any sold listing
+    removed = target.delete_many({"updated_at": {"$lt": started}}).deleted_count
+    client.close()
+    return {
+        "listings": len(keys),
+        "sold": int(sold.sum()),
+        "inferred": inferred,
+        "new_buckets": written,
+        "removed": removed,
+    }
+
+
+def load_stats(
+    collection: Collection, model_name: str, storage: str | None = None
+) -> List[Dict[str, Any]]:
+    query: Dict[str, Any] = {"model_name": model_name}
+    if storage:
+        query["storage"] = storage
+    return list(collection.find(query, {"_id": 0, "updated_at": 0}))
+
+
+def main() -> None:
+    args = parse_args()
+    if args.query:
+        client = MongoClient(args.mongodb_uri)
+        stats = load_stats(client[args.database][TIME_TO_SELL_COLLECTION], args.query, args.storage)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        client.close()
+        return
+
+    stats = build(
+        mongo_uri=args.mongodb_uri,
+        database=args.database,
+        collection_name=args.collection,
+        batch_size=args.batch_size,
+    )
+    print(
+        "time_to_sell build complete. "
+        f"Listings: {stats['listings']}, sold: {stats['sold']} "
+        f"({stats['inferred']} inferred from delisting), "
+        f"new buckets: {stats['new_buckets']}, removed: {stats['removed']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Follow-up job queue written by enrichment_worker.py.
+
+Each job is one document in `enrichment_jobs`:
+    {product_id, kind, status: "pending" | "done" | "failed" | "skipped", created_at, finished_at}
+Batch scripts can consume a kind with `--from-queue` instead of scanning the
+whole products collection. Jobs whose product no longer matches the script's
+own query (deleted, or already filled in by another run) are marked "skipped"
+so they do not stay pending.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable, List
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+JOBS_COLLECTION = "enrichment_jobs"
+
+
+def ensure_job_indexes(db: Database) -> None:
+    jobs = db[JOBS_COLLECTION]
+    jobs.create_index([("product_id", 1), ("kind", 1)], unique=True)
+    jobs.create_index([("kind", 1), ("status", 1)])
+
+
+def enqueue(db: Database, product_id: Any, kinds: Iterable[str]) -> int:
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"product_id": product_id, "kind": kind},
+            {"$setOnInsert": {"status": "pending", "created_at": now}},
+            upsert=True,
+        )
+        for kind in kinds
+    ]
+    if not operations:
+        return 0
+    return db[JOBS_COLLECTION].bulk_write(operations, ordered=False).upserted_count
+
+
+def pending_product_ids(db: Database, kind: str, limit: int = 0) -> List[Any]:
+    cursor = db[JOBS_COLLECTION].find(
+        {"kind": kind, "status": "pending"}, {"product_id": 1}
+    ).sort("created_at", 1)
+    if limit and limit > 0:
+        cursor = cursor.limit(limit)
+    return [job["product_id"] for job in cursor]
+
+
+def skip_unmatched(db: Database, kind: str, queued_ids: Iterable[Any], matched_ids: Iterable[Any]) -> int:
+    """Mark queued jobs whose product is not in matched_ids as skipped."""
+    matched = set(matched_ids)
+    return finish_jobs(
+        db, kind, [product_id for product_id in queued_ids if product_id not in matched], "skipped"
+    )
+
+
+def finish_jobs(db: Database, kind: str, product_ids: Iterable[Any], status: str = "done") -> int:
+    ids = list(product_ids)
+    if not ids:
+        return 0
+    result = db[JOBS_COLLECTION].update_many(
+        {"kind": kind, "product_id": {"$in": ids}},
+        {"$set": {"status": status, "finished_at": datetime.now(timezone.utc)}},
+    )
+    return result.modified_count
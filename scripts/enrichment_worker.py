@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Long-running enrichment worker for newly inserted market2.products listings.
+
+Pipeline per listing (the same rules the batch scripts apply):
+    1. title_normalization   (normalize_titles.normalize_title)
+    2. model_name / storage  (parse_model_storage.parse_fields)
+    3. rule-based condition  (update_condition: 중고나라 "새상품" / title keywords)
+    4. queue follow-up jobs in `enrichment_jobs` (see enrichment_jobs.py):
+         - "llm_condition"        condition still outside the allowed set
+         - "joongna_description"  중고나라 listing without a description
+
+New listings are read from a MongoDB change stream. The resume token is stored
+in `worker_state`, so a restart continues where the previous run stopped.
+Standalone servers do not support change streams; the worker then polls for
+documents with a larger _id than the last one it handled.
+
+Usage:
+    python enrichment_worker.py --mongodb-uri mongodb://localhost:27017 \
+        --database market2 --collection products
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+
+from build_price_daily import MARKER_FIELD as PRICE_DAILY_MARKER
+from enrichment_jobs import enqueue, ensure_job_indexes
+from normalize_titles import normalize_title
+from parse_model_storage import build_matchers, parse_fields
+from update_condition import CONDITIONS, condition_has_new, title_has_new_keyword
+
+WORKER_ID = "enrichment_worker"
+STATE_COLLECTION = "worker_state"
+CHANGE_STREAM_UNSUPPORTED = 40573
+PROJECTION = {
+    "_id": 1,
+    "title": 1,
+    "description": 1,
+    "platform": 1,
+    "condition": 1,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Enrich newly inserted products from a change stream."
+    )
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument(
+        "--mode",
+        choices=("auto", "stream", "poll"),
+        default="auto",
+        help="auto = change stream, falling back to polling on standalone servers.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between polls in polling mode (default: 5)",
+    )
+    parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between lag/throughput reports (default: 60)",
+    )
+    parser.add_argument(
+        "--from-start",
+        action="store_true",
+        help="Without saved state, poll from the oldest document instead of now.",
+    )
+    return parser.parse_args()
+
+
+class LagStats:
+    """Processing lag (insert → enrichment) aggregated between reports."""
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.lag_sum = 0.0
+        self.lag_max = 0.0
+        self.jobs = 0
+        self.started = time.monotonic()
+
+    def record(self, lag_seconds: float, jobs: int) -> None:
+        self.total += 1
+        self.count += 1
+        self.lag_sum += lag_seconds
+        self.lag_max = max(self.lag_max, lag_seconds)
+        self.jobs += jobs
+
+    def report(self, mode: str) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        avg = self.lag_sum / self.count if self.count else 0.0
+        print(
+            f"[{WORKER_ID}:{mode}] enriched {self.count} in {elapsed:.0f}s "
+            f"({self.count / elapsed:.2f}/s), lag avg {avg:.1f}s max {self.lag_max:.1f}s, "
+            f"jobs queued {self.jobs}, total {self.total}"
+        )
+        self.reset()
+
+
+class EnrichmentWorker:
+    def __init__(self, collection: Collection, report_interval: float = 60.0) -> None:
+        self.collection = collection
+        self.db = collection.database
+        self.state = self.db[STATE_COLLECTION]
+        self.model_pairs, self.storage_pairs = build_matchers()
+        self.report_interval = report_interval
+        self.stats = LagStats()
+        self._last_report = time.monotonic()
+        ensure_job_indexes(self.db)
+
+    # ------------------------------------------------------------------
+    # enrichment
+    # ------------------------------------------------------------------
+    def enrich(self, doc: Dict[str, Any]) -> tuple[Dict[str, Any], List[str]]:
+        """Return the fields to $set and the follow-up job kinds to queue."""
+        title = doc.get("title") if isinstance(doc.get("title"), str) else ""
+        description = doc.get("description") if isinstance(doc.get("description"), str) else ""
+        platform = doc.get("platform")
+        condition = doc.get("condition")
+
+        normalized = normalize_title(title)
+        model_name, storage = parse_fields(
+            normalized, self.model_pairs, self.storage_pairs, (title, description)
+        )
+        updates: Dict[str, Any] = {
+            "title_normalization": normalized,
+            "model_name": model_name,
+            "storage": storage,
+        }
+
+        jobs: List[str] = []
+        if condition not in CONDITIONS:
+            if platform == "중고나라" and condition_has_new(condition):
+                updates["condition"] = "새 상품"
+            elif title_has_new_keyword(title):
+                updates["condition"] = "새 상품"
+            else:
+                jobs.append("llm_condition")
+        if platform == "중고나라" and not description:
+            jobs.append("joongna_description")
+        return updates, jobs
+
+    def handle(self, doc: Dict[str, Any], inserted_at: datetime) -> None:
+        updates, job_kinds = self.enrich(doc)
+        self.collection.update_one(
+            {"_id": doc["_id"]}, {"$set": updates, "$unset": {PRICE_DAILY_MARKER: ""}}
+        )
+
+        enqueue(self.db, doc["_id"], job_kinds)
+
+        lag = (datetime.now(timezone.utc) - inserted_at).total_seconds()
+        self.stats.record(max(lag, 0.0), len(job_kinds))
+
+    def maybe_report(self, mode: str) -> None:
+        if time.monotonic() - self._last_report >= self.report_interval:
+            self.stats.report(mode)
+            self._last_report = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # state
+    # ------------------------------------------------------------------
+    def load_state(self) -> Dict[str, Any]:
+        return self.state.find_one({"_id": WORKER_ID}) or {}
+
+    def save_state(self, **fields: Any) -> None:
+        fields["updated_at"] = datetime.now(timezone.utc)
+        self.state.update_one({"_id": WORKER_ID}, {"$set": fields}, upsert=True)
+
+    # ------------------------------------------------------------------
+    # sources
+    # ------------------------------------------------------------------
+    def run_change_stream(self) -> None:
+        resume_token = self.load_state().get("resume_token")
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        print(f"[{WORKER_ID}] change stream {'resumed' if resume_token else 'started'}")
+        with self.collection.watch(
+            pipeline, resume_after=resume_token, max_await_time_ms=1000
+        ) as stream:
+            while stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    # idle: still persist the post-batch token so restarts skip nothing
+                    if stream.resume_token is not None:
+                        self.save_state(resume_token=stream.resume_token)
+                    self.maybe_report("stream")
+                    continue
+                doc = {k: change["fullDocument"].get(k) for k in PROJECTION}
+                cluster_time = change.get("clusterTime")
+                inserted_at = (
+                    datetime.fromtimestamp(cluster_time.time, timezone.utc)
+                    if cluster_time
+                    else doc["_id"].generation_time
+                )
+                self.handle(doc, inserted_at)
+                self.save_state(resume_token=change["_id"], last_id=doc["_id"])
+                self.maybe_report("stream")
+
+    def run_polling(self, poll_interval: float, from_start: bool) -> None:
+        last_id = self.load_state().get("last_id")
+        if last_id is None and not from_start:
+            last_id = ObjectId.from_datetime(datetime.now(timezone.utc))
+        print(f"[{WORKER_ID}] polling every {poll_interval}s after _id {last_id}")
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            batch = list(self.collection.find(query, PROJECTION).sort("_id", 1).limit(500))
+            for doc in batch:
+                self.handle(doc, doc["_id"].generation_time)
+                last_id = doc["_id"]
+            if batch:
+                self.save_state(last_id=last_id)
+            self.maybe_report("poll")
+            if len(batch) < 500:
+                time.sleep(poll_interval)
+
+    def run(self, mode: str, poll_interval: float, from_start: bool) -> None:
+        if mode in ("auto", "stream"):
+            try:
+                self.run_change_stream()
+                return
+            except OperationFailure as exc:
+                if mode == "stream" or exc.code != CHANGE_STREAM_UNSUPPORTED:
+                    raise
+                print(f"[{WORKER_ID}] change streams unavailable ({exc.code}); polling instead")
+        self.run_polling(poll_interval, from_start)
+
+
+def main() -> None:
+    args = parse_args()
+    client = MongoClient(args.mongodb_uri)
+    worker = EnrichmentWorker(
+        client[args.database][args.collection], report_interval=args.report_interval
+    )
+    try:
+        worker.run(args.mode, args.poll_interval, args.from_start)
+    except KeyboardInterrupt:
+        print(f"[{WORKER_ID}] stopping")
+    except PyMongoError as exc:
+        print(f"[{WORKER_ID}] MongoDB error: {exc}")
+        raise
+    finally:
+        worker.stats.report("final")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
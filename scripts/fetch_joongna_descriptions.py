@@ -3,6 +3,8 @@ from __future__ import annotations
 
 import argparse
 import re
+import sys
+from pathlib import Path
 from typing import Any, Dict, List
 from urllib.parse import urlparse
 
@@ -11,6 +13,14 @@ from requests import RequestException
 from pymongo import MongoClient
 from pymongo.collection import Collection
 
+from enrichment_jobs import finish_jobs, pending_product_ids, skip_unmatched
+
+# retry (backoff / circuit breaker) lives next to the crawlers
+CRAWLER_DIR = Path(__file__).resolve().parent.parent / "crawler"
+sys.path.insert(0, str(CRAWLER_DIR))
+
+import retry  # noqa: E402
+
 BUILD_ID_PATTERN = re.compile(r"/main-web/_next/static/([^/]+)/_buildManifest\.js")
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -18,6 +28,9 @@ USER_AGENT = (
     "Chrome/129.0.0.0 Safari/537.36"
 )
 BASE_URL = "https://web.joongna.com"
+HOST = urlparse(BASE_URL).netloc
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+NOT_FOUND = "product not found (404)"
 
 
 def parse_args() -> argparse.Namespace:
@@ -55,6 +68,11 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Print a line for every processed document.",
     )
+    parser.add_argument(
+        "--from-queue",
+        action="store_true",
+        help="Only process pending joongna_description jobs from enrichment_worker.py.",
+    )
     return parser.parse_args()
 
 
@@ -88,69 +106,106 @@ def search_description(payload: Any) -> str | None:
     return None
 
 
+class FetchError(Exception):
+    """Permanent failure for one product; the message is reported as-is."""
+
+
+class TransientStatus(Exception):
+    """429/5xx from Joongna; retried with backoff."""
+
+    def __init__(self, status: int) -> None:
+        super().__init__(f"data fetch failed ({status})")
+        self.status = status
+
+
+class StaleBuildId(Exception):
+    """Cached Next.js build id returned 404; retried after the cache is dropped."""
+
+
 class DescriptionFetcher:
     def __init__(self) -> None:
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": USER_AGENT})
         self._build_id_cache: Dict[str, str] = {}
+        self.retrier = retry.retrier(
+            "joongna.description",
+            retry.policy_for(
+                "joongna",
+                retry_on=retry.TRANSIENT_EXCEPTIONS + (TransientStatus, StaleBuildId),
+            ),
+            platform="joongna",
+            # own breaker: a failing description run must not block the list crawler
+            breaker=retry.breaker_from_env(),
+        )
 
-    def _get(self, url: str, *, timeout: int = 10):
-        try:
-            response = self.session.get(url, timeout=timeout)
-        except RequestException as exc:
-            return None, f"request failed ({exc.__class__.__name__})"
-        return response, None
+    def _get(self, url: str, *, timeout: int = 10) -> requests.Response:
+        response = self.session.get(url, timeout=timeout)
+        if response.status_code in RETRYABLE_STATUS:
+            raise TransientStatus(response.status_code)
+        return response
 
-    def _refresh_build_id(self, product_id: str) -> tuple[str | None, str | None]:
-        page_url = f"{BASE_URL}/product/{product_id}"
-        response, error = self._get(page_url)
-        if error:
-            return None, error
+    def _refresh_build_id(self, product_id: str, page: requests.Response | None = None) -> str:
+        response = page if page is not None else self._get(f"{BASE_URL}/product/{product_id}")
         if response.status_code != 200:
-            return None, f"page status {response.status_code}"
+            raise FetchError(f"page status {response.status_code}")
         match = BUILD_ID_PATTERN.search(response.text)
         if not match:
-            return None, "build id not found in page"
+            raise FetchError("build id not found in page")
         build_id = match.group(1)
         self._build_id_cache[BASE_URL] = build_id
-        return build_id, None
+        return build_id
 
-    def _ensure_build_id(self, product_id: str) -> tuple[str | None, str | None]:
+    def _fetch_data(self, product_id: str) -> requests.Response:
         cached = self._build_id_cache.get(BASE_URL)
-        if cached:
-            return cached, None
-        return self._refresh_build_id(product_id)
-
-    def fetch(self, product_id: str) -> tuple[str | None, str | None]:
-        build_id, error = self._ensure_build_id(product_id)
-        if error or not build_id:
-            return None, error or "build id not found"
-
+        build_id = cached or self._refresh_build_id(product_id)
         data_url = (
             f"{BASE_URL}/main-web/_next/data/{build_id}/product/{product_id}.json"
         )
-        response, error = self._get(data_url)
-        if error:
-            return None, error
-        if response.status_code == 404:
-            build_id, error = self._refresh_build_id(product_id)
-            if error or not build_id:
-                return None, error or "build id refresh failed"
-            data_url = (
-                f"{BASE_URL}/main-web/_next/data/{build_id}/product/{product_id}.json"
-            )
-            response, error = self._get(data_url)
-            if error:
-                return None, error
+        response = self._get(data_url)
+        if response.status_code == 404 and cached:
+            # Either the product was deleted or a deploy retired the cached build id;
+            # the product page tells them apart.
+            page = self._get(f"{BASE_URL}/product/{product_id}")
+            if page.status_code == 404:
+                return response
+            if self._refresh_build_id(product_id, page) == build_id:
+                return response
+            # The next attempt uses the fresh build id cached above.
+            raise StaleBuildId(build_id)
+        return response
+
+    def fetch_payload(self, product_id: str) -> tuple[Any, str | None]:
+        """Return (product JSON, error); error is NOT_FOUND for deleted products.
+
+        Raises retry.CircuitOpenError when Joongna keeps failing.
+        """
+        try:
+            response = self.retrier.call(self._fetch_data, product_id, host=HOST)
+        except (FetchError, TransientStatus) as exc:
+            return None, str(exc)
+        except StaleBuildId:
+            return None, "build id refresh failed"
+        except retry.RetryExhausted:
+            return None, "retry budget exhausted"
+        except RequestException as exc:
+            return None, f"request failed ({exc.__class__.__name__})"
 
+        if response.status_code == 404:
+            return None, NOT_FOUND
         if response.status_code != 200:
             return None, f"data fetch failed ({response.status_code})"
 
         try:
-            payload = response.json()
+            return response.json(), None
         except ValueError:
             return None, "invalid json response"
 
+    def fetch(self, product_id: str) -> tuple[str | None, str | None]:
+        """Return (description, error). Raises retry.CircuitOpenError when Joongna keeps failing."""
+        payload, error = self.fetch_payload(product_id)
+        if error:
+            return None, error
+
         description = search_description(payload)
         if not description:
             return None, "description not found in payload"
@@ -172,6 +227,17 @@ def main() -> None:
             {"description": {"$exists": False}},
             {"description": ""},
         ]
+    if args.from_queue:
+        queued_ids = pending_product_ids(collection.database, "joongna_description", args.limit)
+        query["_id"] = {"$in": queued_ids}
+        # deleted, or given a description since the job was queued
+        skipped_jobs = skip_unmatched(
+            collection.database,
+            "joongna_description",
+            queued_ids,
+            collection.distinct("_id", query),
+        )
+        print(f"Skipped queued jobs: {skipped_jobs}")
 
     total_candidates = collection.count_documents(query)
     print(f"Query candidates: {total_candidates}")
@@ -187,6 +253,8 @@ def main() -> None:
     failure_count = 0
     failure_samples: List[str] = []
     failure_sample_limit = 20
+    done_ids: List[Any] = []
+    failed_ids: List[Any] = []
 
     try:
         for doc in cursor:
@@ -196,18 +264,27 @@ def main() -> None:
                 failure_count += 1
                 if len(failure_samples) < failure_sample_limit:
                     failure_samples.append(f"{doc.get('_id')} : invalid product url")
+                failed_ids.append(doc["_id"])
                 continue
 
-            description, error = fetcher.fetch(product_id)
+            try:
+                description, error = fetcher.fetch(product_id)
+            except retry.CircuitOpenError as exc:
+                # Leave the rest pending; rerun after Joongna recovers.
+                print(f"Stopping early: {exc}")
+                processed -= 1
+                break
             if error or not description:
                 failure_count += 1
                 if len(failure_samples) < failure_sample_limit:
                     failure_samples.append(f"{doc.get('_id')} : {error}")
+                failed_ids.append(doc["_id"])
                 continue
 
             result = collection.update_one(
                 {"_id": doc["_id"]}, {"$set": {"description": description}}
             )
+            done_ids.append(doc["_id"])
             if result.modified_count:
                 updated += 1
 
@@ -224,9 +301,15 @@ def main() -> None:
     finally:
         cursor.close()
 
+    if args.from_queue:
+        finish_jobs(collection.database, "joongna_description", done_ids)
+        finish_jobs(collection.database, "joongna_description", failed_ids, status="failed")
+
     print(f"Processed: {processed}")
     print(f"Updated: {updated}")
     print(f"Failures: {failure_count}")
+    stats = fetcher.retrier.stats
+    print(f"Retries: {stats.retries} ({stats.seconds:.1f}s spent retrying, gave up {stats.gave_up})")
     if failure_samples:
         print("Failure samples:")
         for entry in failure_samples:
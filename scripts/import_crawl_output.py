@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Re-import archived crawler output into market2.products without re-crawling.
+
+Accepts the JSON array files the crawlers used to write
+(`./output/*_result_*.json`) and JSON-lines output from jsonl_sink.py
+(`.jsonl`, `.jsonl.gz`, `.jsonl.zst`). Arrays are parsed incrementally with
+`json.JSONDecoder.raw_decode` over fixed-size chunks, so multi-GB files are
+never loaded whole.
+
+Every record goes through the same stages as live ingest + enrichment:
+    1. typing        price_int / uploaded_at (crawler/typed_fields.py)
+    2. normalization title_normalization, model_name, storage
+
+Writes go through the crawlers' ProductWriter (crawler/db_utils.py), i.e.
+batched unordered upserts keyed on `url` that also record price and status
+changes in `price_history`:
+    --mode insert  only add listings that are missing ($setOnInsert, default)
+    --mode update  also overwrite existing listings with the archived values
+
+A compressed file cut off by a crash keeps the records decoded before the cut.
+
+Usage:
+    python import_crawl_output.py ../crawler/output/*_result_*.json \
+        --mongodb-uri mongodb://localhost:27017 --database market2 --collection products
+    python import_crawl_output.py ../crawler/output/중고나라_*.jsonl.gz --mode update
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, TextIO
+
+from pymongo import MongoClient
+from pymongo.collection import Collection
+
+from normalize_titles import normalize_title
+from parse_model_storage import build_matchers, parse_fields
+
+# typed_fields / jsonl_sink live next to the crawlers
+CRAWLER_DIR = Path(__file__).resolve().parent.parent / "crawler"
+sys.path.insert(0, str(CRAWLER_DIR))
+
+from db_utils import ProductWriter  # noqa: E402
+from jsonl_sink import TRUNCATED_ERRORS, open_jsonl  # noqa: E402
+from typed_fields import apply_typed_fields  # noqa: E402
+
+CHUNK_SIZE = 1 << 16
+PLATFORM_FROM_NAME = re.compile(r"^(번개장터|중고나라|당근마켓)_")
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Import crawler JSON / JSON-lines output into products."
+    )
+    parser.add_argument("files", nargs="+", help="Files or glob patterns.")
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--mode", choices=("insert", "update"), default="insert")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Parse and transform only; print counts without writing.",
+    )
+    return parser.parse_args()
+
+
+def iter_json_array(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # skip separators
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,﻿":
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        if pos < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # a value that ends exactly at the buffer edge may be a truncated number
+                if end < len(buffer) or eof:
+                    yield item
+                    pos = end
+                    continue
+
+        if eof:
+            if started:
+                raise ValueError("unterminated JSON array")
+            return
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_records(path: str) -> Iterator[Any]:
+    if path.endswith(JSONL_SUFFIXES):
+        with open_jsonl(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None  # counted as rejected
+        return
+    with open(path, "r", encoding="utf-8-sig") as f:
+        yield from iter_json_array(f)
+
+
+class Transformer:
+    def __init__(self) -> None:
+        self.model_pairs, self.storage_pairs = build_matchers()
+
+    def __call__(self, record: Any, default_platform: str | None) -> Dict[str, Any] | None:
+        if not isinstance(record, dict):
+            return None
+        url = record.get("url")
+        title = record.get("title")
+        if not isinstance(url, str) or not url.startswith("http") or not isinstance(title, str):
+            return None
+
+        doc = dict(record)
+        doc.pop("_id", None)
+        doc.pop("task", None)
+        if not doc.get("platform") and default_platform:
+            doc["platform"] = default_platform
+        apply_typed_fields(doc)
+
+        normalized = normalize_title(title)
+        description = doc.get("description") if isinstance(doc.get("description"), str) else ""
+        model_name, storage = parse_fields(
+            normalized, self.model_pairs, self.storage_pairs, (title, description)
+        )
+        doc["title_normalization"] = normalized
+        doc["model_name"] = model_name
+        doc["storage"] = storage
+        return doc
+
+
+def flush(writer: ProductWriter, batches: Dict[str | None, List[Dict[str, Any]]],
+          platform: str | None, insert_only: bool, stats: Dict[str, int]) -> None:
+    batch = batches.pop(platform, None)
+    if not batch:
+        return
+    result = writer.write(batch, platform, insert_only=insert_only)
+    stats["inserted"] += result["inserted"]
+    stats["updated"] += result["modified"]
+    stats["unchanged"] += result["updated"] - result["modified"]
+    stats["rejected"] += result["failed"]
+
+
+def import_files(
+    paths: List[str],
+    collection: Collection | None,
+    batch_size: int = 1000,
+    mode: str = "insert",
+) -> Dict[str, int]:
+    transform = Transformer()
+    stats = {"read": 0, "inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0}
+    writer = ProductWriter(collection) if collection is not None else None
+    insert_only = mode == "insert"
+    # one batch per platform; None keeps records without a platform as they are
+    batches: Dict[str | None, List[Dict[str, Any]]] = {}
+    started = time.monotonic()
+
+    for path in paths:
+        match = PLATFORM_FROM_NAME.match(Path(path).name)
+        default_platform = match.group(1) if match else None
+        file_read = stats["read"]
+        try:
+            for record in iter_records(path):
+                stats["read"] += 1
+                doc = transform(record, default_platform)
+                if doc is None:
+                    stats["rejected"] += 1
+                    continue
+                if writer is None:
+                    continue
+                platform = doc.get("platform") if isinstance(doc.get("platform"), str) else None
+                batches.setdefault(platform, []).append(doc)
+                if len(batches[platform]) >= batch_size:
+                    flush(writer, batches, platform, insert_only, stats)
+        except ValueError as exc:
+            print(f"[import] {path}: stopped at record {stats['read'] - file_read + 1} ({exc})")
+        except TRUNCATED_ERRORS as exc:
+            print(f"[import] {path}: truncated after record {stats['read'] - file_read}, "
+                  f"keeping the records before it ({exc})")
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(
+            f"[import] {path}: {stats['read'] - file_read} records "
+            f"(total {stats['read']}, {stats['read'] / elapsed:.0f} rec/s)"
+        )
+
+    if writer is not None:
+        for platform in list(batches):
+            flush(writer, batches, platform, insert_only, stats)
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    return stats
+
+
+def main() -> None:
+    args = parse_args()
+    paths = sorted(p for pattern in args.files for p in (glob.glob(pattern) or [pattern]))
+
+    client = None if args.dry_run else MongoClient(args.mongodb_uri)
+    collection = None if client is None else client[args.database][args.collection]
+    stats = import_files(paths, collection, batch_size=args.batch_size, mode=args.mode)
+    if client is not None:
+        client.close()
+
+    rate = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"Import complete ({len(paths)} files, {stats['seconds']}s, {rate:.0f} rec/s). "
+        f"Read: {stats['read']}, inserted: {stats['inserted']}, updated: {stats['updated']}, "
+        f"unchanged: {stats['unchanged']}, rejected: {stats['rejected']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
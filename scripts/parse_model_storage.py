@@ -7,6 +7,7 @@ from typing import Dict, List, Sequence, Tuple
 
 from pymongo import MongoClient, UpdateOne
 
+from build_price_daily import MARKER_FIELD as PRICE_DAILY_MARKER
 from model_storage_synonyms import MODEL_SYNONYMS, STORAGE_SYNONYMS, sorted_model_keys_desc
 
 STORAGE_FALLBACK_PATTERNS = [
@@ -91,7 +92,7 @@ def process(
 
     cursor = collection.find(
         {},
-        {"_id": 1, "title_normalization": 1, "title": 1, "description": 1},
+        {"_id": 1, "title_normalization": 1, "title": 1, "description": 1, "model_name": 1, "storage": 1},
         no_cursor_timeout=True,
     ).batch_size(batch_size)
 
@@ -108,11 +109,15 @@ def process(
                 (doc.get("title", ""), doc.get("description", "")),
             )
 
+            if (doc.get("model_name"), doc.get("storage")) == (model_name, storage_name):
+                continue
             update = {
                 "$set": {
                     "model_name": model_name,
                     "storage": storage_name,
-                }
+                },
+                # build_price_daily moves the listing to its new bucket on the next run
+                "$unset": {PRICE_DAILY_MARKER: ""},
             }
             operations.append(UpdateOne({"_id": doc["_id"]}, update))
 
@@ -101,8 +101,10 @@ def preprocess(collection: Collection, limit: int = 0) -> Dict[str, int]:
                 stats["removed_title"] += 1
                 continue
 
-            # Step 3: price sanity check
-            price_value = parse_price(doc.get("price"))
+            # Step 3: price sanity check (typed price_int first, raw string as fallback)
+            price_value = doc.get("price_int")
+            if not isinstance(price_value, int):
+                price_value = parse_price(doc.get("price"))
             if (
                 price_value is None
                 or price_value <= PRICE_MIN
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Re-check saved listings for price and sale-status changes.
+
+Listings are due by age and volatility: young listings and listings whose
+price already moved are re-checked more often (see `recheck_interval`), and
+`recheck_due_at` on each product schedules the next visit. Listings never
+checked yet go first, newest upload first. Fetching is browserless:
+
+    중고나라  the `_next/data` product JSON (fetch_joongna_descriptions)
+    당근마켓  JSON-LD offers / product:* meta on the article page (daangn_detail)
+
+번개장터 has no browserless detail path yet and is not re-checked.
+
+Only changed values are written: `price`/`price_int` (with an entry appended
+to `price_history`), `status` (with `status_changed_at`, and `sold_at` for
+판매완료), or `delisted_at` when the listing is gone. Unchanged listings only
+get their next `recheck_due_at`. Price and status changes are also recorded
+in the `price_history` time-series collection (crawler/price_history.py).
+Requests per KST day are capped by --daily-budget, counted in the
+`recheck_budget` collection.
+
+Usage:
+    python recheck_listings.py --daily-budget 5000 --limit 500
+    python recheck_listings.py --platform 당근마켓 --dry-run --verbose
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+from build_price_daily import MARKER_FIELD as PRICE_DAILY_MARKER
+from fetch_joongna_descriptions import NOT_FOUND, DescriptionFetcher, extract_product_id
+from remove_duplicate_spam import KST
+
+# daangn_detail / price_history / retry / typed_fields live next to the crawlers
+CRAWLER_DIR = Path(__file__).resolve().parent.parent / "crawler"
+sys.path.insert(0, str(CRAWLER_DIR))
+
+import price_history  # noqa: E402
+import retry  # noqa: E402
+from daangn_detail import DaangnDetailFetcher  # noqa: E402
+from typed_fields import parse_uploaded_at  # noqa: E402
+
+BUDGET_COLLECTION = "recheck_budget"
+PLATFORMS = ("중고나라", "당근마켓")
+SOLD = "판매완료"
+# (listing age below, base interval)
+AGE_INTERVALS = (
+    (timedelta(days=3), timedelta(hours=12)),
+    (timedelta(days=14), timedelta(days=1)),
+    (timedelta(days=60), timedelta(days=3)),
+)
+OLD_INTERVAL = timedelta(days=7)
+MIN_INTERVAL = timedelta(hours=6)
+ERROR_INTERVAL = timedelta(hours=12)
+PRICE_HISTORY_LIMIT = 50
+BATCH_SIZE = 100
+
+# Joongna product JSON: keys read from the object that holds productDescription
+JOONGNA_PRICE_KEYS = ("productPrice", "price")
+JOONGNA_STATUS_KEYS = ("productSaleStatus", "saleStatus", "productStatus", "status", "state")
+JOONGNA_STATUS = {
+    "SALE": "판매중",
+    "ON_SALE": "판매중",
+    "판매중": "판매중",
+    "RESERVED": "예약중",
+    "RESERVATION": "예약중",
+    "예약중": "예약중",
+    "SOLD": SOLD,
+    "SOLD_OUT": SOLD,
+    "COMPLETE": SOLD,
+    "판매완료": SOLD,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Re-check saved listings for price and status changes."
+    )
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="market2")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument(
+        "--platform",
+        action="append",
+        choices=PLATFORMS,
+        default=[],
+        help="Platform to re-check (repeatable; default: all supported).",
+    )
+    parser.add_argument(
+        "--daily-budget",
+        type=int,
+        default=5000,
+        help="Maximum listing fetches per KST day across runs (default: 5000).",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="Maximum listings for this run (0 = up to the remaining budget).",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.5,
+        help="Seconds between requests (default: 0.5).",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Fetch and report, write nothing.")
+    parser.add_argument("--verbose", action="store_true", help="Print every change.")
+    return parser.parse_args()
+
+
+def recheck_interval(doc: Dict[str, Any], now: datetime) -> timedelta:
+    """Younger, reserved and frequently repriced listings come back sooner."""
+    uploaded_at = parse_uploaded_at(doc.get("uploaded_at") or doc.get("upload_time"))
+    age = now - uploaded_at if uploaded_at else OLD_INTERVAL * 10
+    interval = next((step for limit, step in AGE_INTERVALS if age < limit), OLD_INTERVAL)
+    interval /= 1 + min(int(doc.get("price_changes") or 0), 3)
+    if doc.get("status") == "예약중":
+        interval /= 2
+    return max(interval, MIN_INTERVAL)
+
+
+def _find_product(payload: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(payload, dict):
+        if "productDescription" in payload:
+            return payload
+        children = payload.values()
+    elif isinstance(payload, list):
+        children = payload
+    else:
+        return None
+    for value in children:
+        found = _find_product(value)
+        if found is not None:
+            return found
+    return None
+
+
+def parse_joongna_state(payload: Any) -> Dict[str, Any]:
+    """price_int / status from the product JSON; None for values not found or unknown."""
+    product = _find_product(payload) or {}
+    price = None
+    for key in JOONGNA_PRICE_KEYS:
+        value = product.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            price = int(value)
+            break
+        if isinstance(value, str) and value.replace(",", "").isdigit():
+            price = int(value.replace(",", ""))
+            break
+    status = None
+    for key in JOONGNA_STATUS_KEYS:
+        value = product.get(key)
+        if isinstance(value, str) and value.upper() in JOONGNA_STATUS:
+            status = JOONGNA_STATUS[value.upper()]
+            break
+    return {"price_int": price, "status": status}
+
+
+class ListingChecker:
+    def __init__(self) -> None:
+        self.joongna = DescriptionFetcher()
+        self.daangn = DaangnDetailFetcher(timeout=10)
+
+    def check(self, doc: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """(state, error); state has price_int / status, or gone=True."""
+        if doc.get("platform") == "중고나라":
+            product_id = extract_product_id(doc.get("url"))
+            if not product_id:
+                return None, "invalid product url"
+            payload, error = self.joongna.fetch_payload(product_id)
+            if error == NOT_FOUND:
+                return {"gone": True}, None
+            if error:
+                return None, error
+            state = parse_joongna_state(payload)
+            if state["price_int"] is None and state["status"] is None:
+                return None, "price/status not found in payload"
+            return state, None
+        return self.daangn.fetch_state(doc["url"])
+
+
+def build_update(
+    doc: Dict[str, Any], state: Dict[str, Any], now: datetime
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Update document for one listing and the names of the values that changed."""
+    changed: List[str] = []
+    set_fields: Dict[str, Any] = {"rechecked_at": now}
+    update: Dict[str, Any] = {"$set": set_fields}
+
+    if state.get("gone"):
+        set_fields["delisted_at"] = now
+        changed.append("delisted")
+        return update, changed
+
+    price = state.get("price_int")
+    if price is not None and price != doc.get("price_int"):
+        set_fields["price"] = f"{price:,}원"
+        set_fields["price_int"] = price
+        entries = []
+        if not doc.get("price_history") and doc.get("price_int") is not None:
+            # first change: keep the originally crawled price as the starting point
+            since = doc.get("rechecked_at") or parse_uploaded_at(doc.get("uploaded_at"))
+            entries.append({"price_int": doc["price_int"], "observed_at": since or now})
+        entries.append({"price_int": price, "observed_at": now})
+        update["$push"] = {"price_history": {"$each": entries, "$slice": -PRICE_HISTORY_LIMIT}}
+        update["$inc"] = {"price_changes": 1}
+        # build_price_daily moves the listing to its new price on the next run
+        update["$unset"] = {PRICE_DAILY_MARKER: ""}
+        changed.append(f"price {doc.get('price_int')}→{price}")
+
+    status = state.get("status")
+    if status and status != doc.get("status"):
+        set_fields["status"] = status
+        set_fields["status_changed_at"] = now
+        if status == SOLD:
+            set_fields["sold_at"] = now
+        changed.append(f"status {doc.get('status')}→{status}")
+
+    projected = dict(doc, **set_fields)
+    projected["price_changes"] = int(doc.get("price_changes") or 0) + ("$inc" in update)
+    if projected.get("status") != SOLD:
+        set_fields["recheck_due_at"] = now + recheck_interval(projected, now)
+    return update, changed
+
+
+def history_points(
+    doc: Dict[str, Any], update: Dict[str, Any], now: datetime
+) -> List[Dict[str, Any]]:
+    """price_history time-series points for a price or status change."""
+    set_fields = update["$set"]
+    if "price_int" not in set_fields and "status" not in set_fields:
+        return []
+    point = {
+        "observed_at": now,
+        "platform": doc.get("platform"),
+        "url": doc["url"],
+        "price_int": set_fields.get("price_int", doc.get("price_int")),
+        "status": set_fields.get("status", doc.get("status")),
+    }
+    if "$push" in update and len(update["$push"]["price_history"]["$each"]) > 1:
+        # listing saved before price_history existed: record the crawled state first
+        baseline = update["$push"]["price_history"]["$each"][0]
+        return [dict(point, observed_at=baseline["observed_at"], price_int=doc.get("price_int"),
+                     status=doc.get("status")), point]
+    return [point]
+
+
+def budget_used(db, day: str) -> int:
+    doc = db[BUDGET_COLLECTION].find_one({"_id": day}) or {}
+    return int(doc.get("used", 0))
+
+
+def spend_budget(db, day: str, count: int) -> None:
+    if count:
+        db[BUDGET_COLLECTION].update_one({"_id": day}, {"$inc": {"used": count}}, upsert=True)
+
+
+def due_listings(
+    collection: Collection, platforms: List[str], now: datetime, limit: int
+) -> Iterator[Dict[str, Any]]:
+    """Never-checked listings first, newest and most volatile first; then overdue ones."""
+    base = {
+        "platform": {"$in": platforms},
+        "status": {"$ne": SOLD},
+        "delisted_at": {"$exists": False},
+        "url": {"$type": "string"},
+    }
+    projection = {
+        "url": 1, "platform": 1, "price_int": 1, "status": 1, "uploaded_at": 1,
+        "upload_time": 1, "price_changes": 1, "price_history": 1, "rechecked_at": 1,
+    }
+    # fresh listings move and sell fastest, so a backlog of never-checked ones
+    # is worked from the newest upload down (as recheck_interval schedules them)
+    never_checked = collection.find(
+        dict(base, recheck_due_at={"$exists": False}), projection
+    ).sort([("uploaded_at", -1), ("price_changes", -1)]).limit(limit)
+    yielded = 0
+    for doc in never_checked:
+        yielded += 1
+        yield doc
+    if yielded >= limit:
+        return
+    overdue = collection.find(
+        dict(base, recheck_due_at={"$lte": now}), projection
+    ).sort("recheck_due_at", 1).limit(limit - yielded)
+    yield from overdue
+
+
+def main() -> None:
+    args = parse_args()
+    client = MongoClient(args.mongodb_uri, tz_aware=True)
+    db = client[args.database]
+    collection = db[args.collection]
+    platforms = args.platform or list(PLATFORMS)
+
+    now = datetime.now(KST)
+    day = now.strftime("%Y-%m-%d")
+    remaining = args.daily_budget - budget_used(db, day)
+    if args.limit > 0:
+        remaining = min(remaining, args.limit)
+    if remaining <= 0:
+        print(f"Daily budget exhausted for {day} ({args.daily_budget} requests).")
+        return
+
+    checker = ListingChecker()
+    counts = {"checked": 0, "unchanged": 0, "price": 0, "status": 0, "delisted": 0, "errors": 0}
+    operations: List[UpdateOne] = []
+    operation_urls: List[str] = []
+    points: List[Dict[str, Any]] = []
+    spent = 0
+
+    def flush() -> None:
+        nonlocal spent
+        if operations and not args.dry_run:
+            failed = set()
+            try:
+                collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as exc:
+                errors = exc.details.get("writeErrors", [])
+                failed = {operation_urls[e["index"]] for e in errors}
+                print(f"Failed to update {len(errors)} listings.")
+            # history only for listings whose update was written
+            price_history.record(db, [p for p in points if p["url"] not in failed])
+        if not args.dry_run:
+            spend_budget(db, day, spent)
+        operations.clear()
+        operation_urls.clear()
+        points.clear()
+        spent = 0
+
+    try:
+        for doc in due_listings(collection, platforms, now, remaining):
+            try:
+                state, error = checker.check(doc)
+            except retry.CircuitOpenError as exc:
+                print(f"Stopping early: {exc}")
+                break
+            spent += 1
+            counts["checked"] += 1
+            checked_at = datetime.now(KST)
+            if error:
+                counts["errors"] += 1
+                if args.verbose:
+                    print(f"{doc['url']} : {error}")
+                operations.append(UpdateOne(
+                    {"_id": doc["_id"]}, {"$set": {"recheck_due_at": checked_at + ERROR_INTERVAL}}
+                ))
+                operation_urls.append(doc["url"])
+            else:
+                update, changed = build_update(doc, state, checked_at)
+                operations.append(UpdateOne({"_id": doc["_id"]}, update))
+                operation_urls.append(doc["url"])
+                points.extend(history_points(doc, update, checked_at))
+                if not changed:
+                    counts["unchanged"] += 1
+                for change in changed:
+                    counts[change.split(" ")[0]] += 1
+                if changed and args.verbose:
+                    print(f"{doc['url']} : {', '.join(changed)}")
+
+            if len(operations) >= BATCH_SIZE:
+                flush()
+            if args.delay > 0:
+                time.sleep(args.delay)
+    finally:
+        flush()
+        client.close()
+
+    print(
+        f"Checked {counts['checked']} ({day}, budget {args.daily_budget}): "
+        f"price changes {counts['price']}, status changes {counts['status']}, "
+        f"delisted {counts['delisted']}, unchanged {counts['unchanged']}, errors {counts['errors']}"
+    )
+    if args.dry_run:
+        print("Dry run: nothing written.")
+
+
+if __name__ == "__main__":
+    main()
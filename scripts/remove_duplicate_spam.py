@@ -28,6 +28,10 @@ KST = timezone(timedelta(hours=9))
 
 
 def parse_upload_time(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc).astimezone(KST)
+        return value.astimezone(KST)
     if not isinstance(value, str):
         return None
     text = value.strip()
@@ -108,6 +112,7 @@ def process_duplicates(
             "platform": 1,
             "region": 1,
             "upload_time": 1,
+            "uploaded_at": 1,
         },
         no_cursor_timeout=True,
     ).batch_size(batch_size)
@@ -128,7 +133,7 @@ def process_duplicates(
             )
 
             record = best_map.get(key)
-            upload_dt = parse_upload_time(doc.get("upload_time"))
+            upload_dt = parse_upload_time(doc.get("uploaded_at") or doc.get("upload_time"))
 
             if not record:
                 best_map[key] = {
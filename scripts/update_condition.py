@@ -24,6 +24,9 @@ import requests
 from pymongo import MongoClient
 from pymongo.collection import Collection
 
+from build_price_daily import MARKER_FIELD as PRICE_DAILY_MARKER
+from enrichment_jobs import finish_jobs, pending_product_ids, skip_unmatched
+
 TITLE_KEYWORDS = ("미개봉", "새 상품", "새상품", "새 제품", "새제품")
 CARROT_SKIP_KEYWORDS = ("워치", "버즈", "핏", "북")
 CONDITIONS = ["새 상품", "사용감 없음", "사용감 적음", "사용감 많음", "고장/파손 상품"]
@@ -52,6 +55,11 @@ def parse_args() -> argparse.Namespace:
         default=0,
         help="Zero-based index of this worker (default: 0)",
     )
+    parser.add_argument(
+        "--from-queue",
+        action="store_true",
+        help="Only process pending llm_condition jobs queued by enrichment_worker.py",
+    )
     return parser.parse_args()
 
 
@@ -68,13 +76,15 @@ def remove_carrot_watch(collection: Collection) -> int:
     return result.deleted_count
 
 
-def find_target_docs(collection: Collection) -> Iterable[Dict[str, Any]]:
-    query = {
+def find_target_docs(collection: Collection, ids: Iterable[Any] | None = None) -> Iterable[Dict[str, Any]]:
+    query: Dict[str, Any] = {
         "$or": [
             {"condition": {"$exists": False}},
             {"condition": {"$nin": CONDITIONS}},
         ]
     }
+    if ids is not None:
+        query["_id"] = {"$in": list(ids)}
     cursor = collection.find(query, no_cursor_timeout=True).batch_size(500)
     try:
         for doc in cursor:
@@ -164,7 +174,11 @@ def extract_condition(data: Any) -> str | None:
 
 
 def update_condition(collection: Collection, doc_id, new_condition: str) -> None:
-    collection.update_one({"_id": doc_id}, {"$set": {"condition": new_condition}})
+    # clearing the marker re-buckets the listing under its new condition group
+    collection.update_one(
+        {"_id": doc_id},
+        {"$set": {"condition": new_condition}, "$unset": {PRICE_DAILY_MARKER: ""}},
+    )
 
 
 def main() -> None:
@@ -178,7 +192,16 @@ def main() -> None:
     removed = remove_carrot_watch(collection)
     print(f"[INFO] Removed {removed} 당근마켓 워치/버즈/핏/북 entries.")
 
-    docs = list(find_target_docs(collection))
+    if args.from_queue:
+        queued_ids = pending_product_ids(collection.database, "llm_condition")
+        docs = list(find_target_docs(collection, queued_ids))
+        # deleted above, or classified since the job was queued
+        skipped_jobs = skip_unmatched(
+            collection.database, "llm_condition", queued_ids, (doc["_id"] for doc in docs)
+        )
+        print(f"[INFO] Skipped {skipped_jobs} queued jobs no longer needing a condition.")
+    else:
+        docs = list(find_target_docs(collection))
     total = len(docs)
     print(f"[INFO] Target docs (condition missing or outside allowed set): {total}")
 
@@ -190,11 +213,14 @@ def main() -> None:
         return (value % args.worker_count) == args.worker_index
 
     assigned = 0
+    assigned_ids: list[Any] = []
+    failed_ids: list[Any] = []
     for idx, doc in enumerate(docs, start=1):
         doc_id = doc.get("_id")
         if not belongs_to_worker(doc_id):
             continue
         assigned += 1
+        assigned_ids.append(doc_id)
         platform = doc.get("platform")
         condition = doc.get("condition")
         title = doc.get("title") if isinstance(doc.get("title"), str) else ""
@@ -213,6 +239,7 @@ def main() -> None:
                 llm_updates += 1
             else:
                 skipped += 1
+                failed_ids.append(doc_id)
 
         if assigned % args.log_interval == 0:
             print(
@@ -221,6 +248,12 @@ def main() -> None:
                 f"(rule_jn={rule_jn}, rule_title={rule_title}, llm={llm_updates}, skipped={skipped})"
             )
 
+    if args.from_queue:
+        failed = set(failed_ids)
+        done_ids = [doc_id for doc_id in assigned_ids if doc_id not in failed]
+        finish_jobs(collection.database, "llm_condition", done_ids)
+        finish_jobs(collection.database, "llm_condition", failed_ids, status="failed")
+
     print("=== Summary ===")
     print(
         f"Worker {args.worker_index}/{args.worker_count} processed {assigned} "